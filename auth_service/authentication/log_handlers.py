@@ -0,0 +1,164 @@
+"""
+Logging handlers, formatter and filter used by settings.LOGGING.
+
+org_service carries a twin of this module (org_service/organizations/log_handlers.py);
+change both copies together.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from django.utils.module_loading import import_string
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'trace_id'}
+
+
+class _FlushMarker:
+    """
+    Queued by BackgroundHandler.flush; set once the listener reaches it, i.e.
+    once every record queued before it has been written
+    """
+
+    def __init__(self):
+        self.reached = threading.Event()
+
+
+class _Listener(QueueListener):
+
+    def handle(self, record):
+        if isinstance(record, _FlushMarker):
+            record.reached.set()
+        else:
+            super().handle(record)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Puts records on a bounded queue that a QueueListener thread formats and
+    writes to the target handler, so request threads never wait on log I/O.
+
+    Messages stay unformatted until the listener writes them (lazy %-style
+    arguments are only rendered there). Filters run on the calling thread,
+    so sampling drops records early and context such as the trace id is
+    captured where the record was made. When the queue is full, records
+    below ERROR are dropped and counted; errors wait up to ERROR_PUT_TIMEOUT
+    for room so they are kept.
+    """
+    ERROR_PUT_TIMEOUT = 1.0
+    FLUSH_TIMEOUT = 5.0
+
+    def __init__(self, target_class='logging.StreamHandler', queue_size=10000, **target_kwargs):
+        super().__init__(queue.Queue(queue_size))
+        self.target = import_string(target_class)(**target_kwargs)
+        self.dropped = 0
+        self._listener = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        # Drain the queue on interpreter exit (runs before logging.shutdown)
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, in the target handler
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        # Threads do not survive fork: preforked workers start their own listener
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid != os.getpid():
+                self._listener = _Listener(self.queue, self.target)
+                self._listener.start()
+                self._listener_pid = os.getpid()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.ERROR:
+                self.dropped += 1
+                return
+            try:
+                self.queue.put(record, timeout=self.ERROR_PUT_TIMEOUT)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self):
+        """
+        Wait (up to FLUSH_TIMEOUT) until everything queued so far has been
+        written. The listener keeps running; records queued meanwhile by other
+        threads are not waited for.
+        """
+        if self._listener_pid == os.getpid():
+            marker = _FlushMarker()
+            try:
+                self.queue.put(marker, timeout=self.FLUSH_TIMEOUT)
+            except queue.Full:
+                pass
+            else:
+                marker.reached.wait(self.FLUSH_TIMEOUT)
+        self.target.flush()
+
+    def close(self):
+        if self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener_pid = None
+        self.target.close()
+        super().close()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, process,
+    thread, trace id, any `extra` fields and the formatted exception
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.thread,
+            'trace_id': getattr(record, 'trace_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a `rates[logger]` share of a logger's records below WARNING (the
+    closest configured ancestor logger applies). Warnings and errors are
+    always kept.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        return random.random() < self.rate_for(record.name)
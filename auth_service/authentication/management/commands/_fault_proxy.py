@@ -0,0 +1,363 @@
+"""
+HTTP proxy injecting faults between auth_service and org_service, used by
+bench_login --fault-scenario and the fault_proxy command.
+
+A scenario is a profile, or a list of profiles (phases) that each last
+`duration_s` seconds; the last phase stays in effect. Profile keys:
+
+    latency         {'distribution': 'fixed', 'ms': 50}
+                    {'distribution': 'uniform', 'low_ms': 10, 'high_ms': 90}
+                    {'distribution': 'normal', 'mean_ms': 50, 'stddev_ms': 10}
+                    {'distribution': 'lognormal', 'median_ms': 40, 'sigma': 0.5}
+                    {'distribution': 'pareto', 'scale_ms': 5, 'shape': 1.5, 'max_ms': 2000}
+    error_rate      fraction of requests answered with error_status (default 503)
+    burst           {'every_s': 10, 'duration_s': 2, 'status': 503}: every request
+                    in the first duration_s of each every_s window fails
+    reset_rate      fraction of connections reset (RST) instead of answered
+    bandwidth_kbps  response body throughput limit, in kilobytes per second
+
+The running scenario can be read and replaced with GET / PUT on CONTROL_PATH.
+"""
+import http.client
+import json
+import multiprocessing
+import queue
+import random
+import socket
+import struct
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+CONTROL_PATH = '/_fault/scenario'
+PROFILE_KEYS = {'duration_s', 'latency', 'error_rate', 'error_status', 'burst', 'reset_rate', 'bandwidth_kbps'}
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'transfer-encoding', 'upgrade', 'host', 'content-length',
+}
+
+SCENARIOS = {
+    'none': {},
+    'slow': {'latency': {'distribution': 'lognormal', 'median_ms': 40, 'sigma': 0.3}},
+    'long_tail': {'latency': {'distribution': 'pareto', 'scale_ms': 5, 'shape': 1.5, 'max_ms': 2000}},
+    'error_bursts': {'burst': {'every_s': 10, 'duration_s': 2, 'status': 503}},
+    'flaky_connections': {'reset_rate': 0.05},
+    'narrow_pipe': {'bandwidth_kbps': 8},
+    'degrading': [
+        {'duration_s': 10},
+        {'duration_s': 10, 'latency': {'distribution': 'fixed', 'ms': 100}},
+        {'latency': {'distribution': 'fixed', 'ms': 200}, 'error_rate': 0.2},
+    ],
+}
+
+
+def load_scenarios(path=None):
+    """
+    Built-in scenarios, plus or overridden by those of a JSON file mapping names to scenarios
+    """
+    scenarios = dict(SCENARIOS)
+    if path:
+        with open(path) as f:
+            scenarios.update(json.load(f))
+    return scenarios
+
+
+LATENCY_PARAMETERS = {
+    'fixed': ('ms',),
+    'uniform': ('low_ms', 'high_ms'),
+    'normal': ('mean_ms', 'stddev_ms'),
+    'lognormal': ('median_ms', 'sigma'),
+    'pareto': ('scale_ms', 'shape'),
+}
+
+
+def _check_number(settings, key, minimum=0, maximum=None, required=True, above_minimum=False):
+    """
+    Check settings[key] is a number within its range; raises ValueError otherwise
+    """
+    if key not in settings:
+        if required:
+            raise ValueError(f"Missing fault setting {key!r}")
+        return
+    value = settings[key]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key} must be a number, got {value!r}")
+    if value < minimum or (above_minimum and value == minimum) or (maximum is not None and value > maximum):
+        bounds = f"{'above' if above_minimum else 'at least'} {minimum}"
+        if maximum is not None:
+            bounds += f" and at most {maximum}"
+        raise ValueError(f"{key} must be {bounds}, got {value!r}")
+
+
+def _check_status(settings, key):
+    _check_number(settings, key, minimum=100, maximum=599, required=False)
+    if key in settings and not isinstance(settings[key], int):
+        raise ValueError(f"{key} must be an integer HTTP status, got {settings[key]!r}")
+
+
+def _check_object(phase, key):
+    if not isinstance(phase[key], dict):
+        raise ValueError(f"{key} must be an object, got {phase[key]!r}")
+    return phase[key]
+
+
+def validate_profile(phase):
+    """
+    Check the keys, types and ranges of one scenario phase; raises ValueError
+    """
+    if not isinstance(phase, dict):
+        raise ValueError(f"A scenario phase must be an object, got {phase!r}")
+    unknown = set(phase) - PROFILE_KEYS
+    if unknown:
+        raise ValueError(f"Unknown fault settings: {', '.join(sorted(unknown))}")
+    _check_number(phase, 'duration_s', required=False)
+    _check_number(phase, 'error_rate', maximum=1, required=False)
+    _check_number(phase, 'reset_rate', maximum=1, required=False)
+    _check_number(phase, 'bandwidth_kbps', required=False)
+    _check_status(phase, 'error_status')
+    if 'latency' in phase:
+        latency = _check_object(phase, 'latency')
+        distribution = latency.get('distribution', 'fixed')
+        if distribution not in LATENCY_PARAMETERS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}")
+        unknown = set(latency) - {'distribution', 'max_ms', *LATENCY_PARAMETERS[distribution]}
+        if unknown:
+            raise ValueError(f"Unknown {distribution} latency settings: {', '.join(sorted(unknown))}")
+        for key in LATENCY_PARAMETERS[distribution]:
+            # A Pareto shape of 0 has no finite samples
+            _check_number(latency, key, above_minimum=key == 'shape')
+        _check_number(latency, 'max_ms', required=False)
+        if distribution == 'uniform' and latency['low_ms'] > latency['high_ms']:
+            raise ValueError("low_ms must not exceed high_ms")
+    if 'burst' in phase:
+        burst = _check_object(phase, 'burst')
+        unknown = set(burst) - {'every_s', 'duration_s', 'status'}
+        if unknown:
+            raise ValueError(f"Unknown burst settings: {', '.join(sorted(unknown))}")
+        _check_number(burst, 'every_s', above_minimum=True)
+        _check_number(burst, 'duration_s')
+        _check_status(burst, 'status')
+
+
+def sample_latency_ms(spec):
+    distribution = spec.get('distribution', 'fixed')
+    if distribution == 'fixed':
+        delay = spec['ms']
+    elif distribution == 'uniform':
+        delay = random.uniform(spec['low_ms'], spec['high_ms'])
+    elif distribution == 'normal':
+        delay = random.gauss(spec['mean_ms'], spec['stddev_ms'])
+    elif distribution == 'lognormal':
+        delay = spec['median_ms'] * random.lognormvariate(0, spec['sigma'])
+    elif distribution == 'pareto':
+        delay = spec['scale_ms'] * random.paretovariate(spec['shape'])
+    else:
+        raise ValueError(f"Unknown latency distribution {distribution!r}")
+    return max(0.0, min(delay, spec.get('max_ms', float('inf'))))
+
+
+class Scenario:
+    """
+    Phases of a scenario, timed from when it was installed
+    """
+
+    def __init__(self, spec, clock=time.monotonic):
+        phases = spec if isinstance(spec, list) else [spec]
+        for phase in phases:
+            validate_profile(phase)
+        self.spec = spec
+        self.phases = phases or [{}]
+        self.clock = clock
+        self.started = clock()
+
+    def profile(self):
+        elapsed = self.clock() - self.started
+        for phase in self.phases[:-1]:
+            elapsed -= phase.get('duration_s', 0)
+            if elapsed < 0:
+                return phase, elapsed + phase.get('duration_s', 0)
+        return self.phases[-1], elapsed
+
+    def error_status(self, profile, phase_elapsed):
+        """
+        Status code to fail the request with, or None to let it through
+        """
+        burst = profile.get('burst')
+        if burst and phase_elapsed % burst['every_s'] < burst['duration_s']:
+            return burst.get('status', 503)
+        if random.random() < profile.get('error_rate', 0):
+            return profile.get('error_status', 503)
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == CONTROL_PATH:
+            return self._reply(200, json.dumps(self.server.scenario.spec).encode('utf-8'))
+        self._forward()
+
+    def do_PUT(self):
+        if self.path == CONTROL_PATH:
+            try:
+                self.server.scenario = Scenario(json.loads(self._body() or b'{}'))
+            except (ValueError, KeyError, TypeError) as e:
+                return self._reply(400, json.dumps({'message': str(e)}).encode('utf-8'))
+            return self._reply(204, b'')
+        self._forward()
+
+    def do_POST(self):
+        self._forward()
+
+    def do_PATCH(self):
+        self._forward()
+
+    def do_DELETE(self):
+        self._forward()
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else None
+
+    def _forward(self):
+        body = self._body()
+        profile, phase_elapsed = self.server.scenario.profile()
+
+        if random.random() < profile.get('reset_rate', 0):
+            # Linger 0 makes close() send RST instead of FIN
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+            self.close_connection = True
+            return
+        if 'latency' in profile:
+            time.sleep(sample_latency_ms(profile['latency']) / 1000)
+        status_code = self.server.scenario.error_status(profile, phase_elapsed)
+        if status_code is not None:
+            payload = json.dumps({'message': 'Injected fault', 'detail': f"HTTP {status_code}"})
+            return self._reply(status_code, payload.encode('utf-8'), profile.get('bandwidth_kbps'))
+
+        headers = {key: value for key, value in self.headers.items() if key.lower() not in HOP_BY_HOP_HEADERS}
+        try:
+            response, content = self._send_upstream(body, headers)
+        except (OSError, http.client.HTTPException):
+            return self._reply(502, json.dumps({'message': 'Upstream unavailable'}).encode('utf-8'))
+        passed = [
+            (key, value) for key, value in response.getheaders() if key.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        self._reply(response.status, content, profile.get('bandwidth_kbps'), passed)
+
+    def _send_upstream(self, body, headers):
+        """
+        Forward over a pooled keep-alive connection; one the upstream closed
+        while idle is replaced by a fresh connection once
+        """
+        pool = self.server.upstream_pool
+        try:
+            connection, reused = pool.get_nowait(), True
+        except queue.Empty:
+            connection, reused = None, False
+        while True:
+            if connection is None:
+                connection = http.client.HTTPConnection(self.server.upstream.netloc, timeout=60)
+            try:
+                connection.request(self.command, self.path, body=body, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if not reused:
+                    raise
+                connection, reused = None, False
+                continue
+            if response.will_close:
+                connection.close()
+            else:
+                pool.put(connection)
+            return response, content
+
+    def _reply(self, status_code, content, bandwidth_kbps=None, headers=()):
+        self.send_response(status_code)
+        for key, value in headers:
+            self.send_header(key, value)
+        if not headers:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if not bandwidth_kbps:
+            self.wfile.write(content)
+            return
+        bytes_per_s = bandwidth_kbps * 1024
+        # Small chunks, so even short bodies are spread over their transfer time
+        chunk = max(1, int(bytes_per_s / 100))
+        for start in range(0, len(content), chunk):
+            piece = content[start:start + chunk]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / bytes_per_s)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(upstream, scenario=None, port=0, host='127.0.0.1'):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.upstream = urlsplit(upstream)
+    server.scenario = Scenario(scenario or {})
+    server.upstream_pool = queue.LifoQueue()
+    return server
+
+
+def _serve(upstream, scenario, ports):
+    server = make_server(upstream, scenario)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+class FaultProxy:
+    """
+    Fault-injecting proxy in front of `upstream`, run in its own process so
+    it does not compete with the load generator for the GIL
+    """
+
+    def __init__(self, upstream, scenario=None):
+        self.upstream = upstream.rstrip('/')
+        self.scenario = scenario
+        self.process = None
+        self.url = None
+
+    def start(self):
+        ports = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(self.upstream, self.scenario, ports), daemon=True
+        )
+        self.process.start()
+        self.url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+        return self.url
+
+    def set_scenario(self, spec):
+        """
+        Replace the running scenario; its phases start over from now
+        """
+        body = json.dumps(spec).encode('utf-8')
+        connection = http.client.HTTPConnection(urlsplit(self.url).netloc, timeout=10)
+        try:
+            connection.request('PUT', CONTROL_PATH, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            if response.status != 204:
+                raise ValueError(json.loads(response.read())['message'])
+        finally:
+            connection.close()
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,89 @@
+"""
+Stand-in for org_service's /internal/users/<email>/ used by bench_login
+"""
+import json
+import multiprocessing
+import random
+import re
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+USER_PATH = re.compile(r'^/internal/users/(?P<email>[^/]+)/$')
+ROLES = ('admin', 'member', 'member', 'member', 'viewer')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        match = USER_PATH.match(self.path)
+        if match is None:
+            return self._reply(404, {"message": "Not found"})
+
+        config = self.server.config
+        delay = config['latency_ms'] + random.uniform(-config['jitter_ms'], config['jitter_ms'])
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if random.random() < config['error_rate']:
+            return self._reply(503, {"message": "Injected error"})
+
+        # Stable ids per email so repeated logins see the same user
+        user_id = zlib.crc32(match['email'].encode('utf-8'))
+        self._reply(200, {
+            'user_id': str(user_id),
+            'org_id': str(user_id % 1000 + 1),
+            'role': ROLES[user_id % len(ROLES)],
+        })
+
+    def _reply(self, status_code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(config, ports):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.config = config
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+class OrgServiceStub:
+    """
+    Answers user lookups after `latency_ms` +/- `jitter_ms` (uniform), failing
+    with 503 at `error_rate`. Runs in its own process so it does not compete
+    with the load generator for the GIL.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+        self.config = {'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'error_rate': error_rate}
+        self.process = None
+        self.url = None
+
+    def start(self):
+        ports = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(self.config, ports), daemon=True)
+        self.process.start()
+        self.url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+        return self.url
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,318 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+import requests
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from authentication.models.models import AuthUser
+from ._bench import run_concurrently, summarize, format_summary
+from ._fault_proxy import FaultProxy, Scenario, load_scenarios
+from ._org_stub import OrgServiceStub
+
+BENCH_ALIAS = 'bench_login'
+# Compared against the baseline; True when a higher value is better
+COMPARED_METRICS = {
+    'throughput_per_s': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'error_rate': False,
+}
+
+
+def compare(current, baseline):
+    """
+    Per-metric change from the baseline, as a percentage where positive is worse
+    """
+    changes = {}
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        before, after = baseline.get(metric), current.get(metric)
+        if before is None or after is None:
+            continue
+        if before:
+            change = (after - before) / before * 100
+        else:
+            change = 0.0 if not after else 100.0
+        changes[metric] = {
+            'baseline': before,
+            'current': after,
+            'regression_pct': round(-change if higher_is_better else change, 2),
+        }
+    return changes
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test POST /auth/login/ end to end: boot auth_service against a stub "
+        "(or the real) org_service, drive logins at the given concurrency and report "
+        "RPS, p50/p95/p99 and errors, optionally against a saved baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Measured logins")
+        parser.add_argument('--warmup', type=int, default=20, help="Logins sent first and not measured")
+        parser.add_argument('--concurrency', type=int, default=8, help="Clients sending logins in parallel")
+        parser.add_argument('--users', type=int, default=100, help="Distinct accounts the logins cycle through")
+        parser.add_argument('--email-format', default='bench-{i}@example.com',
+                            help="Account emails; with --org-url they must exist in org_service")
+        parser.add_argument('--password', default='bench-password')
+
+        parser.add_argument('--target', help="Base URL of an already running auth_service (default: boot one)")
+        parser.add_argument('--no-seed', action='store_true',
+                            help="With --target, do not create the accounts in this database")
+        parser.add_argument('--server-env', action='append', default=[], metavar='KEY=VALUE',
+                            help="Extra environment for the booted auth_service")
+
+        parser.add_argument('--org-url', help="Use the org_service at this URL instead of the stub")
+        parser.add_argument('--stub-latency-ms', type=float, default=5.0)
+        parser.add_argument('--stub-jitter-ms', type=float, default=0.0)
+        parser.add_argument('--stub-error-rate', type=float, default=0.0)
+
+        parser.add_argument('--fault-scenario', action='append', default=[], metavar='NAME',
+                            help="Put the fault proxy between the services and measure under this "
+                                 "scenario (repeatable, or 'all'); a run without faults is added first")
+        parser.add_argument('--fault-scenarios-file', help="JSON file of extra fault scenarios, by name")
+
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this path")
+        parser.add_argument('--baseline', help="Results JSON of an earlier run to compare against")
+        parser.add_argument('--max-regression', type=float,
+                            help="Fail if any compared metric is this many percent worse than the baseline")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+        scenarios = self._scenarios(options)
+
+        stub = proxy = None
+        org_url = options['org_url']
+        try:
+            if org_url is None:
+                stub = OrgServiceStub(
+                    options['stub_latency_ms'], options['stub_jitter_ms'], options['stub_error_rate']
+                )
+                org_url = stub.start()
+            if scenarios:
+                proxy = FaultProxy(org_url)
+                org_url = proxy.start()
+            with tempfile.TemporaryDirectory() as tmp:
+                results = self._run(org_url, tmp, options, proxy, scenarios)
+        finally:
+            for process in (proxy, stub):
+                if process is not None:
+                    process.stop()
+        for result in results:
+            result['org_service'] = {'url': options['org_url']} if stub is None else {'stub': stub.config}
+
+        if scenarios:
+            # Each fault profile against the same run without faults
+            reference = results[0]
+            for result in results:
+                result['degradation'] = {
+                    metric: change['regression_pct'] for metric, change in compare(result, reference).items()
+                }
+        for result in results:
+            self.stdout.write(format_summary(result))
+            if result['status_codes']:
+                self.stdout.write(f"{'':<28} status codes: {result['status_codes']}")
+        if scenarios:
+            self._write_degradation(results[1:])
+
+        output = results if scenarios else results[0]
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(output, f, indent=2)
+        if baseline is not None:
+            self._compare(output, baseline, options['max_regression'])
+
+    def _scenarios(self, options):
+        """
+        (name, spec) of the requested fault scenarios, led by the fault-free 'none'
+        """
+        names = options['fault_scenario']
+        if not names:
+            return []
+        try:
+            available = load_scenarios(options['fault_scenarios_file'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read fault scenarios: {e}")
+        if 'all' in names:
+            names = list(available)
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise CommandError(f"Unknown fault scenarios: {', '.join(unknown)} (known: {', '.join(available)})")
+
+        scenarios = []
+        for name in ['none', *[name for name in dict.fromkeys(names) if name != 'none']]:
+            try:
+                Scenario(available[name])
+            except (ValueError, KeyError, TypeError) as e:
+                raise CommandError(f"Invalid fault scenario {name!r}: {e}")
+            scenarios.append((name, available[name]))
+        return scenarios
+
+    def _run(self, org_url, tmp, options, proxy, scenarios):
+        emails = [options['email_format'].format(i=i) for i in range(options['users'])]
+        server = None
+        target = options['target']
+        if target is None:
+            path = os.path.join(tmp, 'auth.sqlite3')
+            self._seed(self._register(path), emails, options['password'])
+            server, target = self._boot(path, org_url, tmp, options['server_env'])
+        elif not options['no_seed']:
+            self._seed('default', emails, options['password'])
+        url = target.rstrip('/') + '/auth/login/'
+
+        try:
+            if not scenarios:
+                return [self._load(url, emails, options)]
+            results = []
+            for name, spec in scenarios:
+                proxy.set_scenario({})
+                # Phases start with the measured requests, after the warm-up
+                result = self._load(url, emails, options, on_start=lambda: proxy.set_scenario(spec))
+                result['name'] = f"login/{name}"
+                result['scenario'] = name
+                results.append(result)
+            return results
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    def _register(self, path):
+        configured = connections.configure_settings({
+            'default': connections.settings['default'],
+            BENCH_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+        })
+        connections.settings[BENCH_ALIAS] = configured[BENCH_ALIAS]
+        call_command('migrate', database=BENCH_ALIAS, verbosity=0)
+        return BENCH_ALIAS
+
+    def _seed(self, alias, emails, password):
+        # Hash once: every account shares the password
+        password_hash = make_password(password)
+        try:
+            AuthUser.objects.using(alias).bulk_create(
+                [AuthUser(email=email, password=password_hash) for email in emails],
+                ignore_conflicts=True,
+            )
+        finally:
+            if alias == BENCH_ALIAS:
+                connections[alias].close()
+                del connections.settings[alias]
+
+    def _boot(self, db_path, org_url, tmp, server_env):
+        port = _free_port()
+        env = dict(os.environ, DB_ENGINE='sqlite', DB_NAME=db_path, ORG_SERVICE_URL=org_url, DEBUG='False')
+        for item in server_env:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"--server-env expects KEY=VALUE, got {item!r}")
+            env[key] = value
+
+        log_path = os.path.join(tmp, 'server.log')
+        with open(log_path, 'w') as log:
+            server = subprocess.Popen(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver',
+                 '--noreload', '--skip-checks', f"127.0.0.1:{port}"],
+                env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                break
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server, f"http://127.0.0.1:{port}"
+            except OSError:
+                time.sleep(0.1)
+        server.kill()
+        server.wait()
+        with open(log_path) as log:
+            raise CommandError(f"auth_service did not start:\n{log.read()}")
+
+    def _load(self, url, emails, options, on_start=None):
+        local = threading.local()
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def login(i):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            response = session.post(
+                url, json={'email': emails[i % len(emails)], 'password': options['password']}, timeout=30
+            )
+            with lock:
+                statuses[response.status_code] += 1
+            return response.status_code == 200
+
+        if options['warmup']:
+            run_concurrently(login, options['warmup'], options['concurrency'])
+            statuses.clear()
+        if on_start is not None:
+            on_start()
+
+        latencies, errors, elapsed = run_concurrently(login, options['requests'], options['concurrency'])
+        summary = summarize('login', latencies, errors, elapsed)
+        summary['error_rate'] = round(len(errors) / len(latencies), 4) if latencies else 0.0
+        summary['concurrency'] = options['concurrency']
+        summary['status_codes'] = {str(code): count for code, count in sorted(statuses.items())}
+        return summary
+
+    def _write_degradation(self, results):
+        self.stdout.write(self.style.MIGRATE_HEADING("Degradation against no faults"))
+        for result in results:
+            degradation = result['degradation']
+            self.stdout.write(
+                f"{result['scenario']:<20} p99 {degradation.get('p99_ms', 0):+.1f}%  "
+                f"throughput {-degradation.get('throughput_per_s', 0):+.1f}%  "
+                f"error rate {result['error_rate']:.2%}"
+            )
+
+    def _compare(self, output, baseline, max_regression):
+        # Runs with fault scenarios are compared scenario by scenario
+        if isinstance(output, list) != isinstance(baseline, list):
+            raise CommandError("Compare runs with fault scenarios only against baselines with them")
+        if isinstance(output, list):
+            earlier = {result.get('scenario'): result for result in baseline}
+            pairs = [(result, earlier[result['scenario']]) for result in output if result['scenario'] in earlier]
+        else:
+            pairs = [(output, baseline)]
+
+        regressions = []
+        for result, previous in pairs:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{result['name']} against baseline"))
+            for metric, change in compare(result, previous).items():
+                pct = change['regression_pct']
+                verdict = f"{pct:.1f}% worse" if pct > 0 else f"{-pct:.1f}% better"
+                line = f"{metric:<18} {change['baseline']:>10} -> {change['current']:<10} {verdict}"
+                if max_regression is not None and pct > max_regression:
+                    regressions.append(f"{result['name']} {metric}")
+                    line = self.style.ERROR(line)
+                self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                f"Regressed more than {max_regression}% against the baseline: {', '.join(regressions)}"
+            )
@@ -0,0 +1,103 @@
+import json
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from authentication.models.models import AuthUser
+from authentication.serializers.serializers import LoginSerializer
+from authentication.services.services import AuthenticationService, ServiceClient
+from ._bench import measure, summarize_timings, format_timings, compare_timings, environment
+
+EMAIL = 'bench.user@example.com'
+PASSWORD = 'bench-password'
+# org_service ids are UUIDs; fixed so token sizes and runs stay comparable
+USER_ID = '6f1c2a4e-8b3d-4f7a-9c21-5d0e7b9a3f12'
+ORG_ID = '2b7e9d14-3c5a-4e8f-a6b0-91d4c8e2f735'
+
+
+def signature():
+    client = ServiceClient()
+    return lambda: client._generate_signature('GET', f"/internal/users/{EMAIL}/")
+
+
+def jwt_token():
+    return lambda: AuthenticationService.generate_jwt_token(
+        email=EMAIL, user_id=USER_ID, org_id=ORG_ID, role='member'
+    )
+
+
+def check_password():
+    # Unsaved: the hash check needs no database
+    user = AuthUser(email=EMAIL, password=make_password(PASSWORD))
+    return lambda: user.check_password(PASSWORD)
+
+
+def login_serializer():
+    data = {'email': ' Bench.User@Example.com ', 'password': PASSWORD}
+    return lambda: LoginSerializer(data=data).is_valid(raise_exception=True)
+
+
+# name -> fixture returning the operation to time; fixtures run once, untimed
+BENCHMARKS = {
+    'service_client.signature': signature,
+    'jwt.generate': jwt_token,
+    'auth_user.check_password': check_password,
+    'login_serializer.validate': login_serializer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the per-request primitives of auth_service (request signing, JWT, "
+        "password check, login validation) and optionally compare with a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=3, help="Samples run first and discarded")
+        parser.add_argument('--min-sample-time', type=float, default=0.05,
+                            help="Seconds each sample should last; sets the loop count")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this path")
+        parser.add_argument('--baseline', help="Results JSON of an earlier run to compare against")
+        parser.add_argument('--max-regression', type=float,
+                            help="Fail if any median is this many percent slower than the baseline")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)['benchmarks']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+
+        results = []
+        for name in options['names'] or BENCHMARKS:
+            timings, loops = measure(
+                BENCHMARKS[name](), options['samples'], options['warmup'], options['min_sample_time']
+            )
+            summary = summarize_timings(name, timings, loops)
+            results.append(summary)
+            self.stdout.write(format_timings(summary))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'environment': environment(), 'benchmarks': results}, f, indent=2)
+        if baseline is not None:
+            self._compare(results, baseline, options['max_regression'])
+
+    def _compare(self, results, baseline, max_regression):
+        regressions = []
+        self.stdout.write(self.style.MIGRATE_HEADING("Median against baseline"))
+        for name, change in compare_timings(results, baseline).items():
+            line = f"{name:<32} {change:+.1f}%"
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                f"Slower by more than {max_regression}% against the baseline: {', '.join(regressions)}"
+            )
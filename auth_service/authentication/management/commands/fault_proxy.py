@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ._fault_proxy import CONTROL_PATH, load_scenarios, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run an HTTP proxy that injects latency, 5xx bursts, connection resets and "
+        "bandwidth limits; point ORG_SERVICE_URL at it to degrade the org_service path"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--upstream', default=None, help="Proxied service (default: ORG_SERVICE_URL)")
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8002)
+        parser.add_argument('--scenario', default='none', help="Scenario to start with")
+        parser.add_argument('--scenarios-file', help="JSON file of extra scenarios, by name")
+        parser.add_argument('--list', action='store_true', help="List the scenarios and exit")
+
+    def handle(self, *args, **options):
+        try:
+            scenarios = load_scenarios(options['scenarios_file'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read scenarios: {e}")
+        if options['list']:
+            for name, spec in scenarios.items():
+                self.stdout.write(f"{name:<20} {spec}")
+            return
+        if options['scenario'] not in scenarios:
+            raise CommandError(f"Unknown scenario {options['scenario']!r}; see --list")
+
+        upstream = options['upstream'] or settings.ORG_SERVICE_URL
+        try:
+            server = make_server(upstream, scenarios[options['scenario']], options['port'], options['host'])
+        except ValueError as e:
+            raise CommandError(f"Invalid scenario: {e}")
+        self.stdout.write(
+            f"Proxying http://{options['host']}:{options['port']} -> {upstream} with scenario "
+            f"{options['scenario']!r}; PUT a scenario to {CONTROL_PATH} to change it"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,211 @@
+"""
+Size, write cost and usage of the app's indexes, with redundant ones flagged.
+
+org_service carries a twin of this module (org_service/organizations/management/commands/index_report.py);
+change both copies together.
+"""
+import json
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+APP_LABEL = 'authentication'
+
+POSTGRES_INDEX_STATS_SQL = """
+    SELECT s.indexrelname, pg_relation_size(s.indexrelid), s.idx_scan, s.idx_tup_read
+    FROM pg_stat_user_indexes s
+    WHERE s.relname = %s
+"""
+
+POSTGRES_TABLE_STATS_SQL = """
+    SELECT n_tup_ins, n_tup_upd - n_tup_hot_upd, n_tup_del, n_live_tup
+    FROM pg_stat_user_tables
+    WHERE relname = %s
+"""
+
+
+def _table_stats(connection, cursor, table):
+    """
+    Row count and write counters of a table; writes are None where the
+    backend keeps no statistics (SQLite)
+    """
+    if connection.vendor == 'postgresql':
+        cursor.execute(POSTGRES_TABLE_STATS_SQL, [table])
+        row = cursor.fetchone()
+        if row is None:
+            return {'rows': 0, 'writes': 0}
+        inserts, cold_updates, deletes, live = row
+        # Inserts, deletes and non-HOT updates each touch every index of the table
+        return {'rows': live, 'writes': inserts + cold_updates + deletes}
+
+    cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+    return {'rows': cursor.fetchone()[0], 'writes': None}
+
+
+def _index_stats(connection, cursor, table):
+    """
+    {index name: (size in bytes, scans, tuples read)} from the backend's statistics
+    """
+    if connection.vendor == 'postgresql':
+        cursor.execute(POSTGRES_INDEX_STATS_SQL, [table])
+        return {name: (size, scans, reads) for name, size, scans, reads in cursor.fetchall()}
+
+    if connection.vendor == 'sqlite':
+        try:
+            cursor.execute(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s) "
+                "GROUP BY name",
+                [table]
+            )
+        except Exception:
+            # SQLite built without the dbstat virtual table
+            return {}
+        return {name: (size, None, None) for name, size in cursor.fetchall()}
+    return {}
+
+
+def _sqlite_auto_indexes(cursor, table):
+    """
+    SQLite names the indexes behind PRIMARY KEY / UNIQUE sqlite_autoindex_*,
+    which introspection reports under the constraint name instead
+    """
+    cursor.execute(f'PRAGMA index_list("{table}")')
+    auto = {}
+    for _, name, _, origin, _ in cursor.fetchall():
+        if not name.startswith('sqlite_autoindex_'):
+            continue
+        cursor.execute(f'PRAGMA index_info("{name}")')
+        columns = tuple(row[2] for row in cursor.fetchall())
+        auto[columns, origin == 'pk'] = name
+    return auto
+
+
+def _redundancy(index, others):
+    """
+    Why an index is redundant given the table's other indexes, or None.
+
+    An index is redundant when another index covers the same columns with
+    at least the same guarantees, or when it is a non-unique index on a
+    leading prefix of another index.
+    """
+    def rank(candidate):
+        return candidate['primary_key'], candidate['unique']
+
+    columns = index['columns']
+    if None in columns:
+        return None
+    for other in others:
+        if other is index or None in other['columns']:
+            continue
+        if other['columns'] == columns:
+            # Of identical indexes keep the strongest, then the first by name
+            if rank(other) > rank(index) or (rank(other) == rank(index) and other['name'] < index['name']):
+                return f"duplicates {other['name']}"
+        elif not any(rank(index)) and other['columns'][:len(columns)] == columns:
+            return f"prefix of {other['name']}"
+    return None
+
+
+def collect(using=DEFAULT_DB_ALIAS, tables=None):
+    """
+    Index inventory of `tables` (default: this app's models) with size,
+    write cost, usage and redundancy findings
+    """
+    connection = connections[using]
+    if tables is None:
+        tables = sorted({
+            model._meta.db_table
+            for model in apps.get_app_config(APP_LABEL).get_models()
+            if not model._meta.proxy and model._meta.managed
+        })
+
+    report = []
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.table_names(cursor))
+        for table in tables:
+            if table not in existing:
+                continue
+            table_stats = _table_stats(connection, cursor, table)
+            stats = _index_stats(connection, cursor, table)
+            auto = _sqlite_auto_indexes(cursor, table) if connection.vendor == 'sqlite' else {}
+
+            indexes = []
+            for name, info in connection.introspection.get_constraints(cursor, table).items():
+                if not info['index'] and not info['unique'] and not info['primary_key']:
+                    continue  # foreign key and check constraints
+                columns = tuple(info['columns'] or [None])
+                physical = auto.get((columns, bool(info['primary_key'])), name)
+                size, scans, reads = stats.get(physical, stats.get(name, (None, None, None)))
+                indexes.append({
+                    'name': name,
+                    'columns': columns,
+                    'unique': bool(info['unique']),
+                    'primary_key': bool(info['primary_key']),
+                    'size_bytes': size,
+                    'scans': scans,
+                    'tuples_read': reads,
+                    'writes': table_stats['writes'],
+                })
+
+            for index in indexes:
+                findings = []
+                redundant = _redundancy(index, indexes)
+                if redundant:
+                    findings.append(redundant)
+                if index['scans'] == 0 and not index['unique'] and not index['primary_key']:
+                    findings.append('unused')
+                index['findings'] = findings
+
+            report.append({
+                'table': table,
+                'rows': table_stats['rows'],
+                'writes': table_stats['writes'],
+                'indexes': sorted(indexes, key=lambda index: index['name']),
+            })
+    return report
+
+
+def _format_size(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = "Report size, write cost and usage of the app's indexes and flag redundant ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--table', action='append', dest='tables', help="Limit to this table (repeatable)")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database alias: {options['database']}")
+        report = collect(options['database'], options['tables'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, default=list))
+            return
+
+        for table in report:
+            writes = table['writes'] if table['writes'] is not None else 'n/a'
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{table['table']}: {table['rows']} rows, {len(table['indexes'])} indexes, "
+                f"{writes} index-maintaining writes"
+            ))
+            for index in table['indexes']:
+                kind = 'pk' if index['primary_key'] else 'unique' if index['unique'] else 'index'
+                scans = index['scans'] if index['scans'] is not None else 'n/a'
+                line = (
+                    f"  {index['name']:<40} {kind:<6} ({', '.join(str(c) for c in index['columns'])}) "
+                    f"size={_format_size(index['size_bytes'])} scans={scans}"
+                )
+                if index['findings']:
+                    self.stdout.write(self.style.WARNING(f"{line}  <- {'; '.join(index['findings'])}"))
+                else:
+                    self.stdout.write(line)
@@ -0,0 +1,90 @@
+"""
+Per-stage latency breakdown of traces from the JSON-lines span files.
+
+org_service carries a twin of this module (org_service/organizations/management/commands/trace_report.py);
+change both copies together.
+"""
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def load_spans(paths, trace_id=None):
+    spans = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    span = json.loads(line)
+                    if trace_id is None or span['trace_id'] == trace_id:
+                        spans.append(span)
+        except FileNotFoundError:
+            raise CommandError(f"Trace file not found: {path}")
+    return spans
+
+
+def breakdown(spans):
+    """
+    Spans of one trace in call order as (depth, offset ms from the trace
+    start, span). Spans whose parent is missing (e.g. the caller's file was
+    not given) are treated as roots.
+    """
+    by_id = {span['span_id']: span for span in spans}
+    children = {}
+    for span in spans:
+        parent = span['parent_id'] if span['parent_id'] in by_id else None
+        children.setdefault(parent, []).append(span)
+    for group in children.values():
+        group.sort(key=lambda span: span['start'])
+
+    trace_start = min(span['start'] for span in spans)
+    rows = []
+
+    def walk(parent, depth):
+        for span in children.get(parent, []):
+            rows.append((depth, (span['start'] - trace_start) * 1000, span))
+            walk(span['span_id'], depth + 1)
+
+    walk(None, 0)
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Per-stage latency breakdown of a trace from the JSON-lines span files of one or more services"
+
+    def add_arguments(self, parser):
+        parser.add_argument('trace_id', nargs='?', help="Trace to break down; omit to list the slowest traces")
+        parser.add_argument(
+            '--file', action='append', dest='files',
+            help="Span file to read (repeatable, e.g. both services' files). Default: TRACE_EXPORT_FILE"
+        )
+        parser.add_argument('--limit', type=int, default=20, help="Traces to list without a trace id")
+
+    def handle(self, *args, **options):
+        files = options['files'] or [settings.TRACE_EXPORT_FILE]
+        spans = load_spans(files, options['trace_id'])
+
+        if options['trace_id'] is None:
+            roots = [span for span in spans if span['parent_id'] is None]
+            roots.sort(key=lambda span: span['duration_ms'], reverse=True)
+            for span in roots[:options['limit']]:
+                self.stdout.write(f"{span['trace_id']}  {span['duration_ms']:>10.1f}ms  {span['service']}  {span['name']}")
+            return
+
+        if not spans:
+            raise CommandError(f"No spans found for trace {options['trace_id']}")
+        for depth, offset, span in breakdown(spans):
+            line = (
+                f"{offset:>9.1f}ms +{span['duration_ms']:>9.1f}ms  "
+                f"{'  ' * depth}{span['service']}: {span['name']}"
+            )
+            statement = span['attributes'].get('db.statement')
+            if statement:
+                line += f"  [{statement[:80]}]"
+            if span['status'] != 'ok':
+                self.stdout.write(self.style.ERROR(f"{line}  ({span['attributes'].get('error', span['status'])})"))
+            else:
+                self.stdout.write(line)
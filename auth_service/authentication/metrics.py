@@ -0,0 +1,77 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Under a preforking server set PROMETHEUS_MULTIPROC_DIR to an empty directory
+shared by the workers (before they start): each worker then records into its
+own memory-mapped files and /metrics aggregates them all. Clear the directory
+on restart and call prometheus_client.multiprocess.mark_process_dead(pid) when
+a worker exits (gunicorn's child_exit hook) so live gauges stay accurate.
+"""
+import os
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+KNOWN_METHODS = {'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route, method and status',
+    ['route', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being served', multiprocess_mode='livesum'
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request by route',
+    ['route'], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds', 'Database time per request by route',
+    ['route'], buckets=LATENCY_BUCKETS
+)
+
+ORG_SERVICE_LATENCY = Histogram(
+    'org_service_request_duration_seconds', 'Latency of calls to org_service by endpoint',
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+ORG_SERVICE_ERRORS = Counter(
+    'org_service_errors', 'Failed calls to org_service by endpoint and reason',
+    ['endpoint', 'reason']
+)
+PASSWORD_HASH_TIME = Histogram(
+    'password_hash_duration_seconds', 'Time spent hashing or checking passwords',
+    ['operation'], buckets=LATENCY_BUCKETS
+)
+VIEW_STAGE_TIME = Histogram(
+    'view_stage_duration_seconds', 'Time per stage of instrumented views (see server_timing)',
+    ['view', 'stage'], buckets=LATENCY_BUCKETS
+)
+
+
+def route_of(request):
+    """
+    URL pattern that served the request, e.g. auth/login/.
+    Labels use the pattern rather than the path to keep emails and ids out
+    of the series and their number bounded.
+    """
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+def method_of(request):
+    return request.method if request.method in KNOWN_METHODS else 'other'
+
+
+def registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        aggregated = CollectorRegistry()
+        multiprocess.MultiProcessCollector(aggregated)
+        return aggregated
+    return REGISTRY
+
+
+def metrics_view(request):
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
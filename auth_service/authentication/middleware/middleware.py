@@ -0,0 +1,144 @@
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+from authentication import metrics, profiling, tracing
+from authentication.query_budget import QueryBudgetExceeded, QueryCounter, budget_for
+from authentication.slow_queries import SlowQueryLog, view_name
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    Counts queries and DB time per request, reports them as response headers
+    and checks them against the view's @query_budget. Over-budget requests
+    raise in tests (QUERY_BUDGET_ENFORCE) and are logged otherwise.
+    """
+    def process_request(self, request):
+        request._query_counter = QueryCounter().start()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = budget_for(view_func, request.method)
+
+    def process_response(self, request, response):
+        counter = getattr(request, '_query_counter', None)
+        if counter is None:
+            return response
+        counter.stop()
+
+        if settings.QUERY_BUDGET_HEADERS:
+            response['X-DB-Query-Count'] = str(counter.count)
+            response['X-DB-Time-Ms'] = f"{counter.duration * 1000:.1f}"
+        logger.debug(
+            "%s %s: %s queries in %.1fms", request.method, request.path, counter.count, counter.duration * 1000
+        )
+
+        budget = getattr(request, '_query_budget', None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f"{request.method} {request.path} ran {counter.count} queries, "
+                f"over its budget of {budget}"
+            )
+            if settings.QUERY_BUDGET_ENFORCE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class SlowQueryMiddleware(MiddlewareMixin):
+    """
+    Logs the request's slow queries, tagged with the view that ran them
+    """
+    def process_request(self, request):
+        request._slow_query_log = SlowQueryLog().start()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._slow_query_log.view = view_name(view_func)
+
+    def process_response(self, request, response):
+        slow_query_log = getattr(request, '_slow_query_log', None)
+        if slow_query_log is not None:
+            slow_query_log.stop()
+        return response
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Records request latency, in-flight requests and, from
+    QueryBudgetMiddleware's counter, per-request query counts and DB time.
+    Must come before QueryBudgetMiddleware so the counter has stopped.
+    """
+    def process_request(self, request):
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        request._metrics_start_time = time.perf_counter()
+
+    def process_response(self, request, response):
+        start_time = getattr(request, '_metrics_start_time', None)
+        if start_time is None:
+            return response
+        metrics.REQUESTS_IN_FLIGHT.dec()
+
+        route = metrics.route_of(request)
+        metrics.REQUEST_LATENCY.labels(route, metrics.method_of(request), response.status_code).observe(
+            time.perf_counter() - start_time
+        )
+        counter = getattr(request, '_query_counter', None)
+        if counter is not None:
+            metrics.REQUEST_DB_QUERIES.labels(route).observe(counter.count)
+            metrics.REQUEST_DB_TIME.labels(route).observe(counter.duration)
+        return response
+
+
+class TracingMiddleware(MiddlewareMixin):
+    """
+    Opens the request's server span, continuing the caller's W3C traceparent,
+    and for sampled requests records each query as a child span
+    """
+    def process_request(self, request):
+        span = tracing.start_trace(
+            request.method, request.headers.get(tracing.TRACEPARENT_HEADER),
+            **{'http.method': request.method}
+        )
+        request._trace_span = span
+        request._trace_token = tracing.activate(span)
+        if span.sampled:
+            request._trace_queries = ExitStack()
+            for alias in connections:
+                request._trace_queries.enter_context(connections[alias].execute_wrapper(tracing.trace_queries))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = metrics.route_of(request)
+        request._trace_span.name = f"{request.method} {route}"
+        request._trace_span.attributes['http.route'] = route
+
+    def process_response(self, request, response):
+        span = getattr(request, '_trace_span', None)
+        if span is None:
+            return response
+        trace_queries = getattr(request, '_trace_queries', None)
+        if trace_queries is not None:
+            trace_queries.close()
+
+        span.attributes['http.status_code'] = response.status_code
+        if response.status_code >= 500:
+            span.status = 'error'
+        span.end()
+        tracing.deactivate(request._trace_token)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Runs requests carrying a signed X-Profile header (see
+    profiling.sign_profile_request), or a PROFILING_SAMPLE_RATE share of all
+    requests, under the profiler. Other requests pass straight through.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.should_profile(request):
+            return profiling.profile_request(request, self.get_response)
+        return self.get_response(request)
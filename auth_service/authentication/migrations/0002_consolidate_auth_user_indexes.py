@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authuser',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:36
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_lowercase_emails'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='authuser',
+            name='unique_email_auth_user',
+        ),
+        migrations.AddConstraint(
+            model_name='authuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='unique_email_auth_user'),
+        ),
+    ]
@@ -1,24 +1,39 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.hashers import make_password, check_password
+from authentication import metrics, tracing
+
+class AuthUserQuerySet(models.QuerySet):
+    def by_email(self, email):
+        """
+        Case-insensitive email match served by the Lower(email) unique index
+        """
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.strip().lower())
 
 class AuthUser(models.Model):
-    email = models.EmailField(unique=True, db_index=True)
+    # Uniqueness (and the lookup index) come from unique_email_auth_user below;
+    # look users up with AuthUser.objects.by_email()
+    email = models.EmailField()
     password = models.CharField(max_length=128)  # bcrypt hashed
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AuthUserQuerySet.as_manager()
+
     class Meta:
         db_table = 'auth_users'
         constraints = [
-            models.UniqueConstraint(fields=['email'], name='unique_email_auth_user')
+            models.UniqueConstraint(Lower('email'), name='unique_email_auth_user')
         ]
 
     def set_password(self, raw_password):
         """Hash and set the password using Django's built-in bcrypt hashing"""
-        self.password = make_password(raw_password)
+        with tracing.start_span('password.hash'), metrics.PASSWORD_HASH_TIME.labels('hash').time():
+            self.password = make_password(raw_password)
 
     def check_password(self, raw_password):
         """Check the provided password against the stored hash"""
-        return check_password(raw_password, self.password)
+        with tracing.start_span('password.check'), metrics.PASSWORD_HASH_TIME.labels('check').time():
+            return check_password(raw_password, self.password)
 
     def __str__(self):
         return self.email
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+On-demand and sampled request profiling (see the PROFILING_* settings).
+
+org_service carries a twin of this module (org_service/organizations/profiling.py);
+change both copies together.
+"""
+import cProfile
+import hashlib
+import hmac
+import logging
+import os
+import random
+import re
+import time
+from django.conf import settings
+from authentication import metrics
+
+try:
+    import pyinstrument
+except ImportError:  # optional sampling profiler
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_MAX_AGE = 300
+
+
+def sign_profile_request(method, path, timestamp=None, secret=None):
+    """
+    X-Profile header value asking the service to profile `method path`
+    """
+    timestamp = str(int(time.time() if timestamp is None else timestamp))
+    secret = secret or settings.PROFILING_SECRET
+    signature = hmac.new(
+        secret.encode('utf-8'), f"{method}|{path}|{timestamp}".encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+    return f"{timestamp}:{signature}"
+
+
+def has_valid_token(request):
+    token = request.headers.get(PROFILE_HEADER)
+    if not token:
+        return False
+    timestamp, _, signature = token.partition(':')
+    try:
+        if abs(time.time() - int(timestamp)) > TOKEN_MAX_AGE:
+            return False
+    except ValueError:
+        return False
+    expected = sign_profile_request(request.method, request.path, timestamp).partition(':')[2]
+    return hmac.compare_digest(signature, expected)
+
+
+def should_profile(request):
+    if PROFILE_HEADER not in request.headers and not settings.PROFILING_SAMPLE_RATE:
+        return False
+    return has_valid_token(request) or random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def _profile_name(request, duration, extension):
+    route = re.sub(r'[^A-Za-z0-9]+', '_', metrics.route_of(request)).strip('_') or 'root'
+    return (
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{request.method}-{route}-"
+        f"{duration * 1000:.0f}ms-{os.urandom(3).hex()}.{extension}"
+    )
+
+
+class _CProfiler:
+    extension = 'prof'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def save(self, path):
+        self.profiler.dump_stats(path)
+
+
+class _SamplingProfiler:
+    extension = 'pyisession'
+
+    def __init__(self):
+        self.profiler = pyinstrument.Profiler()
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def save(self, path):
+        self.profiler.last_session.save(path)
+
+
+PROFILE_EXTENSIONS = (f'.{_CProfiler.extension}', f'.{_SamplingProfiler.extension}')
+
+
+def _make_profiler():
+    if settings.PROFILER == 'sampling' and pyinstrument is not None:
+        return _SamplingProfiler()
+    return _CProfiler()
+
+
+def prune_profiles(directory, max_files):
+    """
+    Delete the oldest profiles in `directory` beyond the newest `max_files`
+    """
+    profiles = [
+        entry for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(PROFILE_EXTENSIONS)
+    ]
+    if len(profiles) <= max_files:
+        return 0
+    profiles.sort(key=lambda entry: entry.stat().st_mtime_ns)
+    pruned = 0
+    for entry in profiles[:len(profiles) - max_files]:
+        try:
+            os.remove(entry.path)
+            pruned += 1
+        except FileNotFoundError:
+            # Another worker pruned it first
+            pass
+    return pruned
+
+
+def profile_request(request, get_response):
+    """
+    Run the request under the profiler and write the profile to PROFILING_DIR;
+    the file name is returned in the X-Profile-Id response header
+    """
+    profiler = _make_profiler()
+    started = time.perf_counter()
+    try:
+        profiler.start()
+    except ValueError:
+        # Another profiler is already active on this thread
+        return get_response(request)
+    try:
+        response = get_response(request)
+    finally:
+        profiler.stop()
+    return _save_profile(request, response, profiler, time.perf_counter() - started)
+
+
+async def aprofile_request(request, get_response):
+    """
+    profile_request for async middleware chains. The profiler follows the
+    event loop thread, so other requests' coroutines interleaved with this
+    one show up in its profile too
+    """
+    profiler = _make_profiler()
+    started = time.perf_counter()
+    try:
+        profiler.start()
+    except ValueError:
+        return await get_response(request)
+    try:
+        response = await get_response(request)
+    finally:
+        profiler.stop()
+    return _save_profile(request, response, profiler, time.perf_counter() - started)
+
+
+def _save_profile(request, response, profiler, duration):
+    name = _profile_name(request, duration, profiler.extension)
+    try:
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        profiler.save(os.path.join(settings.PROFILING_DIR, name))
+        prune_profiles(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+    except OSError as e:
+        logger.warning("Could not write profile %s: %s", name, e)
+        return response
+    response['X-Profile-Id'] = name
+    logger.info("Profiled %s %s in %.1fms: %s", request.method, request.path, duration * 1000, name)
+    return response
@@ -0,0 +1,97 @@
+"""
+Per-view query budgets: declaration, counting and the test mixin.
+
+org_service carries a twin of this module (org_service/organizations/query_budget.py);
+change both copies together.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from django.db import connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a view runs more queries than its declared budget and
+    QUERY_BUDGET_ENFORCE is on (always in tests)
+    """
+
+
+class QueryCounter:
+    """
+    Counts queries and their database time on every connection while active
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+    def start(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def stop(self):
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def query_budget(max_queries, sharded=None):
+    """
+    Declare the most queries a view may run per request.
+
+    Decorate a view class to cover all its handlers, or a single handler
+    method (e.g. `get`); QueryBudgetMiddleware checks the declared budget.
+    `sharded` is the budget when the database is sharded, for views whose
+    shard directory lookups add queries; it defaults to `max_queries`.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.sharded_query_budget = max_queries if sharded is None else sharded
+        return view
+    return decorator
+
+
+def budget_for(view_func, method, sharded=False):
+    """
+    Budget declared for the handler serving `method`, falling back to the view class
+    """
+    attribute = 'sharded_query_budget' if sharded else 'query_budget'
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return getattr(view_func, attribute, None)
+    handler = getattr(view_class, method.lower(), None)
+    budget = getattr(handler, attribute, None)
+    if budget is None:
+        budget = getattr(view_class, attribute, None)
+    return budget
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin: like assertNumQueries, but an upper bound across all databases
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries):
+        with QueryCounter() as counter:
+            yield counter
+        if counter.count > max_queries:
+            self.fail(f"{counter.count} queries executed, budget is {max_queries}")
@@ -0,0 +1,37 @@
+import random
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from authentication import metrics, tracing
+
+
+class StageTimer:
+    """
+    Times named stages of a view. Every stage feeds the stage histogram and,
+    in sampled traces, gets its own span; a SERVER_TIMING_SAMPLE_RATE share
+    of responses also reports the stages in a Server-Timing header.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.stages = []
+        self.report = random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            with tracing.start_span(f"{self.view}.{name}"):
+                yield
+        finally:
+            duration = time.perf_counter() - started
+            self.stages.append((name, duration))
+            metrics.VIEW_STAGE_TIME.labels(self.view, name).observe(duration)
+
+    def header(self):
+        return ', '.join(f"{name};dur={duration * 1000:.1f}" for name, duration in self.stages)
+
+    def add_header(self, response):
+        if self.report and self.stages:
+            response['Server-Timing'] = self.header()
+        return response
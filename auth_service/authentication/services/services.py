@@ -5,11 +5,15 @@ import hashlib
 import time
 from datetime import datetime, timedelta
 from django.conf import settings
+from authentication import metrics, tracing
 from authentication.models.models import AuthUser
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Metrics label of the org_service user lookup (the route, not the email-bearing path)
+ORG_USER_ENDPOINT = 'internal/users/<email>/'
+
 class ServiceClient:
     """
     Secure client for making authenticated requests to other services
@@ -57,11 +61,17 @@ class ServiceClient:
         parsed = urlparse(url)
         path = parsed.path
         
-        headers = self._get_service_headers('GET', path)
-        headers.update(kwargs.get('headers', {}))
-        kwargs['headers'] = headers
-        
-        return requests.get(url, **kwargs)
+        with tracing.start_span(f"GET {parsed.netloc}", **{'http.method': 'GET'}) as span:
+            headers = self._get_service_headers('GET', path)
+            headers.update(kwargs.get('headers', {}))
+            # Propagate the trace so the callee's spans join this request's trace
+            tracing.inject(headers)
+            kwargs['headers'] = headers
+            
+            response = requests.get(url, **kwargs)
+            if span is not None and span.sampled:
+                span.attributes['http.status_code'] = response.status_code
+            return response
 
 class AuthenticationService:
     def __init__(self):
@@ -73,7 +83,7 @@ class AuthenticationService:
         Authenticate user credentials against AuthUser model
         """
         try:
-            user = AuthUser.objects.get(email=email)
+            user = AuthUser.objects.by_email(email).get()
             if user.check_password(password):
                 return user
             return None
@@ -86,21 +96,25 @@ class AuthenticationService:
         """
         url = f"{settings.ORG_SERVICE_URL}/internal/users/{email}/"
         
+        start_time = time.perf_counter()
         try:
             # Use enhanced service client for secure communication
             response = self.service_client.get(url, timeout=(3.05, 27))
             response.raise_for_status()
             
-            logger.info(f"Successfully retrieved org info for user: {email}")
+            logger.info("Successfully retrieved org info for user: %s", email)
             return response.json()
             
         except requests.exceptions.Timeout:
+            metrics.ORG_SERVICE_ERRORS.labels(ORG_USER_ENDPOINT, 'timeout').inc()
             logger.error(f"Timeout calling org service for user {email}")
             raise Exception("Organization service timeout")
         except requests.exceptions.ConnectionError:
+            metrics.ORG_SERVICE_ERRORS.labels(ORG_USER_ENDPOINT, 'connection').inc()
             logger.error(f"Connection error calling org service for user {email}")
             raise Exception("Organization service unavailable")
         except requests.exceptions.HTTPError as e:
+            metrics.ORG_SERVICE_ERRORS.labels(ORG_USER_ENDPOINT, f"http_{e.response.status_code}").inc()
             if e.response.status_code == 404:
                 logger.error(f"User {email} not found in org service")
                 raise Exception("User not found in organization")
@@ -110,8 +124,11 @@ class AuthenticationService:
             logger.error(f"HTTP error calling org service: {e}")
             raise Exception("Organization service error")
         except Exception as e:
+            metrics.ORG_SERVICE_ERRORS.labels(ORG_USER_ENDPOINT, 'other').inc()
             logger.error(f"Unexpected error calling org service: {str(e)}")
             raise Exception("Organization service error")
+        finally:
+            metrics.ORG_SERVICE_LATENCY.labels(ORG_USER_ENDPOINT).observe(time.perf_counter() - start_time)
 
     @staticmethod
     def generate_jwt_token(email, user_id, org_id, role):
@@ -0,0 +1,116 @@
+"""
+Slow query log with normalized SQL and sampled EXPLAIN plans.
+
+org_service carries a twin of this module (org_service/organizations/slow_queries.py);
+change both copies together.
+"""
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+# Routed to the rotating SLOW_QUERY_LOG_FILE by settings.LOGGING
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    SQL with literals and placeholders replaced by ? and IN lists collapsed,
+    so executions of the same statement group together and no values are logged
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _VALUE_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def view_name(view_func):
+    view = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None) or view_func
+    return f"{view.__module__}.{view.__qualname__}"
+
+
+class SlowQueryLog:
+    """
+    Execute wrapper logging queries slower than SLOW_QUERY_THRESHOLD_MS with
+    their normalized SQL, duration and calling view. A sample of slow SELECTs
+    that succeeded (SLOW_QUERY_EXPLAIN_SAMPLE_RATE) also gets its plan
+    captured; failed ones are logged with their error class instead.
+    """
+
+    def __init__(self, view=None):
+        self.view = view
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        error = None
+        try:
+            return execute(sql, params, many, context)
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self._record(context['connection'], sql, params, many, duration_ms, error)
+
+    def _record(self, connection, sql, params, many, duration_ms, error=None):
+        entry = {
+            'db': connection.alias,
+            'view': self.view,
+            'duration_ms': round(duration_ms, 1),
+            'sql': normalize_sql(sql),
+        }
+        if error is not None:
+            # No EXPLAIN: the statement may be invalid, or the transaction aborted
+            entry['error'] = error
+        elif not many and self._is_select(sql) and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            entry['plan'] = self._explain(connection, sql, params)
+        logger.warning(json.dumps(entry))
+
+    @staticmethod
+    def _is_select(sql):
+        return sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+    @staticmethod
+    def _explain(connection, sql, params):
+        """
+        Plan of a query that just ran. Goes to the backend cursor directly so
+        the EXPLAIN is neither wrapped (logged or counted) again nor debug-logged.
+        """
+        try:
+            with connection.cursor() as cursor:
+                cursor.cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+                # One plan line per row, in the last column on both SQLite and PostgreSQL
+                return [str(row[-1]) for row in cursor.cursor.fetchall()]
+        except DatabaseError as e:
+            return [f"EXPLAIN failed: {e}"]
+
+    def start(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def stop(self):
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,89 @@
+"""
+Deterministic synthetic users for the generate_* benchmark dataset commands.
+
+auth_service and org_service carry the same copy of this module, so the
+same seed yields the same emails in both services and logins work across them.
+"""
+import random
+import unicodedata
+from django.db import connections
+
+FIRST_NAMES = [
+    'Aaliyah', 'Adam', 'Aiko', 'Alejandro', 'Amara', 'Ana', 'Andrei', 'Anna', 'Arjun', 'Ava',
+    'Ben', 'Bjørn', 'Camila', 'Chen', 'Chloé', 'Daniel', 'David', 'Elena', 'Emma', 'Ethan',
+    'Fatima', 'François', 'Grace', 'Hana', 'Hiroshi', 'Ibrahim', 'Ines', 'Isabella', 'Jakub', 'James',
+    'José', 'Julia', 'Kai', 'Karim', 'Laura', 'Leila', 'Liam', 'Lucas', 'Maria', 'Mateo',
+    'Mei', 'Mohammed', 'Nadia', 'Noah', 'Olga', 'Oliver', 'Omar', 'Priya', 'Rafael', 'Ravi',
+    'Renée', 'Sara', 'Sofia', 'Søren', 'Thomas', 'Wei', 'Yusuf', 'Zara', 'Zoë', 'Łukasz',
+]
+LAST_NAMES = [
+    'Ahmed', 'Andersen', 'Bauer', 'Brown', 'Chen', 'Costa', 'Dubois', 'Fernández', 'Fischer', 'García',
+    'Gonzalez', 'Gupta', 'Hansen', 'Ivanov', 'Jensen', 'Johnson', 'Kim', 'Kowalski', 'Kumar', 'Lee',
+    'Lopez', 'Martin', 'Müller', 'Nakamura', 'Nguyen', 'Novak', "O'Brien", 'Okafor', 'Park', 'Patel',
+    'Pereira', 'Petrov', 'Rossi', 'Sánchez', 'Santos', 'Schmidt', 'Silva', 'Singh', 'Smith', 'Suzuki',
+    'Tanaka', 'Taylor', 'Van Dijk', 'Wang', 'Williams', 'Wilson', 'Wójcik', 'Yamamoto', 'Yilmaz', 'Zhang',
+]
+EMAIL_DOMAINS = [
+    'example.com', 'example.org', 'example.net', 'mail.example.com', 'corp.example.com',
+]
+
+
+# Letters NFKD does not decompose into an ASCII base letter
+_ASCII_LETTERS = str.maketrans({'ø': 'o', 'Ø': 'O', 'ł': 'l', 'Ł': 'L'})
+
+
+def _email_part(value):
+    decomposed = unicodedata.normalize('NFKD', value.translate(_ASCII_LETTERS))
+    return ''.join(c for c in decomposed if c.isascii() and c.isalnum()).lower()
+
+
+_FIRST = [(name, _email_part(name)) for name in FIRST_NAMES]
+_LAST = [(name, _email_part(name)) for name in LAST_NAMES]
+
+
+def people(seed, count):
+    """
+    (name, email) of `count` users; the same seed always yields the same
+    sequence. Emails carry the user's position, so they are unique.
+    """
+    # random() with indexing is several times cheaper than choice() per draw
+    draw = random.Random(f"people:{seed}").random
+    firsts, lasts, domains = len(_FIRST), len(_LAST), len(EMAIL_DOMAINS)
+    for i in range(count):
+        first, first_part = _FIRST[int(draw() * firsts)]
+        last, last_part = _LAST[int(draw() * lasts)]
+        yield f"{first} {last}", f"{first_part}.{last_part}.{i}@{EMAIL_DOMAINS[int(draw() * domains)]}"
+
+
+def preparer(model, field_name, using):
+    """
+    Function converting a value of the field to its database form, for
+    callers that prepare values once and reuse them across rows
+    """
+    field = model._meta.get_field(field_name)
+    connection = connections[using]
+    return lambda value: field.get_db_prep_save(value, connection)
+
+
+def insert_rows(model, using, field_names, rows, prepared=False):
+    """
+    INSERT `rows` (tuples in field_names order) with a single executemany.
+
+    Skips model instantiation, save() and signals: callers supply every
+    column, including auto_now fields, and keep any denormalized tables
+    (search terms, shard directory) in step themselves. With prepared=True
+    the values are already in database form (see preparer()).
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in field_names]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    if not prepared:
+        prepare = [field.get_db_prep_save for field in fields]
+        rows = [[prep(value, connection) for prep, value in zip(prepare, row)] for row in rows]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
@@ -0,0 +1,133 @@
+import requests
+from django.test import SimpleTestCase
+from authentication.management.commands._fault_proxy import FaultProxy, Scenario
+from authentication.management.commands._org_stub import OrgServiceStub
+from authentication.management.commands.bench_login import compare
+
+class BenchLoginCompareTest(SimpleTestCase):
+
+    def test_regressions_are_positive_in_both_directions(self):
+        """Test lower throughput and higher latency both count as regressions"""
+        baseline = {'throughput_per_s': 100.0, 'p99_ms': 50.0, 'error_rate': 0.0}
+        current = {'throughput_per_s': 80.0, 'p99_ms': 40.0, 'error_rate': 0.0}
+
+        changes = compare(current, baseline)
+
+        self.assertEqual(changes['throughput_per_s']['regression_pct'], 20.0)
+        self.assertEqual(changes['p99_ms']['regression_pct'], -20.0)
+        self.assertEqual(changes['error_rate']['regression_pct'], 0.0)
+        self.assertNotIn('p50_ms', changes)
+
+    def test_errors_appearing_against_clean_baseline(self):
+        """Test errors on a run whose baseline had none are a full regression"""
+        changes = compare({'error_rate': 0.1}, {'error_rate': 0.0})
+
+        self.assertEqual(changes['error_rate']['regression_pct'], 100.0)
+
+
+class OrgServiceStubTest(SimpleTestCase):
+
+    def test_user_lookup(self):
+        """Test the stub answers user lookups with stable org info"""
+        with OrgServiceStub() as stub:
+            first = requests.get(f"{stub.url}/internal/users/a@example.com/", timeout=5)
+            second = requests.get(f"{stub.url}/internal/users/a@example.com/", timeout=5)
+            missing = requests.get(f"{stub.url}/internal/stats/", timeout=5)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(set(first.json()), {'user_id', 'org_id', 'role'})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_error_rate(self):
+        """Test an error rate of 1 fails every lookup with 503"""
+        with OrgServiceStub(error_rate=1.0) as stub:
+            response = requests.get(f"{stub.url}/internal/users/a@example.com/", timeout=5)
+
+        self.assertEqual(response.status_code, 503)
+
+
+class FaultProxyTest(SimpleTestCase):
+
+    def setUp(self):
+        """Set up a stub org_service behind the proxy"""
+        self.stub = OrgServiceStub()
+        self.stub.start()
+        self.proxy = FaultProxy(self.stub.url)
+        self.proxy.start()
+        self.url = f"{self.proxy.url}/internal/users/a@example.com/"
+
+    def tearDown(self):
+        self.proxy.stop()
+        self.stub.stop()
+
+    def test_forwards_without_faults(self):
+        """Test requests pass through unchanged without a scenario"""
+        direct = requests.get(f"{self.stub.url}/internal/users/a@example.com/", timeout=5)
+
+        response = requests.get(self.url, timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), direct.json())
+
+    def test_error_burst(self):
+        """Test requests inside a burst window fail with its status"""
+        self.proxy.set_scenario({'burst': {'every_s': 60, 'duration_s': 30, 'status': 502}})
+
+        response = requests.get(self.url, timeout=5)
+
+        self.assertEqual(response.status_code, 502)
+
+    def test_connection_reset(self):
+        """Test a reset rate of 1 resets every connection"""
+        self.proxy.set_scenario({'reset_rate': 1})
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            requests.get(self.url, timeout=5)
+
+    def test_latency(self):
+        """Test injected latency delays the response"""
+        self.proxy.set_scenario({'latency': {'distribution': 'fixed', 'ms': 200}})
+
+        response = requests.get(self.url, timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(response.elapsed.total_seconds(), 0.2)
+
+    def test_invalid_scenario_is_rejected(self):
+        """Test unknown or malformed fault settings are refused by the control endpoint"""
+        for spec in [{'latency_ms': 5}, {'latency': {'distribution': 'uniform'}}]:
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                self.proxy.set_scenario(spec)
+
+        self.assertEqual(requests.get(self.url, timeout=5).status_code, 200)
+
+
+class ScenarioTest(SimpleTestCase):
+
+    def test_phases_follow_each_other(self):
+        """Test each phase lasts its duration and the last one stays in effect"""
+        now = [0.0]
+        scenario = Scenario([{'duration_s': 10}, {'duration_s': 5, 'error_rate': 1}, {'reset_rate': 1}],
+                            clock=lambda: now[0])
+
+        self.assertEqual(scenario.profile(), ({'duration_s': 10}, 0.0))
+        now[0] = 12.0
+        self.assertEqual(scenario.profile(), ({'duration_s': 5, 'error_rate': 1}, 2.0))
+        now[0] = 100.0
+        self.assertEqual(scenario.profile()[0], {'reset_rate': 1})
+
+    def test_invalid_settings_are_rejected(self):
+        """Test settings of the wrong type or out of range fail validation up front"""
+        for spec in [
+            {'latency': {'distribution': 'uniform'}},
+            {'latency': {'distribution': 'uniform', 'low_ms': 50, 'high_ms': 10}},
+            {'latency': {'distribution': 'pareto', 'scale_ms': 5, 'shape': 0}},
+            {'burst': {'every_s': 0, 'duration_s': 1}},
+            {'error_rate': 'x'},
+            {'reset_rate': 1.5},
+            {'error_status': 700},
+            [{'duration_s': -1}],
+        ]:
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                Scenario(spec)
@@ -0,0 +1,15 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from authentication.models.models import AuthUser
+from authentication.synthetic import people
+
+class GenerateAuthUsersTest(TestCase):
+
+    def test_generates_seeded_users_sharing_password(self):
+        """Test the seeded emails are created with a working shared password"""
+        call_command('generate_auth_users', users=25, seed=4, password='secret', batch_size=10, stdout=StringIO())
+
+        emails = [email for _, email in people(4, 25)]
+        self.assertEqual(sorted(AuthUser.objects.values_list('email', flat=True)), sorted(emails))
+        self.assertTrue(AuthUser.objects.by_email(emails[-1]).get().check_password('secret'))
@@ -0,0 +1,51 @@
+import requests
+from unittest.mock import patch, Mock
+from django.test import TestCase
+from prometheus_client import REGISTRY
+from authentication.models.models import AuthUser
+from authentication.services.services import AuthenticationService, ORG_USER_ENDPOINT
+
+class MetricsTest(TestCase):
+
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_password_hashing_is_timed(self):
+        """Test hashing and checking passwords feed the hash timing histogram"""
+        before_hash = self._sample('password_hash_duration_seconds_count', operation='hash')
+        before_check = self._sample('password_hash_duration_seconds_count', operation='check')
+
+        user = AuthUser(email='test@example.com')
+        user.set_password('testpassword123')
+        user.check_password('testpassword123')
+
+        self.assertEqual(self._sample('password_hash_duration_seconds_count', operation='hash'), before_hash + 1)
+        self.assertEqual(self._sample('password_hash_duration_seconds_count', operation='check'), before_check + 1)
+
+    @patch('authentication.services.services.ServiceClient.get')
+    def test_org_service_latency_and_errors(self, mock_get):
+        """Test org_service calls are timed and failures counted by reason"""
+        before_calls = self._sample('org_service_request_duration_seconds_count', endpoint=ORG_USER_ENDPOINT)
+        before_timeouts = self._sample('org_service_errors_total', endpoint=ORG_USER_ENDPOINT, reason='timeout')
+        mock_get.return_value = Mock(json=Mock(return_value={'user_id': '1', 'org_id': '2', 'role': 'member'}))
+
+        AuthenticationService().get_user_org_info('test@example.com')
+        mock_get.side_effect = requests.exceptions.Timeout()
+        with self.assertRaises(Exception):
+            AuthenticationService().get_user_org_info('test@example.com')
+
+        self.assertEqual(
+            self._sample('org_service_request_duration_seconds_count', endpoint=ORG_USER_ENDPOINT),
+            before_calls + 2
+        )
+        self.assertEqual(
+            self._sample('org_service_errors_total', endpoint=ORG_USER_ENDPOINT, reason='timeout'),
+            before_timeouts + 1
+        )
+
+    def test_metrics_endpoint(self):
+        """Test /metrics serves the registry in the Prometheus text format"""
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'password_hash_duration_seconds', response.content)
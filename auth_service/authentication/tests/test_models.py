@@ -1,7 +1,13 @@
+import importlib
+from unittest import skipUnless
+from unittest.mock import patch
+from django.apps import apps
+from django.db import connection
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from authentication.models.models import AuthUser
+from authentication.management.commands.index_report import collect
 
 class AuthUserModelTest(TestCase):
     
@@ -51,4 +57,57 @@ class AuthUserModelTest(TestCase):
         user.set_password(self.valid_password)
         user.save()
         
-        self.assertEqual(str(user), self.valid_email)
\ No newline at end of file
+        self.assertEqual(str(user), self.valid_email)
+class AuthUserIndexTest(TestCase):
+    
+    def test_single_email_index(self):
+        """Test auth_users carries only the Lower(email) unique index for email"""
+        report = collect(tables=['auth_users'])[0]
+        indexes = {i['name']: i for i in report['indexes']}
+        
+        self.assertTrue(indexes['unique_email_auth_user']['unique'])
+        self.assertFalse(any(i['columns'] == ('email',) for i in report['indexes']))
+        self.assertEqual([i for i in report['indexes'] if i['findings']], [])
+
+
+class AuthUserEmailLookupTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = AuthUser(email="test@example.com")
+        self.user.set_password("testpassword123")
+        self.user.save()
+    
+    def test_case_variant_email_is_rejected(self):
+        """Test uniqueness ignores the casing of the email"""
+        with self.assertRaises(IntegrityError):
+            AuthUser.objects.create(email="TEST@example.com", password="x")
+    
+    def test_by_email_ignores_case(self):
+        """Test by_email finds a legacy mixed-case row with a lower-case login"""
+        legacy = AuthUser.objects.create(email="Legacy@Example.com", password="x")
+        
+        self.assertEqual(AuthUser.objects.by_email("legacy@example.com").get(), legacy)
+        self.assertEqual(AuthUser.objects.by_email("Test@Example.com").get(), self.user)
+    
+    @skipUnless(connection.vendor == 'sqlite', "asserts on SQLite EXPLAIN QUERY PLAN output")
+    def test_by_email_probes_functional_index(self):
+        """Test the lookup is a single probe of the Lower(email) index"""
+        plan = AuthUser.objects.by_email("test@example.com").explain()
+        
+        self.assertIn('USING INDEX unique_email_auth_user', plan)
+        self.assertNotIn('SCAN', plan)
+    
+    def test_backfill_lowercases_emails(self):
+        """Test the backfill migration lower-cases legacy rows in batches"""
+        AuthUser.objects.create(email="Mixed.Case@Example.com", password="x")
+        migration = importlib.import_module('authentication.migrations.0003_lowercase_emails')
+        schema_editor = type('SchemaEditor', (), {'connection': connection})()
+        
+        with patch.object(migration, 'BATCH_SIZE', 1):
+            migration.lowercase_emails(apps, schema_editor)
+        
+        self.assertEqual(
+            sorted(AuthUser.objects.values_list('email', flat=True)),
+            ['mixed.case@example.com', 'test@example.com']
+        )
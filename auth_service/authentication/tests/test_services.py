@@ -34,6 +34,17 @@ class AuthenticationServiceTest(TestCase):
         )
         self.assertIsNone(authenticated_user)
     
+    def test_authenticate_legacy_mixed_case_user(self):
+        """Test a legacy mixed-case row authenticates with a lower-cased login"""
+        legacy = AuthUser(email="Legacy.User@Example.com")
+        legacy.set_password(self.password)
+        legacy.save()
+        
+        authenticated_user = AuthenticationService.authenticate_user(
+            "legacy.user@example.com", self.password
+        )
+        self.assertEqual(authenticated_user, legacy)
+    
     def test_authenticate_user_nonexistent_email(self):
         """Test authentication fails with non-existent email"""
         authenticated_user = AuthenticationService.authenticate_user(
@@ -0,0 +1,31 @@
+import json
+from django.test import TestCase, override_settings
+from authentication.models.models import AuthUser
+from authentication.slow_queries import SlowQueryLog
+
+class SlowQueryLogTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = AuthUser(email='test@example.com')
+        self.user.set_password('testpassword123')
+        self.user.save()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+    def test_slow_login_lookup_is_logged_with_plan(self):
+        """Test a slow credentials lookup is logged with its plan and without the email"""
+        with self.assertLogs('authentication.slow_queries', level='WARNING') as logs:
+            with SlowQueryLog(view='tests'):
+                AuthUser.objects.by_email('Test@Example.com').get()
+
+        entry = json.loads(logs.output[0].split(':', 2)[2])
+        self.assertEqual(entry['view'], 'tests')
+        self.assertNotIn('example.com', entry['sql'])
+        self.assertTrue(any('unique_email_auth_user' in line for line in entry['plan']))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=60_000)
+    def test_fast_queries_are_not_logged(self):
+        """Test queries under the threshold are ignored"""
+        with self.assertNoLogs('authentication.slow_queries'):
+            with SlowQueryLog():
+                AuthUser.objects.count()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch, Mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from authentication import tracing
+from authentication.models.models import AuthUser
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+class LoginTracingTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.user = AuthUser(email='test@example.com')
+        self.user.set_password('testpassword123')
+        self.user.save()
+
+        handle, self.export_file = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, self.export_file)
+        settings_override = override_settings(
+            TRACE_EXPORT_FILE=self.export_file, TRACE_SAMPLE_RATE=0, ORG_SERVICE_URL='http://org-service:8001'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _spans(self):
+        with open(self.export_file) as f:
+            return [json.loads(line) for line in f]
+
+    @patch('authentication.services.services.requests.get')
+    def test_login_trace_covers_each_stage(self, mock_get):
+        """Test a sampled login records query, password and org_service call spans and propagates the trace"""
+        mock_get.return_value = Mock(
+            status_code=200,
+            json=Mock(return_value={'user_id': 'user_123', 'org_id': 'org_456', 'role': 'member'})
+        )
+
+        response = self.client.post(
+            reverse('login'),
+            data=json.dumps({'email': 'test@example.com', 'password': 'testpassword123'}),
+            content_type='application/json',
+            HTTP_TRACEPARENT=f'00-{TRACE_ID}-{PARENT_ID}-01'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        spans = {span['name']: span for span in self._spans()}
+        server = spans['POST auth/login/']
+        self.assertEqual(server['parent_id'], PARENT_ID)
+        for name, parent in [('login.authenticate', 'POST auth/login/'),
+                             ('db.query', 'login.authenticate'),
+                             ('password.check', 'login.authenticate'),
+                             ('GET org-service:8001', 'login.org_lookup')]:
+            self.assertEqual(spans[name]['trace_id'], TRACE_ID)
+            self.assertEqual(spans[name]['parent_id'], spans[parent]['span_id'])
+
+        outgoing = tracing.parse_traceparent(mock_get.call_args.kwargs['headers']['traceparent'])
+        self.assertEqual(outgoing, (TRACE_ID, spans['GET org-service:8001']['span_id'], True))
+
+    @patch('authentication.services.services.requests.get')
+    def test_unsampled_login_still_propagates(self, mock_get):
+        """Test the sampling decision reaches org_service even when nothing is exported"""
+        mock_get.return_value = Mock(
+            status_code=200,
+            json=Mock(return_value={'user_id': 'user_123', 'org_id': 'org_456', 'role': 'member'})
+        )
+
+        self.client.post(
+            reverse('login'),
+            data=json.dumps({'email': 'test@example.com', 'password': 'testpassword123'}),
+            content_type='application/json'
+        )
+
+        outgoing = tracing.parse_traceparent(mock_get.call_args.kwargs['headers']['traceparent'])
+        self.assertEqual(outgoing[2], False)
+        self.assertEqual(self._spans(), [])
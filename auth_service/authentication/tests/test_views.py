@@ -1,9 +1,14 @@
 import json
+import os
+import shutil
+import tempfile
 from unittest.mock import patch, Mock
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from prometheus_client import REGISTRY
 from rest_framework.test import APIClient
 from rest_framework import status
+from authentication import profiling
 from authentication.models.models import AuthUser
 
 class LoginViewTest(TestCase):
@@ -103,4 +108,87 @@ class LoginViewTest(TestCase):
         )
         
         self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
-        self.assertEqual(response.data['message'], 'Service unavailable')
\ No newline at end of file
+        self.assertEqual(response.data['message'], 'Service unavailable')    
+    @patch('authentication.views.views.AuthenticationService.get_user_org_info')
+    def test_login_query_budget(self, mock_get_org_info):
+        """Test login stays within its query budget and reports the count"""
+        mock_get_org_info.return_value = {
+            'user_id': 'user_123',
+            'org_id': 'org_456',
+            'role': 'member'
+        }
+        
+        data = {
+            'email': self.email,
+            'password': self.password
+        }
+        
+        response = self.client.post(
+            self.login_url,
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-DB-Query-Count'], '1')
+        self.assertIn('X-DB-Time-Ms', response)
+    
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    @patch('authentication.views.views.AuthenticationService.get_user_org_info')
+    def test_login_server_timing(self, mock_get_org_info):
+        """Test sampled logins report each stage in Server-Timing and the stage histograms"""
+        mock_get_org_info.return_value = {
+            'user_id': 'user_123',
+            'org_id': 'org_456',
+            'role': 'member'
+        }
+        before = REGISTRY.get_sample_value(
+            'view_stage_duration_seconds_count', {'view': 'login', 'stage': 'jwt'}
+        ) or 0
+        
+        response = self.client.post(
+            self.login_url,
+            data=json.dumps({'email': self.email, 'password': self.password}),
+            content_type='application/json'
+        )
+        
+        stages = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual(stages, ['validate', 'authenticate', 'org_lookup', 'jwt'])
+        self.assertEqual(
+            REGISTRY.get_sample_value('view_stage_duration_seconds_count', {'view': 'login', 'stage': 'jwt'}),
+            before + 1
+        )
+    
+    def test_server_timing_off_by_default(self):
+        """Test the Server-Timing header is only sent for sampled responses"""
+        response = self.client.post(
+            self.login_url,
+            data=json.dumps({'email': self.email, 'password': 'wrong'}),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('Server-Timing', response)
+    
+    @patch('authentication.views.views.AuthenticationService.get_user_org_info')
+    def test_login_profiling(self, mock_get_org_info):
+        """Test a signed X-Profile header profiles the login and names the profile file"""
+        mock_get_org_info.return_value = {
+            'user_id': 'user_123',
+            'org_id': 'org_456',
+            'role': 'member'
+        }
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        
+        with override_settings(PROFILING_DIR=directory):
+            response = self.client.post(
+                self.login_url,
+                data=json.dumps({'email': self.email, 'password': self.password}),
+                content_type='application/json',
+                HTTP_X_PROFILE=profiling.sign_profile_request('POST', self.login_url)
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('-POST-auth_login-', response['X-Profile-Id'])
+        self.assertEqual(os.listdir(directory), [response['X-Profile-Id']])
@@ -3,6 +3,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from authentication.serializers.serializers import LoginSerializer
 from authentication.services.services import AuthenticationService
+from authentication.query_budget import query_budget
+from authentication.server_timing import StageTimer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,14 +14,22 @@ class LoginView(APIView):
         super().__init__()
         self.auth_service = AuthenticationService()
 
+    # One lookup of the credentials row; org info comes from org_service
+    @query_budget(1)
     def post(self, request):
         """
         Authenticate user and return JWT token
         """
+        timer = StageTimer('login')
+        return timer.add_header(self._login(request, timer))
+
+    def _login(self, request, timer):
         try:
             # Validate request data
-            serializer = LoginSerializer(data=request.data)
-            if not serializer.is_valid():
+            with timer.stage('validate'):
+                serializer = LoginSerializer(data=request.data)
+                valid = serializer.is_valid()
+            if not valid:
                 return Response({
                     "message": "Invalid request data",
                     "errors": serializer.errors
@@ -29,16 +39,18 @@ class LoginView(APIView):
             password = serializer.validated_data['password']
 
             # Authenticate user credentials
-            auth_user = AuthenticationService.authenticate_user(email, password)
+            with timer.stage('authenticate'):
+                auth_user = AuthenticationService.authenticate_user(email, password)
             if not auth_user:
-                logger.warning(f"Authentication failed for user: {email}")
+                logger.warning("Authentication failed for user: %s", email)
                 return Response({
                     "message": "Invalid credentials"
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
             # Get user organization information using secure service client
             try:
-                org_info = self.auth_service.get_user_org_info(email)
+                with timer.stage('org_lookup'):
+                    org_info = self.auth_service.get_user_org_info(email)
             except Exception as e:
                 logger.error(f"Failed to get org info for {email}: {str(e)}")
                 return Response({
@@ -47,14 +59,15 @@ class LoginView(APIView):
                 }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
             # Generate JWT token
-            token = AuthenticationService.generate_jwt_token(
-                email=email,
-                user_id=org_info['user_id'],
-                org_id=org_info['org_id'],
-                role=org_info['role']
-            )
+            with timer.stage('jwt'):
+                token = AuthenticationService.generate_jwt_token(
+                    email=email,
+                    user_id=org_info['user_id'],
+                    org_id=org_info['org_id'],
+                    role=org_info['role']
+                )
 
-            logger.info(f"Successful login for user: {email}")
+            logger.info("Successful login for user: %s", email)
             return Response({
                 "message": "Login successful",
                 "token": token
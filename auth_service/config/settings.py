@@ -22,7 +22,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'authentication.middleware.middleware.ProfilingMiddleware',
+    'authentication.middleware.middleware.TracingMiddleware',
+    'authentication.middleware.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'authentication.middleware.middleware.QueryBudgetMiddleware',
+    'authentication.middleware.middleware.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,19 +58,82 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# DB_ENGINE=postgres selects the production PostgreSQL profile (requires
+# psycopg); the default stays the local SQLite file.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+# SQLite tuning for small deployments and edge nodes, applied to every new
+# connection: WAL lets readers run alongside the writer, BEGIN IMMEDIATE takes
+# the write lock up front so concurrent writers queue on busy_timeout instead
+# of failing with "database is locked" on lock upgrade.
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'True').lower() == 'true'
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # milliseconds
+SQLITE_TRANSACTION_MODE = os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+
+SQLITE_TUNED_OPTIONS = {
+    'init_command': ';'.join([
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}",
+    ]),
+    'transaction_mode': SQLITE_TRANSACTION_MODE,
+    'timeout': SQLITE_BUSY_TIMEOUT / 1000,
 }
 
-if 'test' in sys.argv:
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'auth_service'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Keep connections open across requests instead of reconnecting each time
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+            # Set when running behind a transaction-pooling PgBouncer
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False').lower() == 'true',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+                'application_name': 'auth_service',
+            },
+            'TEST': {
+                'NAME': os.getenv('DB_TEST_NAME', 'test_auth_service'),
+            },
+        }
+    }
+    if os.getenv('DB_POOL', 'False').lower() == 'true':
+        # psycopg's connection pool; Django requires CONN_MAX_AGE=0 with it
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': SQLITE_TUNED_OPTIONS if SQLITE_TUNING else {},
+        }
+    }
+
+# Tests run on in-memory SQLite unless DB_ENGINE=postgres points them at a
+# local PostgreSQL instance
+if 'test' in sys.argv and DB_ENGINE != 'postgres':
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:'
     }
-    
+
 class DisableMigrations:
     def __contains__(self, item):
         return True
@@ -120,6 +188,58 @@ ORG_SERVICE_URL = os.getenv('ORG_SERVICE_URL', 'http://localhost:8001')
 SERVICE_TOKEN = os.getenv('SERVICE_TOKEN', 'auth-service-token')
 SERVICE_SECRET = os.getenv('SERVICE_SECRET', 'shared-service-secret-key')
 
+# Per-request query budgets (see authentication.query_budget): over-budget
+# requests fail in tests and are logged elsewhere unless enforcement is on
+QUERY_BUDGET_ENFORCE = 'test' in sys.argv or os.getenv('QUERY_BUDGET_ENFORCE', 'False').lower() == 'true'
+# X-DB-Query-Count / X-DB-Time-Ms response headers expose DB internals and a
+# timing signal (e.g. on login), so they are off outside tests unless enabled
+QUERY_BUDGET_HEADERS = 'test' in sys.argv or os.getenv('QUERY_BUDGET_HEADERS', 'False').lower() == 'true'
+
+# Slow query log (see authentication.slow_queries): queries at or over the
+# threshold are written to a rotating file, a sample of them with their plan
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.1'))
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', os.devnull if 'test' in sys.argv else str(BASE_DIR / 'slow_queries.log')
+)
+
+# Distributed tracing (see authentication.tracing): W3C traceparent is
+# continued from callers; a TRACE_SAMPLE_RATE share of new traces is exported
+TRACE_SERVICE_NAME = 'auth_service'
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'authentication.tracing.JsonLinesExporter')
+TRACE_EXPORT_FILE = os.getenv(
+    'TRACE_EXPORT_FILE', os.devnull if 'test' in sys.argv else str(BASE_DIR / 'traces.jsonl')
+)
+
+# Share of LoginView responses reporting per-stage timings in a Server-Timing
+# header (stage histograms are always recorded). Off by default: stage timings
+# make it easy to tell unknown emails from wrong passwords.
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '0'))
+
+# Logging (see authentication.log_handlers): handlers write from a background
+# thread. LOG_FORMAT=text switches the console from JSON to plain lines;
+# LOG_SAMPLE_RATES="logger=rate,..." keeps only a share of a logger's
+# INFO/DEBUG records (warnings and errors are always kept).
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition('=') for item in os.getenv('LOG_SAMPLE_RATES', '').split(','))
+    if name.strip()
+}
+
+# Request profiling (see authentication.profiling): requests with a signed
+# X-Profile header, or a PROFILING_SAMPLE_RATE share of all requests, are
+# profiled into PROFILING_DIR. PROFILER=sampling uses pyinstrument if installed.
+# A signed token is valid for 5 minutes and can be replayed on any request with
+# the same method and path in that window. Profiles are written on the request
+# path; only the newest PROFILING_MAX_FILES are kept.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SECRET = os.getenv('PROFILING_SECRET', SERVICE_SECRET)
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+PROFILER = os.getenv('PROFILER', 'cprofile')
+
 # CORS settings for microservices
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",
@@ -134,18 +254,53 @@ LOGGING = {
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} trace={trace_id} {message}',
+            'style': '{',
+        },
+        'json': {
+            '()': 'authentication.log_handlers.JsonFormatter',
+        },
+        # One JSON object per line
+        'slow_queries': {
+            'format': '{{"time": "{asctime}", "pid": {process:d}, "trace_id": "{trace_id}", "query": {message}}}',
             'style': '{',
         },
     },
+    'filters': {
+        'trace_context': {
+            '()': 'authentication.tracing.TraceContextFilter',
+        },
+        'sampling': {
+            '()': 'authentication.log_handlers.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'class': 'authentication.log_handlers.BackgroundHandler',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['sampling', 'trace_context'],
+        },
+        'slow_queries': {
+            'class': 'authentication.log_handlers.BackgroundHandler',
+            'target_class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'slow_queries',
+            'filters': ['trace_context'],
         },
     },
     'root': {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        'authentication.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
\ No newline at end of file
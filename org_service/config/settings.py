@@ -34,7 +34,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'organizations.middleware.middleware.ProfilingMiddleware',
+    'organizations.middleware.middleware.TracingMiddleware',
+    'organizations.middleware.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'organizations.middleware.middleware.QueryBudgetMiddleware',
+    'organizations.middleware.middleware.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +47,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'organizations.middleware.middleware.ReplicaRoutingMiddleware',
+    'organizations.middleware.middleware.ShardRoutingMiddleware',
     'organizations.middleware.middleware.ServiceLoggingMiddleware',
 ]
 
@@ -66,18 +73,139 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# DB_ENGINE=postgres selects the production PostgreSQL profile (requires
+# psycopg); the default stays the local SQLite file.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+# SQLite tuning for small deployments and edge nodes, applied to every new
+# connection: WAL lets readers run alongside the writer, BEGIN IMMEDIATE takes
+# the write lock up front so concurrent writers queue on busy_timeout instead
+# of failing with "database is locked" on lock upgrade.
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'True').lower() == 'true'
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # milliseconds
+SQLITE_TRANSACTION_MODE = os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+
+SQLITE_TUNED_OPTIONS = {
+    'init_command': ';'.join([
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}",
+    ]),
+    'transaction_mode': SQLITE_TRANSACTION_MODE,
+    'timeout': SQLITE_BUSY_TIMEOUT / 1000,
 }
 
-if 'test' in sys.argv:
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'org_service'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Keep connections open across requests instead of reconnecting each time
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+            # Set when running behind a transaction-pooling PgBouncer
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False').lower() == 'true',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+                'application_name': 'org_service',
+            },
+            'TEST': {
+                'NAME': os.getenv('DB_TEST_NAME', 'test_org_service'),
+            },
+        }
+    }
+    if os.getenv('DB_POOL', 'False').lower() == 'true':
+        # psycopg's connection pool; Django requires CONN_MAX_AGE=0 with it
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': SQLITE_TUNED_OPTIONS if SQLITE_TUNING else {},
+        }
+    }
+
+# Read replicas (PostgreSQL profile): DB_REPLICA_HOSTS=host1,host2 adds
+# replica_1, replica_2 ... aliases; views with replica_reads = True read from them
+DATABASE_REPLICAS = []
+if DB_ENGINE == 'postgres':
+    for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+        alias = f'replica_{index}'
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+        DATABASE_REPLICAS.append(alias)
+
+# Sharding of organizations and their users: DB_SHARDS lists one database per
+# shard (SQLite file paths, or PostgreSQL database names on DB_HOST) and adds
+# shard_1, shard_2 ... aliases. The default database keeps the org and email
+# directories and everything else. Empty = unsharded.
+# Routing only reads the directories: before enabling DB_SHARDS on a database
+# that already holds data, run `manage.py backfill_shard_directory` (with
+# DB_SHARDS set) so existing orgs and users are found on the default database.
+# It is safe to repeat, e.g. once more after the switch for rows written by
+# processes still running unsharded. rebalance_shards then moves them onto shards.
+DATABASE_SHARDS = []
+for index, name in enumerate(filter(None, os.getenv('DB_SHARDS', '').split(',')), start=1):
+    alias = f'shard_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name.strip(),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+    }
+    if DB_ENGINE == 'postgres':
+        DATABASES[alias]['TEST'] = {'NAME': f'test_{name.strip()}'}
+    DATABASE_SHARDS.append(alias)
+
+# Sharded models are routed first; replicas apply to what stays on default
+DATABASE_ROUTERS = ['organizations.sharding.ShardRouter', 'organizations.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))  # read-your-writes window
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))  # seconds
+
+# Tests run on in-memory SQLite unless DB_ENGINE=postgres points them at a
+# local PostgreSQL instance
+if 'test' in sys.argv and DB_ENGINE != 'postgres':
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:'
     }
+
+# Two spare shard aliases for the sharding tests, which enable them with
+# override_settings(DATABASE_SHARDS=[...]); other tests run unsharded
+if 'test' in sys.argv:
+    DATABASE_SHARDS = []
+    for alias in ('shard_1', 'shard_2'):
+        if DB_ENGINE == 'postgres':
+            DATABASES[alias] = {
+                **DATABASES['default'],
+                'TEST': {'NAME': f"{DATABASES['default']['TEST']['NAME']}_{alias}"},
+            }
+        else:
+            DATABASES[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:'
+            }
+
 class DisableMigrations:
     def __contains__(self, item):
         return True
@@ -129,6 +257,86 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SERVICE_TOKEN = os.getenv('SERVICE_TOKEN', 'org-service-token')
 SERVICE_SECRET = os.getenv('SERVICE_SECRET', 'shared-service-secret-key')
 
+# Idempotency-Key support for retried POSTs
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))  # seconds
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', 10))  # seconds
+# How long an in-flight attempt holds its key; once it lapses (worker crash,
+# OOM kill, timeout) a retry takes the key over. Keep it above the longest
+# request time, or a slow attempt may run twice.
+IDEMPOTENCY_LEASE = float(os.getenv('IDEMPOTENCY_LEASE', IDEMPOTENCY_WAIT_TIMEOUT + 50))  # seconds
+
+# User creation: 'optimistic' inserts and maps the unique-email violation to
+# 409; 'locking' pre-checks the email under select_for_update()
+ORG_USER_CREATE_MODE = os.getenv('ORG_USER_CREATE_MODE', 'optimistic')
+ORG_EXISTS_CACHE_TIMEOUT = int(os.getenv('ORG_EXISTS_CACHE_TIMEOUT', 300))  # seconds
+# How long a process trusts its cached org -> shard mapping; bounds how long
+# stale readers may hit the old shard after rebalance_shards moves an org
+ORG_SHARD_CACHE_TIMEOUT = int(os.getenv('ORG_SHARD_CACHE_TIMEOUT', 60))  # seconds
+
+# Batched organization deletion (see process_org_deletions)
+ORG_DELETION_BATCH_SIZE = int(os.getenv('ORG_DELETION_BATCH_SIZE', 1000))
+ORG_DELETION_STALE_AFTER = int(os.getenv('ORG_DELETION_STALE_AFTER', 300))  # seconds
+
+# Per-request query budgets (see organizations.query_budget): over-budget
+# requests fail in tests and are logged elsewhere unless enforcement is on
+QUERY_BUDGET_ENFORCE = 'test' in sys.argv or os.getenv('QUERY_BUDGET_ENFORCE', 'False').lower() == 'true'
+# X-DB-Query-Count / X-DB-Time-Ms response headers expose DB internals and a
+# timing signal (e.g. on login), so they are off outside tests unless enabled
+QUERY_BUDGET_HEADERS = 'test' in sys.argv or os.getenv('QUERY_BUDGET_HEADERS', 'False').lower() == 'true'
+
+# Slow query log (see organizations.slow_queries): queries at or over the
+# threshold are written to a rotating file, a sample of them with their plan
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.1'))
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', os.devnull if 'test' in sys.argv else str(BASE_DIR / 'slow_queries.log')
+)
+
+# Distributed tracing (see organizations.tracing): W3C traceparent is
+# continued from callers; a TRACE_SAMPLE_RATE share of new traces is exported
+TRACE_SERVICE_NAME = 'org_service'
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'organizations.tracing.JsonLinesExporter')
+TRACE_EXPORT_FILE = os.getenv(
+    'TRACE_EXPORT_FILE', os.devnull if 'test' in sys.argv else str(BASE_DIR / 'traces.jsonl')
+)
+
+# Logging (see organizations.log_handlers): handlers write from a background
+# thread. LOG_FORMAT=text switches the console from JSON to plain lines;
+# LOG_SAMPLE_RATES="logger=rate,..." keeps only a share of a logger's
+# INFO/DEBUG records (warnings and errors are always kept).
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition('=') for item in os.getenv('LOG_SAMPLE_RATES', '').split(','))
+    if name.strip()
+}
+
+# Request profiling (see organizations.profiling): requests with a signed
+# X-Profile header, or a PROFILING_SAMPLE_RATE share of all requests, are
+# profiled into PROFILING_DIR. PROFILER=sampling uses pyinstrument if installed.
+# A signed token is valid for 5 minutes and can be replayed on any request with
+# the same method and path in that window. Profiles are written on the request
+# path; only the newest PROFILING_MAX_FILES are kept.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SECRET = os.getenv('PROFILING_SECRET', SERVICE_SECRET)
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+PROFILER = os.getenv('PROFILER', 'cprofile')
+
+# Memory profiling (see organizations.memory_profiling): opt-in tracemalloc
+# tracing with periodic snapshots, served at /internal/memory/ and dumped to
+# MEMORY_DUMP_DIR on POST or SIGUSR2. Tracing slows allocations noticeably.
+MEMORY_PROFILING_ENABLED = os.getenv('MEMORY_PROFILING_ENABLED', 'False').lower() == 'true'
+MEMORY_PROFILING_FRAMES = int(os.getenv('MEMORY_PROFILING_FRAMES', '10'))
+MEMORY_SNAPSHOT_INTERVAL = int(os.getenv('MEMORY_SNAPSHOT_INTERVAL', '300'))
+MEMORY_DUMP_DIR = os.getenv('MEMORY_DUMP_DIR', str(BASE_DIR / 'memory_dumps'))
+
+# ASYNC_INTERNAL_VIEWS=True routes /internal/users/<email>/ to the async-native
+# AsyncInternalUserView. Enable it when serving config.asgi (e.g. under
+# uvicorn); under WSGI every call would need its own event loop.
+ASYNC_INTERNAL_VIEWS = os.getenv('ASYNC_INTERNAL_VIEWS', 'False').lower() == 'true'
+
 # CORS settings for microservices
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",
@@ -143,18 +351,53 @@ LOGGING = {
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} trace={trace_id} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'organizations.log_handlers.JsonFormatter',
+        },
+        # One JSON object per line
+        'slow_queries': {
+            'format': '{{"time": "{asctime}", "pid": {process:d}, "trace_id": "{trace_id}", "query": {message}}}',
+            'style': '{',
+        },
+    },
+    'filters': {
+        'trace_context': {
+            '()': 'organizations.tracing.TraceContextFilter',
+        },
+        'sampling': {
+            '()': 'organizations.log_handlers.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'class': 'organizations.log_handlers.BackgroundHandler',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['sampling', 'trace_context'],
+        },
+        'slow_queries': {
+            'class': 'organizations.log_handlers.BackgroundHandler',
+            'target_class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'slow_queries',
+            'filters': ['trace_context'],
         },
     },
     'root': {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        'organizations.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
\ No newline at end of file
@@ -16,9 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from organizations.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('orgs/', include('organizations.urls')),
     path('internal/', include('organizations.internal_urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
\ No newline at end of file
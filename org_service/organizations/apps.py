@@ -1,5 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_save
 
 class OrganizationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'organizations'
\ No newline at end of file
+    name = 'organizations'
+
+    def ready(self):
+        from organizations.models.models import Organization, OrgUser
+        from organizations.services.services import sync_search_index
+        from organizations.sharding import register_organization
+
+        post_save.connect(sync_search_index, sender=OrgUser, dispatch_uid='org_user_search_index')
+        post_save.connect(register_organization, sender=Organization, dispatch_uid='org_shard_directory')
+
+        if settings.MEMORY_PROFILING_ENABLED:
+            from organizations import memory_profiling
+            memory_profiling.start()
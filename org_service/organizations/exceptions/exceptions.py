@@ -6,12 +6,23 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+class DuplicateEmailError(Exception):
+    """
+    Raised when a user with the same email already exists
+    """
+
 def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
     
     if response is not None:
         return response
 
+    if isinstance(exc, DuplicateEmailError):
+        return Response({
+            "message": "User with this email already exists",
+            "detail": "Email must be unique"
+        }, status=status.HTTP_409_CONFLICT)
+
     # Handle database errors
     if isinstance(exc, IntegrityError):
         if 'unique_email' in str(exc).lower():
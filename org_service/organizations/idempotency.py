@@ -0,0 +1,170 @@
+import functools
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from organizations.models.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+CLAIM_ATTEMPTS = 3
+
+
+def _request_hash(request):
+    return hashlib.sha256(request.body or b'').hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _find_live(scope, key):
+    """Single indexed lookup of an unexpired record for (scope, key)"""
+    return IdempotencyKey.objects.filter(
+        scope=scope, key=key, expires_at__gt=timezone.now()
+    ).first()
+
+
+def _claim(scope, key, request_hash):
+    """
+    Insert the in-flight marker for (scope, key); None if another attempt holds it.
+
+    The marker only holds a short lease (IDEMPOTENCY_LEASE): if its attempt
+    dies without completing, the marker expires and a retry takes the key over.
+    """
+    IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=timezone.now()).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_LEASE)
+            )
+    except IntegrityError:
+        return None
+
+
+def _wait_for_completion(scope, key):
+    """
+    Poll an in-flight attempt until it completes, is abandoned or we time out
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        record = _find_live(scope, key)
+        if record is None or record.is_complete:
+            return record
+    return _find_live(scope, key)
+
+
+def _resolve_existing(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response({
+            "message": "Idempotency-Key reused with a different request body",
+            "detail": "Use a new key for a different request"
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if record.is_complete:
+        return _replay(record)
+    return _in_progress()
+
+
+def _in_progress():
+    return Response({
+        "message": "A request with this Idempotency-Key is still in progress",
+        "detail": "Retry later"
+    }, status=status.HTTP_409_CONFLICT)
+
+
+def idempotent(scope):
+    """
+    Make a view method honour the Idempotency-Key header.
+
+    The first request with a key stores its final response; retries with the
+    same key and body get that response back from a single key lookup, and
+    concurrent duplicates wait for the in-flight attempt instead of racing it.
+    5xx responses and exceptions release the key so the client can retry.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None:
+                return view_method(view, request, *args, **kwargs)
+
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return Response({
+                    "message": "Invalid Idempotency-Key",
+                    "detail": f"Key must be 1-{MAX_KEY_LENGTH} characters"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            scoped = ':'.join([scope, *(str(kwargs[name]) for name in sorted(kwargs))])
+            request_hash = _request_hash(request)
+
+            for _ in range(CLAIM_ATTEMPTS):
+                record = _find_live(scoped, key)
+                if record is None:
+                    record = _claim(scoped, key, request_hash)
+                    if record is not None:
+                        return _complete(record, view_method, view, request, *args, **kwargs)
+                    # Lost the insert race to a concurrent duplicate; look it up again
+                    continue
+                if record.is_complete or record.request_hash != request_hash:
+                    return _resolve_existing(record, request_hash)
+                record = _wait_for_completion(scoped, key)
+                if record is not None:
+                    return _resolve_existing(record, request_hash)
+                # The in-flight attempt failed and released the key; try to take it over
+            return _in_progress()
+        return wrapper
+    return decorator
+
+
+def _complete(record, view_method, view, request, *args, **kwargs):
+    try:
+        response = view_method(view, request, *args, **kwargs)
+    except Exception:
+        record.delete()
+        raise
+
+    if not isinstance(response, Response) or response.status_code >= 500:
+        record.delete()
+        return response
+
+    stored = IdempotencyKey.objects.filter(id=record.id).update(
+        status_code=response.status_code,
+        response_body=response.data,
+        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    )
+    if not stored:
+        logger.warning(
+            "Idempotency-Key %s:%s outlived its lease; a retry may have run the request again",
+            record.scope, record.key
+        )
+    return response
+
+
+def purge_expired_keys(batch_size=1000):
+    """
+    Delete expired idempotency records in bounded batches
+    """
+    purged = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return purged
+        purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.urls import path
-from .views.views import InternalUserView
+from .views.views import AsyncInternalUserView, InternalMemoryView, InternalStatsView, InternalUserView
+
+user_view = AsyncInternalUserView if settings.ASYNC_INTERNAL_VIEWS else InternalUserView
 
 urlpatterns = [
-    path('users/<str:email>/', InternalUserView.as_view(), name='internal-user'),
-]
\ No newline at end of file
+    path('users/<str:email>/', user_view.as_view(), name='internal-user'),
+    path('stats/', InternalStatsView.as_view(), name='internal-stats'),
+    path('memory/', InternalMemoryView.as_view(), name='internal-memory'),
+]
@@ -0,0 +1,140 @@
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+# Windows reported by /internal/stats/, in seconds
+WINDOWS = {'1m': 60, '5m': 300, '15m': 900}
+SLOT_SECONDS = 10
+# Distinct (service_id, route) series kept; later ones are folded into 'other'
+MAX_SERIES = 100
+
+# Log-linear latency buckets: each bucket is 5% wider than the previous one,
+# so percentiles are accurate to within 5% at any scale
+MIN_MS = 0.1
+RATIO = 1.05
+_LOG_RATIO = math.log(RATIO)
+
+
+def bucket_of(ms):
+    if ms <= MIN_MS:
+        return 0
+    return int(math.log(ms / MIN_MS) / _LOG_RATIO) + 1
+
+
+def bucket_upper_ms(bucket):
+    return MIN_MS * RATIO ** bucket
+
+
+class _Slot:
+    __slots__ = ('index', 'histogram', 'count', 'errors')
+
+    def __init__(self, index):
+        self.index = index
+        self.histogram = Counter()
+        self.count = 0
+        self.errors = 0
+
+
+class RollingLatency:
+    """
+    Latency histograms of the longest window in a ring of SLOT_SECONDS slots;
+    a slot is reused once it falls out of the window, so memory stays fixed
+    """
+
+    def __init__(self):
+        self.slots = [None] * (max(WINDOWS.values()) // SLOT_SECONDS)
+
+    def record(self, duration_ms, error, now):
+        index = int(now // SLOT_SECONDS)
+        position = index % len(self.slots)
+        slot = self.slots[position]
+        if slot is None or slot.index != index:
+            slot = self.slots[position] = _Slot(index)
+        slot.histogram[bucket_of(duration_ms)] += 1
+        slot.count += 1
+        slot.errors += error
+
+    def summary(self, seconds, now):
+        index = int(now // SLOT_SECONDS)
+        oldest = index - seconds // SLOT_SECONDS + 1
+        histogram = Counter()
+        count = errors = 0
+        for slot in self.slots:
+            if slot is not None and oldest <= slot.index <= index:
+                histogram.update(slot.histogram)
+                count += slot.count
+                errors += slot.errors
+
+        # Whole past slots plus the elapsed part of the current one
+        span = (index - oldest) * SLOT_SECONDS + now % SLOT_SECONDS
+        return {
+            'count': count,
+            'qps': round(count / span, 3) if span else 0.0,
+            'error_rate': round(errors / count, 4) if count else 0.0,
+            'p50_ms': self._percentile(histogram, count, 0.50),
+            'p95_ms': self._percentile(histogram, count, 0.95),
+            'p99_ms': self._percentile(histogram, count, 0.99),
+        }
+
+    @staticmethod
+    def _percentile(histogram, count, quantile):
+        if not count:
+            return None
+        rank = math.ceil(quantile * count)
+        seen = 0
+        for bucket in sorted(histogram):
+            seen += histogram[bucket]
+            if seen >= rank:
+                return round(bucket_upper_ms(bucket), 2)
+
+
+class LatencyStats:
+    """
+    Rolling latency per (service_id, route) of the current process, timed on
+    the monotonic clock so wall-clock adjustments cannot skew the windows
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, service_id, route, duration, status_code):
+        """
+        Record one call that took `duration` seconds; 5xx responses count as errors
+        """
+        with self._lock:
+            key = (service_id, route)
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= MAX_SERIES:
+                    key = ('other', 'other')
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = RollingLatency()
+            series.record(duration * 1000, status_code >= 500, self.clock())
+
+    def snapshot(self):
+        with self._lock:
+            now = self.clock()
+            return {
+                'pid': os.getpid(),
+                'series': [
+                    {
+                        'service_id': service_id,
+                        'route': route,
+                        **{name: series.summary(seconds, now) for name, seconds in WINDOWS.items()},
+                    }
+                    for (service_id, route), series in sorted(self._series.items())
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+# Internal calls handled by this process, recorded by ServiceLoggingMiddleware
+stats = LatencyStats()
@@ -0,0 +1,172 @@
+"""
+Helpers shared by the bench_* management commands
+
+auth_service carries a twin of this module (auth_service/authentication/management/commands/_bench.py);
+change both copies together.
+"""
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from django.conf import settings
+from django.db import connections
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_concurrently(operation, total, threads):
+    """
+    Run operation(i) for i in range(total) across `threads` worker threads.
+
+    operation returns True on success. Returns (latencies, errors, elapsed)
+    with latencies in seconds measured on the monotonic clock.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(worker_index):
+        local_latencies = []
+        local_errors = []
+        try:
+            for i in range(worker_index, total, threads):
+                start = time.perf_counter()
+                try:
+                    ok = operation(i)
+                except Exception as e:
+                    ok = False
+                    local_errors.append(type(e).__name__)
+                else:
+                    if not ok:
+                        local_errors.append('failed')
+                local_latencies.append(time.perf_counter() - start)
+        finally:
+            # Worker threads own their DB connections
+            connections.close_all()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.extend(local_errors)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(name, latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'name': name,
+        'operations': len(ordered),
+        'errors': len(errors),
+        'error_types': sorted(set(errors)),
+        'elapsed_s': round(elapsed, 4),
+        'throughput_per_s': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def format_summary(summary):
+    return (
+        f"{summary['name']:<28} ops={summary['operations']:<6} errors={summary['errors']:<5} "
+        f"rps={summary['throughput_per_s']:<9} p50={summary['p50_ms']}ms "
+        f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms"
+    )
+
+
+def measure(operation, samples=20, warmup=3, min_sample_time=0.05):
+    """
+    Time operation() the way timeit does, with the garbage collector off.
+
+    The loop count is doubled until one sample takes at least min_sample_time,
+    `warmup` samples are discarded, then `samples` samples are taken. Returns
+    (per-call seconds of each sample, loops per sample).
+    """
+    def sample(loops):
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(loops):
+                operation()
+            return time.perf_counter() - start
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    # The first call pays one-off costs (imports, regex compilation, translations)
+    operation()
+    loops = 1
+    while sample(loops) < min_sample_time and loops < 1 << 24:
+        loops *= 2
+    for _ in range(warmup):
+        sample(loops)
+    return [sample(loops) / loops for _ in range(samples)], loops
+
+
+def summarize_timings(name, timings, loops):
+    return {
+        'name': name,
+        'samples': len(timings),
+        'loops': loops,
+        'mean_us': round(statistics.fmean(timings) * 1e6, 3),
+        'median_us': round(statistics.median(timings) * 1e6, 3),
+        'stdev_us': round(statistics.stdev(timings) * 1e6, 3) if len(timings) > 1 else 0.0,
+        'min_us': round(min(timings) * 1e6, 3),
+    }
+
+
+def format_timings(summary):
+    return (
+        f"{summary['name']:<32} median={summary['median_us']}us mean={summary['mean_us']}us "
+        f"+- {summary['stdev_us']}us min={summary['min_us']}us ({summary['samples']}x{summary['loops']} loops)"
+    )
+
+
+def compare_timings(results, baseline):
+    """
+    Median change of each benchmark present in both runs, in percent; positive is slower
+    """
+    before = {summary['name']: summary for summary in baseline}
+    changes = {}
+    for summary in results:
+        previous = before.get(summary['name'])
+        if previous is None or not previous['median_us']:
+            continue
+        changes[summary['name']] = round(
+            (summary['median_us'] - previous['median_us']) / previous['median_us'] * 100, 2
+        )
+    return changes
+
+
+def environment():
+    """
+    Where the numbers came from, so runs on different commits can be told apart
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
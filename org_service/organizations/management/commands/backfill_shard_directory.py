@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from organizations import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Register existing organizations and users in the org and email directories "
+        "as living on the default database. Required before enabling DB_SHARDS on a "
+        "database that already has data; safe to run again"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        orgs, users = sharding.backfill_directories(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Registered {orgs} organizations and {users} users"))
@@ -0,0 +1,68 @@
+"""
+Per-request database cost with fresh versus persistent connections.
+
+auth_service carries a twin of this module (auth_service/authentication/management/commands/bench_db_connections.py);
+change both copies together.
+"""
+import json
+from django.core import signals
+from django.core.management.base import BaseCommand
+from django.db import connections
+from ._bench import run_concurrently, summarize, format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database cost with a new connection per request "
+        "versus the configured persistent connections / pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this path")
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        settings_dict = connections[alias].settings_dict
+        results = []
+
+        original_max_age = settings_dict['CONN_MAX_AGE']
+        original_pool = settings_dict['OPTIONS'].pop('pool', None)
+        settings_dict['CONN_MAX_AGE'] = 0
+        try:
+            results.append(self._bench('new connection per request', alias, options))
+        finally:
+            settings_dict['CONN_MAX_AGE'] = original_max_age
+            if original_pool is not None:
+                settings_dict['OPTIONS']['pool'] = original_pool
+
+        label = 'pool' if original_pool else f"CONN_MAX_AGE={original_max_age}"
+        results.append(self._bench(f"configured ({label})", alias, options))
+
+        for summary in results:
+            self.stdout.write(format_summary(summary))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _bench(self, name, alias, options):
+        connections.close_all()
+
+        def request(i):
+            # Same lifecycle Django applies around every request: connections
+            # past CONN_MAX_AGE (or unusable) are closed when it finishes.
+            signals.request_started.send(sender=self.__class__)
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+            finally:
+                signals.request_finished.send(sender=self.__class__)
+            return True
+
+        latencies, errors, elapsed = run_concurrently(request, options['requests'], options['threads'])
+        summary = summarize(name, latencies, errors, elapsed)
+        summary['vendor'] = connections[alias].vendor
+        return summary
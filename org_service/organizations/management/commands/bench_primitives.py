@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.request import Request
+from organizations.models.models import OrgUser
+from organizations.permissions import ServiceTokenPermission
+from organizations.serializers.serializers import UserCreateSerializer, InternalUserSerializer
+from ._bench import measure, summarize_timings, format_timings, compare_timings, environment
+
+EMAIL = 'bench.user@example.com'
+# Fixed so runs stay comparable; UUIDs like real rows, so rendering times str(UUID)
+USER_ID = uuid.UUID('6f1c2a4e-8b3d-4f7a-9c21-5d0e7b9a3f12')
+ORG_ID = uuid.UUID('2b7e9d14-3c5a-4e8f-a6b0-91d4c8e2f735')
+
+
+def has_permission():
+    path = f"/internal/users/{EMAIL}/"
+    timestamp = str(int(time.time()))
+    signature = hmac.new(
+        settings.SERVICE_SECRET.encode('utf-8'),
+        f"GET|{path}||auth-service|{timestamp}".encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+    request = Request(RequestFactory().get(path, headers={
+        'X-Service-Token': settings.SERVICE_TOKEN,
+        'X-Service-ID': 'auth-service',
+        'X-Timestamp': timestamp,
+        'X-Signature': signature,
+    }))
+    permission = ServiceTokenPermission()
+    # A rejected request returns early and would time the wrong path
+    if not permission.has_permission(request, None):
+        raise CommandError("The benchmark request failed ServiceTokenPermission")
+    return lambda: permission.has_permission(request, None)
+
+
+def user_create_serializer():
+    data = {'email': ' Bench.User@Example.com ', 'name': ' Bench User ', 'role': 'member'}
+    return lambda: UserCreateSerializer(data=data).is_valid(raise_exception=True)
+
+
+def internal_user_serializer():
+    # Unsaved: rendering reads only the instance's columns
+    user = OrgUser(id=USER_ID, org_id=ORG_ID, email=EMAIL, name='Bench User', role='member')
+    return lambda: InternalUserSerializer(user).data
+
+
+# name -> fixture returning the operation to time; fixtures run once, untimed
+BENCHMARKS = {
+    'service_token.has_permission': has_permission,
+    'user_create_serializer.validate': user_create_serializer,
+    'internal_user_serializer.data': internal_user_serializer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the per-request primitives of org_service (service token check, user "
+        "validation, internal user rendering) and optionally compare with a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=3, help="Samples run first and discarded")
+        parser.add_argument('--min-sample-time', type=float, default=0.05,
+                            help="Seconds each sample should last; sets the loop count")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this path")
+        parser.add_argument('--baseline', help="Results JSON of an earlier run to compare against")
+        parser.add_argument('--max-regression', type=float,
+                            help="Fail if any median is this many percent slower than the baseline")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)['benchmarks']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+
+        results = []
+        for name in options['names'] or BENCHMARKS:
+            timings, loops = measure(
+                BENCHMARKS[name](), options['samples'], options['warmup'], options['min_sample_time']
+            )
+            summary = summarize_timings(name, timings, loops)
+            results.append(summary)
+            self.stdout.write(format_timings(summary))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'environment': environment(), 'benchmarks': results}, f, indent=2)
+        if baseline is not None:
+            self._compare(results, baseline, options['max_regression'])
+
+    def _compare(self, results, baseline, max_regression):
+        regressions = []
+        self.stdout.write(self.style.MIGRATE_HEADING("Median against baseline"))
+        for name, change in compare_timings(results, baseline).items():
+            line = f"{name:<32} {change:+.1f}%"
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                f"Slower by more than {max_regression}% against the baseline: {', '.join(regressions)}"
+            )
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import uuid
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from organizations.models.models import Organization, OrgUser
+from ._bench import run_concurrently, summarize, format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent user create and lookup throughput on a scratch SQLite "
+        "database with default settings versus the SQLITE_* tuning"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users created per profile")
+        parser.add_argument('--lookups', type=int, default=5000, help="Email lookups per profile")
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this path")
+
+    def handle(self, *args, **options):
+        profiles = [
+            ('default', {}),
+            ('tuned', settings.SQLITE_TUNED_OPTIONS),
+        ]
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, db_options in profiles:
+                alias = f"bench_sqlite_{label}"
+                self._register(alias, os.path.join(tmp, f"{label}.sqlite3"), db_options)
+                try:
+                    results.extend(self._bench_profile(label, alias, options))
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+        for summary in results:
+            self.stdout.write(format_summary(summary))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _register(self, alias, path, db_options):
+        configured = connections.configure_settings({
+            'default': connections.settings['default'],
+            alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, 'OPTIONS': dict(db_options)},
+        })
+        connections.settings[alias] = configured[alias]
+        call_command('migrate', database=alias, verbosity=0)
+
+    def _bench_profile(self, label, alias, options):
+        org = Organization.objects.using(alias).create(name="bench")
+        run_id = uuid.uuid4().hex[:8]
+        users = options['users']
+
+        def create(i):
+            with transaction.atomic(using=alias):
+                OrgUser.objects.using(alias).create(
+                    org_id=org.id, email=f"{run_id}-{i}@example.com", name=f"Bench User {i}"
+                )
+            return True
+
+        def lookup(i):
+            email = f"{run_id}-{i % users}@example.com"
+            return OrgUser.objects.using(alias).by_email(email).only('id', 'org_id', 'role').first() is not None
+
+        def mixed(i):
+            # Writers and readers interleaved: every other operation is a write
+            if i % 2:
+                return lookup(i)
+            return create(users + i)
+
+        results = []
+        for phase, operation, total in [
+            ('create', create, users),
+            ('lookup', lookup, options['lookups']),
+            ('mixed', mixed, users),
+        ]:
+            latencies, errors, elapsed = run_concurrently(operation, total, options['threads'])
+            summary = summarize(f"{label}/{phase}", latencies, errors, elapsed)
+            summary['threads'] = options['threads']
+            results.append(summary)
+        return results
@@ -0,0 +1,71 @@
+import json
+import uuid
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+from organizations.models.models import Organization, OrgUser
+from organizations.services.services import OrgUserCreationService
+from ._bench import run_concurrently, summarize, format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark POST /orgs/<org_id>/users/ in optimistic and locking mode "
+        "against the configured database (rows are removed afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', choices=['optimistic', 'locking', 'both'], default='both'
+        )
+        parser.add_argument('--users', type=int, default=500, help="Users to create per mode")
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--duplicate-ratio', type=float, default=0.0,
+            help="Fraction of requests that reuse an existing email (expected 409)"
+        )
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this path")
+
+    def handle(self, *args, **options):
+        modes = ['optimistic', 'locking'] if options['mode'] == 'both' else [options['mode']]
+        results = [self._bench_mode(mode, options) for mode in modes]
+
+        for summary in results:
+            self.stdout.write(format_summary(summary))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _bench_mode(self, mode, options):
+        org = Organization.objects.create(name=f"bench-{mode}-{uuid.uuid4().hex[:8]}")
+        run_id = uuid.uuid4().hex[:8]
+        url = f"/orgs/{org.id}/users/"
+        duplicate_every = int(1 / options['duplicate_ratio']) if options['duplicate_ratio'] else 0
+
+        def create(i):
+            client = APIClient(SERVER_NAME='localhost')
+            duplicate = duplicate_every and i % duplicate_every == duplicate_every - 1
+            email = f"bench-{run_id}-{0 if duplicate else i}@example.com"
+            response = client.post(
+                url, {'email': email, 'name': f"Bench User {i}", 'role': 'member'}, format='json'
+            )
+            return response.status_code == (409 if duplicate else 201)
+
+        try:
+            # Seed the email the duplicate requests collide with
+            if duplicate_every:
+                OrgUser.objects.create(
+                    org=org, email=f"bench-{run_id}-0@example.com", name="Bench Seed"
+                )
+            with override_settings(ORG_USER_CREATE_MODE=mode):
+                latencies, errors, elapsed = run_concurrently(
+                    create, options['users'], options['threads']
+                )
+        finally:
+            OrgUser.objects.filter(org=org).delete()
+            org.delete()
+            OrgUserCreationService.forget_organization(org.id)
+
+        summary = summarize(mode, latencies, errors, elapsed)
+        summary['threads'] = options['threads']
+        return summary
@@ -0,0 +1,178 @@
+import functools
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from organizations import sharding
+from organizations.models.models import (
+    Organization, OrgUser, OrgUserSearchTerm, OrgShard, UserEmailDirectory
+)
+from organizations.services.services import UserSearchIndexService
+from organizations.synthetic import people, preparer, insert_rows
+
+# Organizations and users are created over the year after EPOCH
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+SPAN_SECONDS = 365 * 24 * 60 * 60
+
+# Org sizes follow a Pareto distribution: with this shape roughly 20% of
+# organizations hold 80% of the users
+SIZE_SHAPE = 1.16
+# Role mix (percent) of every user after each org's first, who is always an admin
+ROLE_WEIGHTS = {'admin': 3, 'member': 80, 'viewer': 17}
+
+ORG_WORDS = [
+    'Acme', 'Apex', 'Blue', 'Bright', 'Cedar', 'Delta', 'Echo', 'Falcon', 'Granite', 'Harbor',
+    'Iron', 'Juniper', 'Lumen', 'Maple', 'Nimbus', 'Nova', 'Orbit', 'Pioneer', 'Quartz', 'River',
+    'Summit', 'Terra', 'Vertex', 'Willow',
+]
+ORG_KINDS = ['Labs', 'Systems', 'Logistics', 'Health', 'Capital', 'Studios', 'Foods', 'Energy', 'Works', 'Group']
+
+
+def org_sizes(rng, orgs, users):
+    """
+    Split `users` over `orgs` by Pareto weights; every org gets at least one
+    user when there are enough
+    """
+    base = 1 if users >= orgs else 0
+    remaining = users - base * orgs
+    weights = [rng.paretovariate(SIZE_SHAPE) for _ in range(orgs)]
+    total = sum(weights)
+    shares = [remaining * weight / total for weight in weights]
+    sizes = [base + int(share) for share in shares]
+    # Largest remainders take the users lost to rounding down
+    leftover = users - sum(sizes)
+    for index in sorted(range(orgs), key=lambda k: shares[k] - int(shares[k]), reverse=True)[:leftover]:
+        sizes[index] += 1
+    return sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic benchmark dataset: N organizations with Pareto-"
+        "distributed sizes and M users with a realistic role mix, inserted in bulk "
+        "together with their search terms and shard directory entries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orgs', type=int, default=100)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Same seed, same data; use it with generate_auth_users for matching logins")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Users inserted per transaction")
+        parser.add_argument('--skip-search-index', action='store_true',
+                            help="Do not write search terms (run rebuild_search_index later)")
+
+    def handle(self, *args, **options):
+        if options['orgs'] < 1 or options['users'] < 0:
+            raise CommandError("Need at least one organization and a non-negative user count")
+        self.verbosity = options['verbosity']
+        started = time.perf_counter()
+        try:
+            counts = self._generate(options)
+        except IntegrityError as e:
+            raise CommandError(
+                f"Insert failed ({e}); generate into an empty database or use another --seed"
+            )
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {', '.join(f'{count} {table}' for table, count in counts.items())} "
+            f"in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)"
+        ))
+
+    def _generate(self, options):
+        rng = random.Random(f"orgs:{options['seed']}")
+        draw = rng.random
+        roles = [role for role, weight in ROLE_WEIGHTS.items() for _ in range(weight)]
+        sharded = sharding.sharding_enabled()
+        now = datetime.now(dt_timezone.utc)
+        counts = defaultdict(int)
+        pending = _Pending()
+        person = people(options['seed'], options['users'])
+        # Values are converted to database form once and shared by every row using them
+        preparers = {}
+        name_terms = functools.lru_cache(maxsize=None)(
+            lambda user_name: UserSearchIndexService.terms_for('', user_name)
+        )
+
+        for size in org_sizes(rng, options['orgs'], options['users']):
+            org_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+            db = sharding.placement_for(org_id) if sharded else DEFAULT_DB_ALIAS
+            if db not in preparers:
+                preparers[db] = (preparer(OrgUser, 'id', db), preparer(OrgUser, 'created_at', db))
+            prep_uuid, prep_datetime = preparers[db]
+            org_created = EPOCH + timedelta(seconds=rng.random() * SPAN_SECONDS)
+            name = f"{rng.choice(ORG_WORDS)} {rng.choice(ORG_WORDS)} {rng.choice(ORG_KINDS)}"
+            org_key = prep_uuid(org_id)
+            pending.orgs[db].append(
+                (org_key, name, Organization.STATUS_ACTIVE, prep_datetime(org_created), prep_datetime(now))
+            )
+            if sharded:
+                pending.org_shards.append((org_id, db, now, now))
+
+            remaining = (EPOCH + timedelta(seconds=SPAN_SECONDS) - org_created).total_seconds()
+            for position in range(size):
+                user_name, email = next(person)
+                user_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+                user_key = prep_uuid(user_id)
+                role = 'admin' if position == 0 else roles[int(draw() * len(roles))]
+                created = prep_datetime(org_created + timedelta(seconds=draw() * remaining))
+                pending.users[db].append((user_key, email, user_name, role, org_key, created, created))
+                if not options['skip_search_index']:
+                    # Synthetic emails are already normalized (lower-case ASCII)
+                    terms = [email[:UserSearchIndexService.max_term_length], *name_terms(user_name)]
+                    pending.terms[db].extend((org_key, user_key, term) for term in terms)
+                if sharded:
+                    pending.emails.append((email, user_id, org_id, db))
+                pending.size += 1
+                if pending.size >= options['batch_size']:
+                    self._flush(pending, counts)
+
+        self._flush(pending, counts)
+        return counts
+
+    def _flush(self, pending, counts):
+        for db in set(pending.orgs) | set(pending.users):
+            with transaction.atomic(using=db):
+                # Parents first: the foreign keys are checked per statement on some backends
+                self._insert(Organization, db, ['id', 'name', 'status', 'created_at', 'updated_at'],
+                             pending.orgs[db], counts, prepared=True)
+                self._insert(OrgUser, db, ['id', 'email', 'name', 'role', 'org', 'created_at', 'updated_at'],
+                             pending.users[db], counts, prepared=True)
+                self._insert(OrgUserSearchTerm, db, ['org', 'user', 'term'], pending.terms[db], counts,
+                             prepared=True)
+        if pending.org_shards or pending.emails:
+            with transaction.atomic():
+                self._insert(OrgShard, DEFAULT_DB_ALIAS, ['org_id', 'shard', 'created_at', 'updated_at'],
+                             pending.org_shards, counts)
+                self._insert(UserEmailDirectory, DEFAULT_DB_ALIAS, ['email', 'user_id', 'org_id', 'shard'],
+                             pending.emails, counts)
+        if self.verbosity > 1:
+            self.stdout.write(f"{counts[OrgUser._meta.db_table]} users")
+        pending.clear()
+
+    @staticmethod
+    def _insert(model, db, fields, rows, counts, prepared=False):
+        if rows:
+            insert_rows(model, db, fields, rows, prepared)
+            counts[model._meta.db_table] += len(rows)
+
+
+class _Pending:
+    """
+    Rows generated since the last flush, per database
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.orgs = defaultdict(list)
+        self.users = defaultdict(list)
+        self.terms = defaultdict(list)
+        self.org_shards = []
+        self.emails = []
+        self.size = 0
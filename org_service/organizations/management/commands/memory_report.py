@@ -0,0 +1,72 @@
+import os
+import tracemalloc
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from organizations.memory_profiling import KEY_TYPES
+
+
+def _format_kb(size):
+    return f"{size / 1024:,.1f}KiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Analyze tracemalloc dumps offline: top allocation sites of one dump, or "
+        "growth between two (default: the two newest in MEMORY_DUMP_DIR)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dumps', nargs='*', help="One dump, or an older and a newer dump to compare")
+        parser.add_argument('--dir', default=None, help="Dump directory (default: MEMORY_DUMP_DIR)")
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--key-type', default='lineno', choices=KEY_TYPES)
+
+    def _newest_dumps(self, directory):
+        try:
+            paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.tracemalloc')]
+        except FileNotFoundError:
+            paths = []
+        if not paths:
+            raise CommandError(f"No dumps found in {directory}")
+        return sorted(paths, key=os.path.getmtime)[-2:]
+
+    def handle(self, *args, **options):
+        paths = options['dumps'] or self._newest_dumps(options['dir'] or settings.MEMORY_DUMP_DIR)
+        if len(paths) > 2:
+            raise CommandError("Give one dump, or two to compare")
+        try:
+            snapshots = [tracemalloc.Snapshot.load(path) for path in paths]
+        except (OSError, EOFError) as e:
+            raise CommandError(f"Cannot load dump: {e}")
+        key_type = options['key_type']
+
+        if len(snapshots) == 1:
+            stats = snapshots[0].statistics(key_type)
+            total = sum(stat.size for stat in stats)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{paths[0]}: {_format_kb(total)} traced, top {options['top']} by size"
+            ))
+            for stat in stats[:options['top']]:
+                self._write_site(stat, f"{_format_kb(stat.size):>14} {stat.count:>9} blocks", key_type)
+            return
+
+        stats = snapshots[1].compare_to(snapshots[0], key_type)
+        growth = sum(stat.size_diff for stat in stats)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{paths[0]} -> {paths[1]}: {'+' if growth >= 0 else ''}{_format_kb(growth)}, "
+            f"top {options['top']} by growth"
+        ))
+        for stat in stats[:options['top']]:
+            sign = '+' if stat.size_diff >= 0 else ''
+            self._write_site(
+                stat, f"{sign + _format_kb(stat.size_diff):>14} {stat.count_diff:>+9} blocks  (now {_format_kb(stat.size)})",
+                key_type
+            )
+
+    def _write_site(self, stat, numbers, key_type):
+        frame = stat.traceback[-1]
+        site = frame.filename if key_type == 'filename' else f"{frame.filename}:{frame.lineno}"
+        self.stdout.write(f"{numbers}  {site}")
+        if key_type == 'traceback':
+            for line in stat.traceback.format(most_recent_first=True)[2:]:
+                self.stdout.write(f"{'':>16}{line}")
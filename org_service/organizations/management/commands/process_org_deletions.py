@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand
+from organizations.services.services import OrganizationDeletionService
+
+
+class Command(BaseCommand):
+    help = "Run pending organization deletion jobs in bounded batches (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep polling for new jobs instead of exiting when idle"
+        )
+        parser.add_argument('--interval', type=float, default=5.0, help="Polling interval in seconds")
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help="Seconds to sleep between batches to leave room for other writers"
+        )
+        parser.add_argument('--include-failed', action='store_true', help="Retry failed jobs")
+
+    def handle(self, *args, **options):
+        while True:
+            ran = self._run_pass(options)
+            if not options['loop']:
+                break
+            if not ran:
+                time.sleep(options['interval'])
+
+    def _run_pass(self, options):
+        ran = 0
+        jobs = OrganizationDeletionService.runnable_jobs(include_failed=options['include_failed'])
+        for job in jobs:
+            if not OrganizationDeletionService.claim(job):
+                continue
+            ran += 1
+            self.stdout.write(f"Deleting org {job.org_id} (job {job.id}, {job.total_users} users)")
+            while not OrganizationDeletionService.run(job, max_batches=10):
+                if job.status == job.STATUS_FAILED:
+                    self.stderr.write(self.style.ERROR(f"Job {job.id} failed: {job.error}"))
+                    break
+                self.stdout.write(f"  {job.deleted_users}/{job.total_users} users deleted")
+                if options['pause']:
+                    time.sleep(options['pause'])
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Org {job.org_id} deleted ({job.deleted_users} users)"
+                ))
+        return ran
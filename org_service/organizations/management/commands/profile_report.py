@@ -0,0 +1,75 @@
+"""
+Listing and summaries of the request profiles written by the profiling module.
+
+auth_service carries a twin of this module (auth_service/authentication/management/commands/profile_report.py);
+change both copies together.
+"""
+import io
+import os
+import pstats
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from organizations import profiling
+
+
+def collect(directory, route=None, limit=None):
+    """
+    Profile files in `directory`, newest first, optionally only those whose
+    name contains `route`
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    paths = [
+        os.path.join(directory, name) for name in names
+        if name.endswith(('.prof', '.pyisession')) and (route is None or route in name)
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    return paths[:limit] if limit else paths
+
+
+class Command(BaseCommand):
+    help = "List collected request profiles and summarize their top functions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help="Profile directory (default: PROFILING_DIR)")
+        parser.add_argument('--route', help="Only profiles whose file name contains this (e.g. internal_users)")
+        parser.add_argument('--limit', type=int, help="Only the N newest profiles")
+        parser.add_argument('--top', type=int, default=25, help="Functions to show")
+        parser.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'])
+        parser.add_argument('--list', action='store_true', help="Only list the profiles")
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or settings.PROFILING_DIR
+        paths = collect(directory, options['route'], options['limit'])
+        if not paths:
+            raise CommandError(f"No profiles found in {directory}")
+
+        for path in paths:
+            self.stdout.write(f"{os.path.getsize(path):>10}  {os.path.basename(path)}")
+        if options['list']:
+            return
+
+        cprofiles = [path for path in paths if path.endswith('.prof')]
+        if cprofiles:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\nTop {options['top']} functions by {options['sort']} across {len(cprofiles)} cProfile profiles"
+            ))
+            out = io.StringIO()
+            stats = pstats.Stats(*cprofiles, stream=out)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+            self.stdout.write(out.getvalue())
+
+        sessions = [path for path in paths if path.endswith('.pyisession')]
+        if sessions:
+            if profiling.pyinstrument is None:
+                raise CommandError("pyinstrument is needed to summarize .pyisession profiles")
+            from pyinstrument.renderers import ConsoleRenderer
+            from pyinstrument.session import Session
+
+            combined = Session.load(sessions[0])
+            for path in sessions[1:]:
+                combined = Session.combine(combined, Session.load(path))
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nCombined sampling profile of {len(sessions)} requests"))
+            self.stdout.write(ConsoleRenderer(unicode=False, color=False).render(combined))
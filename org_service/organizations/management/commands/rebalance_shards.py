@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from organizations.services.services import ShardRebalanceService
+
+
+class Command(BaseCommand):
+    help = "Show shard sizes and move organizations between shards to even them out"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', dest='org_id', help="Move only this organization (requires --to)")
+        parser.add_argument('--to', dest='target', help="Target shard alias for --org")
+        parser.add_argument('--max-moves', type=int, default=10, help="Upper bound on planned moves")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--settle', type=float,
+            default=max(settings.ORG_EXISTS_CACHE_TIMEOUT, settings.ORG_SHARD_CACHE_TIMEOUT),
+            help="Seconds to wait for other processes' caches to expire around the switch"
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Print the plan without moving")
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_SHARDS:
+            raise CommandError("Sharding is not enabled (set DB_SHARDS)")
+
+        for alias, users in ShardRebalanceService.shard_sizes().items():
+            self.stdout.write(f"{alias}: {users} users")
+
+        if options['org_id']:
+            if not options['target']:
+                raise CommandError("--org requires --to")
+            moves = [(options['org_id'], None, options['target'], None)]
+        else:
+            moves = ShardRebalanceService.plan(max_moves=options['max_moves'])
+            if not moves:
+                self.stdout.write(self.style.SUCCESS("Shards are balanced"))
+                return
+
+        for org_id, source, target, users in moves:
+            self.stdout.write(f"Move org {org_id} ({users if users is not None else '?'} users) "
+                              f"{source or ''} -> {target}")
+            if options['dry_run']:
+                continue
+            try:
+                moved = ShardRebalanceService.move_organization(
+                    org_id, target, batch_size=options['batch_size'], settle=options['settle']
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            if moved is None:
+                raise CommandError(f"Organization {org_id} not found")
+            self.stdout.write(self.style.SUCCESS(f"  moved {moved} users"))
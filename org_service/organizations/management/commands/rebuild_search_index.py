@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from organizations.services.services import UserSearchIndexService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the org user prefix search index from OrgUser rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', dest='org_id', help="Only rebuild entries of this organization")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = UserSearchIndexService.rebuild(
+            org_id=options['org_id'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} users"))
@@ -0,0 +1,152 @@
+import linecache
+import logging
+import os
+import resource
+import signal
+import threading
+import tracemalloc
+from datetime import datetime
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_TYPES = ('lineno', 'filename', 'traceback')
+
+# Allocations made by the profiler itself or by imports are noise
+_NOISE = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+# Snapshots kept: the one taken at start, and the last two periodic ones
+_baseline = None
+_previous = None
+_latest = None
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+
+
+def is_enabled():
+    return tracemalloc.is_tracing() and _baseline is not None
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_NOISE)
+
+
+def start(frames=None, interval=None):
+    """
+    Start tracing allocations, record the baseline snapshot, take periodic
+    snapshots every `interval` seconds and dump a snapshot on SIGUSR2
+    """
+    global _baseline, _thread
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or settings.MEMORY_PROFILING_FRAMES)
+    with _lock:
+        _baseline = take_snapshot()
+
+    interval = settings.MEMORY_SNAPSHOT_INTERVAL if interval is None else interval
+    if interval and _thread is None:
+        _stop.clear()
+        _thread = threading.Thread(target=_snapshot_loop, args=(interval,), name='memory-snapshots', daemon=True)
+        _thread.start()
+
+    try:
+        signal.signal(signal.SIGUSR2, _dump_on_signal)
+    except (ValueError, AttributeError):
+        # Not the main thread, or a platform without SIGUSR2
+        logger.warning("Memory profiling started without the SIGUSR2 dump handler")
+    logger.info("Memory profiling started with %s frames per allocation", tracemalloc.get_traceback_limit())
+
+
+def stop():
+    global _baseline, _previous, _latest, _thread
+    if _thread is not None:
+        _stop.set()
+        _thread.join()
+        _thread = None
+    with _lock:
+        _baseline = _previous = _latest = None
+    tracemalloc.stop()
+    try:
+        signal.signal(signal.SIGUSR2, signal.SIG_DFL)
+    except (ValueError, AttributeError):
+        pass
+
+
+def record_snapshot():
+    global _previous, _latest
+    snapshot = take_snapshot()
+    with _lock:
+        _previous, _latest = _latest, snapshot
+
+
+def _snapshot_loop(interval):
+    while not _stop.wait(interval):
+        record_snapshot()
+
+
+def _stats(current, reference, key_type, limit):
+    sites = []
+    for stat in current.compare_to(reference, key_type)[:limit]:
+        # Frames run from the oldest caller to the allocating line
+        frame = stat.traceback[-1]
+        sites.append({
+            'site': f"{frame.filename}:{frame.lineno}" if key_type != 'filename' else frame.filename,
+            'size_kb': round(stat.size / 1024, 1),
+            'size_diff_kb': round(stat.size_diff / 1024, 1),
+            'count': stat.count,
+            'count_diff': stat.count_diff,
+            'traceback': stat.traceback.format(most_recent_first=True) if key_type == 'traceback' else None,
+        })
+    return sites
+
+
+def top_growth(limit=20, since='baseline', key_type='lineno'):
+    """
+    Allocation sites sorted by growth: since the baseline (compared with a
+    fresh snapshot), or over the last snapshot interval
+    """
+    if since == 'previous':
+        with _lock:
+            current, reference = _latest, _previous
+        if reference is None:
+            raise ValueError("Need two periodic snapshots to compare; wait for MEMORY_SNAPSHOT_INTERVAL")
+    else:
+        current = take_snapshot()
+        with _lock:
+            reference = _baseline
+    return _stats(current, reference, key_type, limit)
+
+
+def memory_usage():
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        'pid': os.getpid(),
+        'traced_kb': round(traced / 1024, 1),
+        'traced_peak_kb': round(peak / 1024, 1),
+        # ru_maxrss is in KiB on Linux
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def dump(directory=None):
+    """
+    Write a snapshot that memory_report can analyze offline; returns its path
+    """
+    directory = directory or settings.MEMORY_DUMP_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}.tracemalloc")
+    take_snapshot().dump(path)
+    return path
+
+
+def _dump_on_signal(signum, frame):
+    try:
+        logger.warning("Memory snapshot written to %s", dump())
+    except OSError as e:
+        logger.error("Could not write memory snapshot: %s", e)
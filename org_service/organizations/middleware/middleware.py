@@ -1,33 +1,62 @@
 import logging
 import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
+from organizations import latency_stats, metrics, profiling, routers, sharding, tracing
+from organizations.query_budget import QueryBudgetExceeded, QueryCounter, budget_for
+from organizations.slow_queries import SlowQueryLog, view_name
 
 logger = logging.getLogger(__name__)
 
 class ServiceLoggingMiddleware(MiddlewareMixin):
     """
-    Middleware to log internal service API calls for security monitoring
+    Middleware to log internal service API calls for security monitoring.
+    Latencies of calls that passed ServiceTokenPermission also feed the
+    rolling stats served at /internal/stats/.
     """
+    async def __acall__(self, request):
+        # Both hooks only log and update in-memory stats, so under ASGI they
+        # run on the event loop rather than each taking a trip to a worker thread
+        response = self.process_request(request)
+        response = response or await self.get_response(request)
+        return self.process_response(request, response)
+
     def process_request(self, request):
         # Only log internal API calls
         if request.path.startswith('/internal/'):
-            request._service_call_start_time = time.time()
+            request._service_call_start_time = time.perf_counter()
             
             # Log service call details
             service_id = request.headers.get('X-Service-ID', 'unknown')
             client_ip = self._get_client_ip(request)
             
-            logger.info(f"Internal API call: {request.method} {request.path} "
-                       f"from service={service_id} ip={client_ip}")
+            logger.info(
+                "Internal API call: %s %s from service=%s ip=%s",
+                request.method, request.path, service_id, client_ip,
+                extra={'service_id': service_id, 'client_ip': client_ip}
+            )
     
     def process_response(self, request, response):
         # Log response time for internal API calls
         if hasattr(request, '_service_call_start_time'):
-            duration = time.time() - request._service_call_start_time
+            duration = time.perf_counter() - request._service_call_start_time
             service_id = request.headers.get('X-Service-ID', 'unknown')
+            # Keyed by the verified id only: unsigned callers could otherwise
+            # fill every series slot with made-up service ids
+            verified_service_id = getattr(request, 'verified_service_id', None)
+            if verified_service_id is not None:
+                latency_stats.stats.record(
+                    verified_service_id, metrics.route_of(request), duration, response.status_code
+                )
             
-            logger.info(f"Internal API response: {response.status_code} "
-                       f"for service={service_id} duration={duration:.3f}s")
+            logger.info(
+                "Internal API response: %s for service=%s duration=%.3fs",
+                response.status_code, service_id, duration,
+                extra={'service_id': service_id, 'status': response.status_code, 'duration': duration}
+            )
         
         return response
     
@@ -38,4 +67,209 @@ class ServiceLoggingMiddleware(MiddlewareMixin):
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Enables replica reads for views that declare `replica_reads = True`.
+    After a write, a short-lived cookie pins the client's reads to the
+    primary so it reads its own writes.
+    """
+    PIN_COOKIE = 'db_primary_pin'
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def process_request(self, request):
+        routers.reset_routing_state()
+        pinned_until = request.COOKIES.get(self.PIN_COOKIE)
+        try:
+            if pinned_until and float(pinned_until) > time.time():
+                routers.pin_to_primary()
+        except ValueError:
+            pass
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if request.method in self.SAFE_METHODS and getattr(view_class, 'replica_reads', False):
+            routers.enable_replica_reads()
+
+    def process_response(self, request, response):
+        if routers.wrote_in_request() and settings.REPLICA_PIN_SECONDS:
+            response.set_cookie(
+                self.PIN_COOKIE,
+                str(time.time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        routers.reset_routing_state()
+        return response
+
+
+class ShardRoutingMiddleware(MiddlewareMixin):
+    """
+    Scopes queries on sharded models to the shard of the org in the URL
+    (the `org_id` view kwarg). Unknown orgs are left unscoped so the
+    views' existence checks answer 404.
+    """
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        org_id = view_kwargs.get('org_id')
+        if org_id is None or not sharding.sharding_enabled():
+            return None
+        shard = sharding.db_for_org(org_id)
+        if shard is not None:
+            request._shard_token = sharding.activate_shard(shard)
+        return None
+
+    def process_response(self, request, response):
+        token = getattr(request, '_shard_token', None)
+        if token is not None:
+            sharding.deactivate_shard(token)
+        return response
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    Counts queries and DB time per request, reports them as response headers
+    and checks them against the view's @query_budget. Over-budget requests
+    raise in tests (QUERY_BUDGET_ENFORCE) and are logged otherwise.
+    """
+    def process_request(self, request):
+        request._query_counter = QueryCounter().start()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = budget_for(view_func, request.method, sharded=sharding.sharding_enabled())
+
+    def process_response(self, request, response):
+        counter = getattr(request, '_query_counter', None)
+        if counter is None:
+            return response
+        counter.stop()
+
+        if settings.QUERY_BUDGET_HEADERS:
+            response['X-DB-Query-Count'] = str(counter.count)
+            response['X-DB-Time-Ms'] = f"{counter.duration * 1000:.1f}"
+        logger.debug(
+            "%s %s: %s queries in %.1fms", request.method, request.path, counter.count, counter.duration * 1000
+        )
+
+        budget = getattr(request, '_query_budget', None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f"{request.method} {request.path} ran {counter.count} queries, "
+                f"over its budget of {budget}"
+            )
+            if settings.QUERY_BUDGET_ENFORCE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class SlowQueryMiddleware(MiddlewareMixin):
+    """
+    Logs the request's slow queries, tagged with the view that ran them
+    """
+    def process_request(self, request):
+        request._slow_query_log = SlowQueryLog().start()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._slow_query_log.view = view_name(view_func)
+
+    def process_response(self, request, response):
+        slow_query_log = getattr(request, '_slow_query_log', None)
+        if slow_query_log is not None:
+            slow_query_log.stop()
+        return response
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Records request latency, in-flight requests and, from
+    QueryBudgetMiddleware's counter, per-request query counts and DB time.
+    Must come before QueryBudgetMiddleware so the counter has stopped.
+    """
+    def process_request(self, request):
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        request._metrics_start_time = time.perf_counter()
+
+    def process_response(self, request, response):
+        start_time = getattr(request, '_metrics_start_time', None)
+        if start_time is None:
+            return response
+        metrics.REQUESTS_IN_FLIGHT.dec()
+
+        route = metrics.route_of(request)
+        metrics.REQUEST_LATENCY.labels(route, metrics.method_of(request), response.status_code).observe(
+            time.perf_counter() - start_time
+        )
+        counter = getattr(request, '_query_counter', None)
+        if counter is not None:
+            metrics.REQUEST_DB_QUERIES.labels(route).observe(counter.count)
+            metrics.REQUEST_DB_TIME.labels(route).observe(counter.duration)
+        return response
+
+
+class TracingMiddleware(MiddlewareMixin):
+    """
+    Opens the request's server span, continuing the caller's W3C traceparent,
+    and for sampled requests records each query as a child span
+    """
+    def process_request(self, request):
+        span = tracing.start_trace(
+            request.method, request.headers.get(tracing.TRACEPARENT_HEADER),
+            **{'http.method': request.method}
+        )
+        request._trace_span = span
+        request._trace_token = tracing.activate(span)
+        if span.sampled:
+            request._trace_queries = ExitStack()
+            for alias in connections:
+                request._trace_queries.enter_context(connections[alias].execute_wrapper(tracing.trace_queries))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = metrics.route_of(request)
+        request._trace_span.name = f"{request.method} {route}"
+        request._trace_span.attributes['http.route'] = route
+
+    def process_response(self, request, response):
+        span = getattr(request, '_trace_span', None)
+        if span is None:
+            return response
+        trace_queries = getattr(request, '_trace_queries', None)
+        if trace_queries is not None:
+            trace_queries.close()
+
+        span.attributes['http.status_code'] = response.status_code
+        if response.status_code >= 500:
+            span.status = 'error'
+        span.end()
+        tracing.deactivate(request._trace_token)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Runs requests carrying a signed X-Profile header (see
+    profiling.sign_profile_request), or a PROFILING_SAMPLE_RATE share of all
+    requests, under the profiler. Other requests pass straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if profiling.should_profile(request):
+            return profiling.profile_request(request, self.get_response)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if profiling.should_profile(request):
+            return await profiling.aprofile_request(request, self.get_response)
+        return await self.get_response(request)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='orguser',
+            name='org_users_org_id_b42956_idx',
+        ),
+        migrations.AddIndex(
+            model_name='orguser',
+            index=models.Index(fields=['org', 'role', 'created_at', 'id'], name='org_users_org_id_ccf6ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orguser',
+            index=models.Index(fields=['org', 'created_at', 'id'], name='org_users_org_id_c6d874_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgUserSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255)),
+                ('org', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='organizations.organization')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='organizations.orguser')),
+            ],
+            options={
+                'db_table': 'org_user_search_terms',
+                'indexes': [models.Index(fields=['org', 'term'], name='org_user_search_prefix_idx', opclasses=['', 'varchar_pattern_ops'])],
+            },
+        ),
+    ]
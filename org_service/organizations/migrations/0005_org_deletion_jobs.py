@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:22
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0004_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('deleting', 'Deleting')], default='active', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='OrgDeletionJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('org_id', models.UUIDField(db_index=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('batch_size', models.PositiveIntegerField(default=1000)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('deleted_users', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'org_deletion_jobs',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='org_deletio_status_95e2f0_idx')],
+            },
+        ),
+    ]
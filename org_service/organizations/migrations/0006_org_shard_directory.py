@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0005_org_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgShard',
+            fields=[
+                ('org_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('shard', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'org_shards',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserEmailDirectory',
+            fields=[
+                ('email', models.EmailField(max_length=254, primary_key=True, serialize=False)),
+                ('user_id', models.UUIDField()),
+                ('org_id', models.UUIDField(db_index=True)),
+                ('shard', models.CharField(max_length=100)),
+            ],
+            options={
+                'db_table': 'user_email_directory',
+            },
+        ),
+        migrations.AlterField(
+            model_name='organization',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('deleting', 'Deleting'), ('moving', 'Moving')], default='active', max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 08:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0006_org_shard_directory'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='orguser',
+            name='org_users_email_f874f4_idx',
+        ),
+        migrations.AlterField(
+            model_name='orguser',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='orguser',
+            name='org',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='users', to='organizations.organization'),
+        ),
+    ]
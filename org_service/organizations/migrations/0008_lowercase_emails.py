@@ -0,0 +1,55 @@
+from django.db import IntegrityError, migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Lower-case legacy mixed-case emails ahead of the Lower(email) unique index.
+
+    Rows are walked in primary-key order and each batch commits on its own,
+    so the table is never rewritten or locked as a whole and an interrupted
+    run can simply be repeated.
+    """
+    OrgUser = apps.get_model('organizations', 'OrgUser')
+    db = schema_editor.connection.alias
+    users = OrgUser.objects.using(db).order_by('pk')
+
+    last_pk = None
+    while True:
+        batch = users if last_pk is None else users.filter(pk__gt=last_pk)
+        batch = list(batch.values_list('pk', 'email')[:BATCH_SIZE])
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+
+        with transaction.atomic(using=db):
+            for pk, email in batch:
+                if email == email.lower():
+                    continue
+                try:
+                    with transaction.atomic(using=db):
+                        OrgUser.objects.using(db).filter(pk=pk).update(email=email.lower())
+                except IntegrityError:
+                    raise RuntimeError(
+                        f"Cannot lower-case {email!r}: another org user already uses it. "
+                        f"Merge or rename the duplicate accounts, then re-run the migration."
+                    )
+
+
+class Migration(migrations.Migration):
+    # Each batch commits separately instead of one long migration transaction
+    atomic = False
+
+    dependencies = [
+        ('organizations', '0007_consolidate_org_user_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            lowercase_emails,
+            migrations.RunPython.noop,
+            # Lets the shard router run the backfill on every shard holding org_users
+            hints={'model_name': 'orguser'},
+        ),
+    ]
@@ -1,10 +1,21 @@
 import uuid
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Lower
 
 class Organization(models.Model):
+    STATUS_ACTIVE = 'active'
+    STATUS_DELETING = 'deleting'
+    STATUS_MOVING = 'moving'
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, 'Active'),
+        (STATUS_DELETING, 'Deleting'),
+        (STATUS_MOVING, 'Moving'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -18,6 +29,13 @@ class Organization(models.Model):
     def __str__(self):
         return self.name
 
+class OrgUserQuerySet(models.QuerySet):
+    def by_email(self, email):
+        """
+        Case-insensitive email match served by the Lower(email) unique index
+        """
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.strip().lower())
+
 class OrgUser(models.Model):
     ROLE_CHOICES = [
         ('admin', 'Administrator'),
@@ -26,21 +44,27 @@ class OrgUser(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    email = models.EmailField(unique=True, db_index=True)
+    # Uniqueness (and the lookup index) come from unique_email_org_user below;
+    # look users up with OrgUser.objects.by_email()
+    email = models.EmailField()
     name = models.CharField(max_length=255)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='member')
-    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='users')
+    # The (org, ...) composite indexes already serve lookups by org
+    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='users', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrgUserQuerySet.as_manager()
+
     class Meta:
         db_table = 'org_users'
         constraints = [
-            models.UniqueConstraint(fields=['email'], name='unique_email_org_user')
+            models.UniqueConstraint(Lower('email'), name='unique_email_org_user')
         ]
         indexes = [
-            models.Index(fields=['email']),
-            models.Index(fields=['org', 'role']),
+            # Keyset pagination walks (org, [role,] created_at, id) in index order
+            models.Index(fields=['org', 'role', 'created_at', 'id']),
+            models.Index(fields=['org', 'created_at', 'id']),
             models.Index(fields=['created_at']),
         ]
 
@@ -49,4 +73,124 @@ class OrgUser(models.Model):
             raise ValidationError({'role': 'Invalid role choice'})
 
     def __str__(self):
-        return f"{self.email} ({self.org.name})"
\ No newline at end of file
+        return f"{self.email} ({self.org.name})"
+
+class OrgUserSearchTerm(models.Model):
+    """
+    Prefix search index: one row per normalized email / name token of a user
+    """
+    org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+', db_index=False)
+    user = models.ForeignKey(OrgUser, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = 'org_user_search_terms'
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL serve LIKE 'prefix%' from
+            # the index; other backends ignore opclasses.
+            models.Index(
+                fields=['org', 'term'],
+                name='org_user_search_prefix_idx',
+                opclasses=['', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return self.term
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a request sent with an Idempotency-Key header.
+    A row without status_code marks an attempt that is still in flight.
+    """
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_scope_key')
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+class OrgDeletionJob(models.Model):
+    """
+    Progress of an asynchronous, batched organization deletion.
+    org_id is a plain column: the job outlives the organization row.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    org_id = models.UUIDField(db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    batch_size = models.PositiveIntegerField(default=1000)
+    total_users = models.PositiveIntegerField(default=0)
+    deleted_users = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'org_deletion_jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Deletion of {self.org_id} ({self.status})"
+
+class OrgShard(models.Model):
+    """
+    Directory of which shard holds an organization (default database only)
+    """
+    org_id = models.UUIDField(primary_key=True)
+    shard = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'org_shards'
+
+    def __str__(self):
+        return f"{self.org_id} -> {self.shard}"
+
+class UserEmailDirectory(models.Model):
+    """
+    Global email -> shard directory (default database only).
+    Its primary key also enforces email uniqueness across shards.
+    """
+    email = models.EmailField(primary_key=True)
+    user_id = models.UUIDField()
+    org_id = models.UUIDField(db_index=True)
+    shard = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'user_email_directory'
+
+    def __str__(self):
+        return f"{self.email} -> {self.shard}"
@@ -45,4 +45,16 @@ class ServiceTokenPermission(BasePermission):
             hashlib.sha256
         ).hexdigest()
         
-        return hmac.compare_digest(signature, expected_signature)
\ No newline at end of file
+        if not hmac.compare_digest(signature, expected_signature):
+            return False
+        
+        # The signature covers X-Service-ID; record it for ServiceLoggingMiddleware
+        getattr(request, '_request', request).verified_service_id = service_id
+        return True
+
+    async def ahas_permission(self, request, view):
+        """
+        has_permission for async views: the check only reads headers and the
+        body and computes an HMAC, so it runs as is on the event loop
+        """
+        return self.has_permission(request, view)
@@ -0,0 +1,108 @@
+import random
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-request routing state, set by ReplicaRoutingMiddleware
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+# alias -> (checked_at monotonic, lag seconds); shared by the threads of a process
+_lag_cache = {}
+
+POSTGRES_LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def enable_replica_reads():
+    return _replica_reads.set(True)
+
+
+def pin_to_primary():
+    return _pinned_to_primary.set(True)
+
+
+def wrote_in_request():
+    return _wrote.get()
+
+
+def reset_routing_state():
+    _replica_reads.set(False)
+    _pinned_to_primary.set(False)
+    _wrote.set(False)
+
+
+def replica_lag(alias):
+    """
+    Replication lag of a replica in seconds (cached); inf when it cannot be measured
+    """
+    now = time.monotonic()
+    cached = _lag_cache.get(alias)
+    if cached and now - cached[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return cached[1]
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(POSTGRES_LAG_SQL)
+                lag = float(cursor.fetchone()[0])
+        else:
+            # No replication to measure (e.g. test mirrors)
+            lag = 0.0
+    except Exception as e:
+        logger.warning(f"Could not measure lag of replica {alias}: {str(e)}")
+        lag = float('inf')
+
+    _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas():
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if replica_lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS
+    ]
+
+
+class ReplicaRouter:
+    """
+    Sends reads of replica-enabled views to a replica; everything else uses the primary.
+
+    Reads fall back to the primary when the request (or, via the pin cookie,
+    the client session) wrote recently, or when no replica is within
+    REPLICA_MAX_LAG_SECONDS.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not _replica_reads.get() or _pinned_to_primary.get():
+            return None
+        replicas = healthy_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Read-your-writes: everything after a write in this request hits the primary
+        _wrote.set(True)
+        _pinned_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,10 +1,13 @@
 from rest_framework import serializers
-from organizations.models.models import Organization, OrgUser
+from organizations.models.models import Organization, OrgUser, OrgDeletionJob
 
 class UserCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrgUser
         fields = ['email', 'name', 'role']
+        # Uniqueness is enforced by the unique_email_org_user constraint at
+        # insert time; a validator here would cost an extra query per create.
+        extra_kwargs = {'email': {'validators': []}}
 
     def validate_email(self, value):
         if not value:
@@ -22,7 +25,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return value
 
 class UserResponseSerializer(serializers.ModelSerializer):
-    org_id = serializers.CharField(source='org.id')
+    org_id = serializers.CharField()
     user_id = serializers.CharField(source='id')
 
     class Meta:
@@ -31,8 +34,57 @@ class UserResponseSerializer(serializers.ModelSerializer):
 
 class InternalUserSerializer(serializers.ModelSerializer):
     user_id = serializers.CharField(source='id')
-    org_id = serializers.CharField(source='org.id')
+    # The FK column: 'org.id' would load the organization with a second query
+    org_id = serializers.CharField()
 
     class Meta:
         model = OrgUser
-        fields = ['user_id', 'org_id', 'role']
\ No newline at end of file
+        fields = ['user_id', 'org_id', 'role']
+
+class UserListSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the paginated user listing; supports a `fields` subset
+    """
+    user_id = serializers.CharField(source='id')
+    org_id = serializers.CharField()
+
+    # Public field name -> model columns it needs loaded
+    FIELD_COLUMNS = {
+        'user_id': ['id'],
+        'email': ['email'],
+        'name': ['name'],
+        'role': ['role'],
+        'org_id': ['org_id'],
+        'created_at': ['created_at'],
+        'updated_at': ['updated_at'],
+    }
+
+    class Meta:
+        model = OrgUser
+        fields = ['user_id', 'email', 'name', 'role', 'org_id', 'created_at', 'updated_at']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class OrgDeletionJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.CharField(source='id')
+    org_id = serializers.CharField()
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrgDeletionJob
+        fields = [
+            'job_id', 'org_id', 'status', 'total_users', 'deleted_users', 'progress',
+            'error', 'created_at', 'started_at', 'completed_at'
+        ]
+
+    def get_progress(self, obj):
+        if obj.status == OrgDeletionJob.STATUS_COMPLETED:
+            return 1.0
+        if not obj.total_users:
+            return 0.0
+        return round(min(obj.deleted_users / obj.total_users, 1.0), 4)
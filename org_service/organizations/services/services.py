@@ -0,0 +1,551 @@
+import time
+import unicodedata
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from organizations.models.models import (
+    Organization, OrgUser, OrgUserSearchTerm, OrgDeletionJob, OrgShard, UserEmailDirectory
+)
+from organizations.exceptions.exceptions import DuplicateEmailError
+from organizations import sharding
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OrgUserCreationService:
+    """
+    Creates org users in either locking or optimistic mode
+    """
+    OPTIMISTIC = 'optimistic'
+    LOCKING = 'locking'
+
+    @staticmethod
+    def _org_cache_key(org_id):
+        return f"org-exists:{org_id}"
+
+    @classmethod
+    def organization_exists(cls, org_id):
+        """
+        Existence check for an org, cached so steady-state creates skip the query.
+        Only positive results are cached; a new org is visible immediately.
+        The cache is per process, so other processes may still add users to an
+        org for up to ORG_EXISTS_CACHE_TIMEOUT after its deletion starts; the
+        deletion job sweeps those up before it completes.
+        """
+        key = cls._org_cache_key(org_id)
+        if cache.get(key):
+            return True
+        db = sharding.db_for_org(org_id)
+        if db is None:
+            return False
+        with sharding.use_shard(db):
+            exists = Organization.objects.filter(
+                id=org_id, status=Organization.STATUS_ACTIVE
+            ).exists()
+        if exists:
+            cache.set(key, True, settings.ORG_EXISTS_CACHE_TIMEOUT)
+        return exists
+
+    @classmethod
+    def forget_organization(cls, org_id):
+        cache.delete(cls._org_cache_key(org_id))
+
+    @classmethod
+    def create_user(cls, org_id, validated_data, mode=None):
+        """
+        Create an OrgUser; returns None when the org does not exist.
+
+        Optimistic mode inserts directly and lets the unique constraint on
+        email reject duplicates (IntegrityError). Locking mode keeps the
+        original lock-then-check-then-insert sequence. With sharding the
+        email is first claimed in the global directory, which rejects
+        duplicates held by other shards.
+        """
+        mode = mode or settings.ORG_USER_CREATE_MODE
+        db = sharding.db_for_org(org_id)
+        if db is None:
+            return None
+        with sharding.use_shard(db):
+            if mode == cls.LOCKING:
+                return cls._create_locking(org_id, validated_data, db)
+
+            if not cls.organization_exists(org_id):
+                return None
+            user_id = uuid.uuid4()
+            with sharding.reserve_email(validated_data['email'], user_id, org_id, db), \
+                    transaction.atomic(using=db):
+                return OrgUser.objects.create(id=user_id, org_id=org_id, **validated_data)
+
+    @staticmethod
+    def _create_locking(org_id, validated_data, db=DEFAULT_DB_ALIAS):
+        org = Organization.objects.filter(id=org_id, status=Organization.STATUS_ACTIVE).first()
+        if org is None:
+            return None
+        user_id = uuid.uuid4()
+        with sharding.reserve_email(validated_data['email'], user_id, org_id, db), \
+                transaction.atomic(using=db):
+            # Check for email uniqueness with row-level locking
+            if OrgUser.objects.select_for_update().by_email(validated_data['email']).exists():
+                raise DuplicateEmailError(validated_data['email'])
+            return OrgUser.objects.create(id=user_id, org=org, **validated_data)
+
+
+class UserSearchIndexService:
+    """
+    Maintains and queries the org user prefix search index
+    """
+    max_term_length = 255
+    # Upper bound used to turn a prefix into a [prefix, prefix + MAX) range
+    _range_sentinel = chr(0x10FFFF)
+
+    @staticmethod
+    def normalize(value):
+        """
+        Case-fold and strip accents so 'Zoë' and 'zoe' index identically
+        """
+        decomposed = unicodedata.normalize('NFKD', value or '')
+        stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+        return ' '.join(stripped.casefold().split())
+
+    @classmethod
+    def terms_for(cls, email, name):
+        """
+        Searchable terms of a user: the email plus the full name and each name word
+        """
+        terms = []
+        email_term = cls.normalize(email)
+        name_term = cls.normalize(name)
+        for term in [email_term, name_term, *name_term.split(' ')]:
+            term = term[:cls.max_term_length]
+            if term and term not in terms:
+                terms.append(term)
+        return terms
+
+    @classmethod
+    def build_entries(cls, user):
+        return [
+            OrgUserSearchTerm(org_id=user.org_id, user_id=user.id, term=term)
+            for term in cls.terms_for(user.email, user.name)
+        ]
+
+    @classmethod
+    def index_user(cls, user, created=False, using=None):
+        """
+        Write the index entries for a single user, replacing stale ones on update
+        """
+        terms = OrgUserSearchTerm.objects.using(using)
+        with transaction.atomic(using=using):
+            if not created:
+                terms.filter(user_id=user.id).delete()
+            terms.bulk_create(cls.build_entries(user))
+
+    @classmethod
+    def index_users(cls, users, batch_size=1000):
+        """
+        Index users that have no entries yet (e.g. rows written with bulk_create)
+        """
+        entries = [entry for user in users for entry in cls.build_entries(user)]
+        OrgUserSearchTerm.objects.bulk_create(entries, batch_size=batch_size)
+        return len(entries)
+
+    @classmethod
+    def prefix_filter(cls, queryset, prefix):
+        """
+        Restrict `queryset` to terms starting with `prefix` in an index-friendly way
+        """
+        if connections[queryset.db].vendor == 'sqlite':
+            # SQLite cannot use an index for LIKE ... ESCAPE, but a range
+            # over the binary-collated column is a plain B-tree seek.
+            return queryset.filter(term__gte=prefix, term__lt=prefix + cls._range_sentinel)
+        return queryset.filter(term__startswith=prefix)
+
+    @classmethod
+    def search(cls, org_id, query, limit=10):
+        """
+        Return up to `limit` users of the org whose email or name starts with `query`
+        """
+        prefix = cls.normalize(query)
+        db = sharding.db_for_org(org_id)
+        if not prefix or db is None:
+            return []
+
+        with sharding.use_shard(db):
+            return cls._search(org_id, prefix, limit)
+
+    @classmethod
+    def _search(cls, org_id, prefix, limit):
+        terms = cls.prefix_filter(OrgUserSearchTerm.objects.filter(org_id=org_id), prefix)
+        candidate_ids = terms.order_by('term').values_list('user_id', flat=True)
+        # A user can match through several terms, so read the terms in pages
+        # and de-duplicate until `limit` users are found or the terms run out
+        page_size = limit * 4
+        user_ids = []
+        offset = 0
+        while len(user_ids) < limit:
+            page = list(candidate_ids[offset:offset + page_size])
+            for user_id in page:
+                if user_id not in user_ids:
+                    user_ids.append(user_id)
+                    if len(user_ids) == limit:
+                        break
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+        users = OrgUser.objects.only('id', 'email', 'name', 'role', 'org_id').in_bulk(user_ids)
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    @classmethod
+    def rebuild(cls, org_id=None, batch_size=1000):
+        """
+        Rebuild the index from OrgUser rows, optionally for a single org
+        """
+        if org_id is not None:
+            databases = [db for db in [sharding.db_for_org(org_id)] if db is not None]
+        else:
+            databases = settings.DATABASE_SHARDS or [DEFAULT_DB_ALIAS]
+
+        indexed = 0
+        for db in databases:
+            with sharding.use_shard(db):
+                indexed += cls._rebuild(org_id, batch_size)
+
+        logger.info(f"Search index rebuilt for {indexed} users")
+        return indexed
+
+    @classmethod
+    def _rebuild(cls, org_id, batch_size):
+        users = OrgUser.objects.only('id', 'email', 'name', 'org_id').order_by('pk')
+        stale = OrgUserSearchTerm.objects.all()
+        if org_id is not None:
+            users = users.filter(org_id=org_id)
+            stale = stale.filter(org_id=org_id)
+
+        stale.delete()
+        indexed = 0
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                cls.index_users(batch, batch_size)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            cls.index_users(batch, batch_size)
+            indexed += len(batch)
+        return indexed
+
+
+class OrganizationDeletionService:
+    """
+    Deletes organizations in bounded batches instead of one cascading delete
+    """
+
+    @staticmethod
+    def request_deletion(org_id, batch_size=None):
+        """
+        Mark the org as deleting and enqueue a job; returns None if the org is unknown.
+        Repeated requests return the job already in progress.
+        """
+        db = sharding.db_for_org(org_id)
+        if db is None:
+            return None
+        with sharding.use_shard(db), sharding.atomic_with_shard(db):
+            org = Organization.objects.select_for_update().filter(id=org_id).first()
+            if org is None:
+                return None
+
+            job = OrgDeletionJob.objects.filter(
+                org_id=org_id,
+                status__in=[OrgDeletionJob.STATUS_PENDING, OrgDeletionJob.STATUS_RUNNING]
+            ).first()
+            if job is None:
+                org.status = Organization.STATUS_DELETING
+                org.save(update_fields=['status', 'updated_at'])
+                job = OrgDeletionJob.objects.create(
+                    org_id=org_id,
+                    batch_size=batch_size or settings.ORG_DELETION_BATCH_SIZE,
+                    total_users=OrgUser.objects.filter(org_id=org_id).count()
+                )
+
+        # Stop creating users in this org from this process right away
+        OrgUserCreationService.forget_organization(org_id)
+        logger.info(f"Deletion of org {org_id} enqueued as job {job.id}")
+        return job
+
+    @staticmethod
+    def claim(job):
+        """
+        Atomically take ownership of a job; False if another worker got it first
+        """
+        now = timezone.now()
+        claimed = OrgDeletionJob.objects.filter(
+            id=job.id, status=job.status, updated_at=job.updated_at
+        ).update(status=OrgDeletionJob.STATUS_RUNNING, updated_at=now, started_at=job.started_at or now)
+        if claimed:
+            job.refresh_from_db()
+        return bool(claimed)
+
+    @staticmethod
+    def runnable_jobs(stale_after=None, include_failed=False):
+        """
+        Pending jobs, plus running jobs whose worker stopped reporting progress
+        """
+        if stale_after is None:
+            stale_after = settings.ORG_DELETION_STALE_AFTER
+        stale_before = timezone.now() - timedelta(seconds=stale_after)
+        runnable = (
+            Q(status=OrgDeletionJob.STATUS_PENDING)
+            | Q(status=OrgDeletionJob.STATUS_RUNNING, updated_at__lt=stale_before)
+        )
+        if include_failed:
+            runnable |= Q(status=OrgDeletionJob.STATUS_FAILED)
+        return OrgDeletionJob.objects.filter(runnable).order_by('created_at')
+
+    @staticmethod
+    def delete_user_batch(org_id, batch_size, using=DEFAULT_DB_ALIAS):
+        """
+        Delete one batch of the org's users (and their search terms) with set-based SQL
+        """
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        users_table = quote(OrgUser._meta.db_table)
+        terms_table = quote(OrgUserSearchTerm._meta.db_table)
+        org_param = Organization._meta.pk.get_db_prep_value(org_id, connection)
+        # Walk the (org, created_at, id) index so both statements pick the same rows
+        batch_ids = (
+            f"SELECT id FROM {users_table} WHERE org_id = %s "
+            f"ORDER BY created_at, id LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {terms_table} WHERE user_id IN ({batch_ids})",
+                [org_param, batch_size]
+            )
+            cursor.execute(
+                f"DELETE FROM {users_table} WHERE id IN ({batch_ids})",
+                [org_param, batch_size]
+            )
+            return cursor.rowcount
+
+    @classmethod
+    def _delete_batch(cls, job, using=DEFAULT_DB_ALIAS):
+        # On a shard the progress update commits separately on the default
+        # database; a crash in between only under-reports progress.
+        with sharding.atomic_with_shard(using):
+            deleted = cls.delete_user_batch(job.org_id, job.batch_size, using)
+            if deleted:
+                OrgDeletionJob.objects.filter(id=job.id).update(
+                    deleted_users=F('deleted_users') + deleted,
+                    updated_at=timezone.now()
+                )
+        return deleted
+
+    @classmethod
+    def run(cls, job, max_batches=None):
+        """
+        Delete the org's users batch by batch, then the org itself.
+
+        Each batch is its own short transaction, so memory and lock time per
+        step are bounded by batch_size. Progress is committed with every
+        batch; an interrupted job resumes from whatever rows remain.
+        Returns True once the job has completed.
+        """
+        batches = 0
+        # An org missing from the shard directory has no rows left to delete
+        db = sharding.db_for_org(job.org_id) or DEFAULT_DB_ALIAS
+        try:
+            while max_batches is None or batches < max_batches:
+                if not cls._delete_batch(job, db):
+                    break
+                batches += 1
+            else:
+                job.refresh_from_db()
+                return False
+
+            with sharding.use_shard(db), sharding.atomic_with_shard(db):
+                # Other processes may still trust a cached existence check
+                # (ORG_EXISTS_CACHE_TIMEOUT) and add users after the status
+                # flip. Locking the org row makes their inserts wait for this
+                # transaction, then fail on the foreign key; users they added
+                # before it are swept here, so the cascade below collects nothing
+                list(Organization.objects.select_for_update().filter(id=job.org_id).values_list('id'))
+                swept = 0
+                while True:
+                    deleted = cls.delete_user_batch(job.org_id, job.batch_size, db)
+                    if not deleted:
+                        break
+                    swept += deleted
+                if swept:
+                    logger.info(f"Deletion job {job.id} swept {swept} users created during the job")
+                    OrgDeletionJob.objects.filter(id=job.id).update(deleted_users=F('deleted_users') + swept)
+                Organization.objects.filter(id=job.org_id).delete()
+                sharding.release_organization(job.org_id)
+                OrgDeletionJob.objects.filter(id=job.id).update(
+                    status=OrgDeletionJob.STATUS_COMPLETED,
+                    completed_at=timezone.now(),
+                    updated_at=timezone.now()
+                )
+        except Exception as e:
+            logger.error(f"Deletion job {job.id} for org {job.org_id} failed: {str(e)}")
+            OrgDeletionJob.objects.filter(id=job.id).update(
+                status=OrgDeletionJob.STATUS_FAILED,
+                error=str(e),
+                updated_at=timezone.now()
+            )
+            job.refresh_from_db()
+            return False
+
+        job.refresh_from_db()
+        logger.info(f"Deletion job {job.id} completed: {job.deleted_users} users removed")
+        return True
+
+
+class ShardRebalanceService:
+    """
+    Moves organizations between shards and plans moves that even out shard sizes
+    """
+
+    @staticmethod
+    def shard_sizes():
+        """
+        Number of users per shard, read from the email directory; users
+        backfilled onto the default database are counted under 'default'
+        """
+        sizes = {alias: 0 for alias in settings.DATABASE_SHARDS}
+        for row in UserEmailDirectory.objects.values('shard').annotate(users=Count('email')):
+            sizes[row['shard']] = row['users']
+        return sizes
+
+    @classmethod
+    def plan(cls, max_moves=10):
+        """
+        Greedy plan of (org_id, source, target, users) moves from the largest
+        to the smallest shard, each chosen to bring the pair closest to even.
+        Orgs backfilled onto the default database are moved off it first,
+        largest first, each to the then smallest shard.
+        """
+        sizes = cls.shard_sizes()
+        if not settings.DATABASE_SHARDS:
+            return []
+        orgs = list(
+            UserEmailDirectory.objects.values('org_id', 'shard').annotate(users=Count('email'))
+        )
+
+        moves = []
+        while len(moves) < max_moves:
+            target = min(settings.DATABASE_SHARDS, key=sizes.get)
+            if sizes.get(DEFAULT_DB_ALIAS):
+                source = DEFAULT_DB_ALIAS
+                candidates = [org for org in orgs if org['shard'] == source]
+                org = max(candidates, key=lambda candidate: candidate['users'])
+            else:
+                source = max(sizes, key=sizes.get)
+                gap = sizes[source] - sizes[target]
+                # Moving n users changes the gap to |gap - 2n|: only n < gap helps
+                candidates = [org for org in orgs if org['shard'] == source and 0 < org['users'] < gap]
+                if not candidates:
+                    break
+                org = min(candidates, key=lambda candidate: abs(gap - 2 * candidate['users']))
+            orgs.remove(org)
+            sizes[source] -= org['users']
+            sizes[target] += org['users']
+            moves.append((org['org_id'], source, target, org['users']))
+        return moves
+
+    @staticmethod
+    def _copy_users(users, target):
+        stamps = [(user.created_at, user.updated_at) for user in users]
+        OrgUser.objects.using(target).bulk_create(users)
+        # bulk_create stamps auto_now(_add) fields with the current time; keyset
+        # pagination depends on the original created_at order, so put them back
+        for user, (created_at, updated_at) in zip(users, stamps):
+            user.created_at, user.updated_at = created_at, updated_at
+        OrgUser.objects.using(target).bulk_update(users, ['created_at', 'updated_at'])
+        OrgUserSearchTerm.objects.using(target).bulk_create(
+            [entry for user in users for entry in UserSearchIndexService.build_entries(user)]
+        )
+
+    @classmethod
+    def _purge(cls, db, org_id, batch_size):
+        while True:
+            with transaction.atomic(using=db):
+                if not OrganizationDeletionService.delete_user_batch(org_id, batch_size, db):
+                    break
+        Organization.objects.using(db).filter(id=org_id).delete()
+
+    @classmethod
+    def move_organization(cls, org_id, target, batch_size=1000, settle=0):
+        """
+        Copy an organization with its users and search terms to `target`,
+        switch the directories over, then delete the source rows.
+
+        The org is marked 'moving' for the duration, which stops user
+        creation once cached existence checks expire; `settle` seconds are
+        waited after marking and after the switch so other processes drop
+        their cached existence and shard entries. The copy starts from a
+        clean target, so an interrupted move can simply be run again.
+        Returns the number of users moved, or None for an unknown org.
+        """
+        if target not in settings.DATABASE_SHARDS:
+            raise ValueError(f"Unknown shard: {target}")
+        source = sharding.db_for_org(org_id)
+        if source is None:
+            return None
+        if source == target:
+            return 0
+
+        org = Organization.objects.using(source).get(id=org_id)
+        if org.status not in (Organization.STATUS_ACTIVE, Organization.STATUS_MOVING):
+            raise ValueError(f"Organization {org_id} is {org.status} and cannot be moved")
+        Organization.objects.using(source).filter(id=org_id).update(status=Organization.STATUS_MOVING)
+        OrgUserCreationService.forget_organization(org_id)
+        time.sleep(settle)
+
+        try:
+            cls._purge(target, org_id, batch_size)
+            # bulk_create skips the directory signal; the timestamps it
+            # resets are restored with update()
+            Organization.objects.using(target).bulk_create([org])
+            Organization.objects.using(target).filter(id=org_id).update(
+                created_at=org.created_at, updated_at=org.updated_at
+            )
+
+            moved = 0
+            users = OrgUser.objects.using(source).filter(org_id=org_id).order_by('created_at', 'id')
+            batch = []
+            for user in users.iterator(chunk_size=batch_size):
+                batch.append(user)
+                if len(batch) >= batch_size:
+                    cls._copy_users(batch, target)
+                    moved += len(batch)
+                    batch = []
+            if batch:
+                cls._copy_users(batch, target)
+                moved += len(batch)
+
+            with transaction.atomic():
+                OrgShard.objects.update_or_create(org_id=org_id, defaults={'shard': target})
+                UserEmailDirectory.objects.filter(org_id=org_id).update(shard=target)
+            sharding.forget_org_shard(org_id)
+            Organization.objects.using(target).filter(id=org_id).update(status=Organization.STATUS_ACTIVE)
+        except Exception:
+            Organization.objects.using(source).filter(id=org_id).update(status=Organization.STATUS_ACTIVE)
+            raise
+
+        time.sleep(settle)
+        cls._purge(source, org_id, batch_size)
+        logger.info(f"Moved org {org_id} with {moved} users from {source} to {target}")
+        return moved
+
+def sync_search_index(sender, instance, created, raw=False, using=None, **kwargs):
+    """
+    post_save receiver keeping the search index in step with OrgUser writes
+    """
+    if raw:
+        return
+    UserSearchIndexService.index_user(instance, created=created, using=using)
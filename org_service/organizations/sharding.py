@@ -0,0 +1,270 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from organizations.exceptions.exceptions import DuplicateEmailError
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows live on the shard of their organization
+SHARDED_MODELS = {'organization', 'orguser', 'orgusersearchterm'}
+
+# Shard of the organization the current request / job works on
+_current_shard = ContextVar('current_shard', default=None)
+
+
+def sharding_enabled():
+    return bool(settings.DATABASE_SHARDS)
+
+
+def current_shard():
+    return _current_shard.get()
+
+
+def activate_shard(alias):
+    """
+    Route unqualified queries on sharded models to `alias`; returns a token for deactivate_shard
+    """
+    return _current_shard.set(alias)
+
+
+def deactivate_shard(token):
+    try:
+        _current_shard.reset(token)
+    except ValueError:
+        # Activated by an earlier hook of an async middleware chain (see tracing.deactivate)
+        _current_shard.set(None if token.old_value is Token.MISSING else token.old_value)
+
+
+@contextmanager
+def use_shard(alias):
+    token = activate_shard(alias)
+    try:
+        yield alias
+    finally:
+        deactivate_shard(token)
+
+
+def _org_shard_cache_key(org_id):
+    return f"org-shard:{org_id}"
+
+
+def placement_for(org_id):
+    """
+    Shard a new organization is created on: a stable hash of its id
+    """
+    shards = settings.DATABASE_SHARDS
+    return shards[org_id.int % len(shards)]
+
+
+def db_for_org(org_id):
+    """
+    Database alias holding the organization's rows; None for an unknown org.
+    Without sharding everything lives on the default database.
+    """
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+
+    key = _org_shard_cache_key(org_id)
+    shard = cache.get(key)
+    if shard is None:
+        from organizations.models.models import OrgShard
+        shard = OrgShard.objects.filter(org_id=org_id).values_list('shard', flat=True).first()
+        if shard is not None:
+            cache.set(key, shard, settings.ORG_SHARD_CACHE_TIMEOUT)
+    return shard
+
+
+def create_organization(**fields):
+    """
+    Create an organization on its placement shard (or the default database)
+    """
+    from organizations.models.models import Organization
+    org = Organization(**fields)
+    using = placement_for(org.pk) if sharding_enabled() else DEFAULT_DB_ALIAS
+    org.save(force_insert=True, using=using)
+    return org
+
+
+def forget_org_shard(org_id):
+    cache.delete(_org_shard_cache_key(org_id))
+
+
+def db_for_email(email):
+    """
+    Database alias holding the user with this (lower-cased) email, via the
+    global email directory: a single primary-key lookup regardless of shard count
+    """
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    from organizations.models.models import UserEmailDirectory
+    return UserEmailDirectory.objects.filter(email=email).values_list('shard', flat=True).first()
+
+
+async def adb_for_email(email):
+    """
+    Async db_for_email
+    """
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    from organizations.models.models import UserEmailDirectory
+    return await UserEmailDirectory.objects.filter(email=email).values_list('shard', flat=True).afirst()
+
+
+@contextmanager
+def atomic_with_shard(using):
+    """
+    transaction.atomic() on the default database, plus on `using` when that is a shard
+    """
+    with transaction.atomic():
+        if using == DEFAULT_DB_ALIAS:
+            yield
+        else:
+            with transaction.atomic(using=using):
+                yield
+
+
+@contextmanager
+def reserve_email(email, user_id, org_id, shard):
+    """
+    Claim `email` in the global directory for the user created inside the
+    block; the claim is released if the block fails. Raises
+    DuplicateEmailError when another shard already holds the email.
+    """
+    if not sharding_enabled():
+        yield
+        return
+
+    from organizations.models.models import UserEmailDirectory
+    try:
+        with transaction.atomic():
+            UserEmailDirectory.objects.create(
+                email=email.lower(), user_id=user_id, org_id=org_id, shard=shard
+            )
+    except IntegrityError:
+        raise DuplicateEmailError(email)
+
+    try:
+        yield
+    except BaseException:
+        UserEmailDirectory.objects.filter(email=email.lower(), user_id=user_id).delete()
+        raise
+
+
+def release_organization(org_id):
+    """
+    Drop the directory entries of a deleted organization
+    """
+    if not sharding_enabled():
+        return
+    from organizations.models.models import OrgShard, UserEmailDirectory
+    UserEmailDirectory.objects.filter(org_id=org_id).delete()
+    OrgShard.objects.filter(org_id=org_id).delete()
+    forget_org_shard(org_id)
+
+
+def backfill_directories(batch_size=1000):
+    """
+    Register organizations and users already on the default database in the
+    org and email directories, as living on the default database. Run before
+    sharded processes take traffic: routing only reads the directories, so
+    unregistered rows are not found. Existing entries are left alone, so the
+    backfill can be run again. Returns (organizations, users) registered.
+    """
+    from organizations.models.models import Organization, OrgShard, OrgUser, UserEmailDirectory
+    orgs = Organization.objects.using(DEFAULT_DB_ALIAS).order_by('id').values_list('id', flat=True)
+    registered_orgs = _backfill(
+        orgs, batch_size, lambda org_id: OrgShard(org_id=org_id, shard=DEFAULT_DB_ALIAS)
+    )
+    users = OrgUser.objects.using(DEFAULT_DB_ALIAS).order_by('id').values_list('id', 'email', 'org_id')
+    registered_users = _backfill(
+        users, batch_size,
+        lambda user: UserEmailDirectory(
+            email=user[1].lower(), user_id=user[0], org_id=user[2], shard=DEFAULT_DB_ALIAS
+        )
+    )
+    return registered_orgs, registered_users
+
+
+def _backfill(rows, batch_size, entry_for):
+    registered = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(entry_for(row))
+        if len(batch) >= batch_size:
+            registered += _insert_entries(batch)
+            batch = []
+    return registered + _insert_entries(batch)
+
+
+def _insert_entries(entries):
+    if not entries:
+        return 0
+    model = type(entries[0])
+    pk_name = model._meta.pk.name
+    existing = set(
+        model.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk__in=[entry.pk for entry in entries]).values_list(pk_name, flat=True)
+    )
+    new = [entry for entry in entries if entry.pk not in existing]
+    # Rows a running process registered meanwhile are skipped, not an error
+    model.objects.using(DEFAULT_DB_ALIAS).bulk_create(new, ignore_conflicts=True)
+    return len(new)
+
+
+def register_organization(sender, instance, created, raw=False, using=None, **kwargs):
+    """
+    post_save receiver recording the shard a new organization was written to
+    """
+    if raw or not created or not sharding_enabled():
+        return
+    from organizations.models.models import OrgShard
+    OrgShard.objects.update_or_create(org_id=instance.pk, defaults={'shard': using})
+    forget_org_shard(instance.pk)
+
+
+class ShardRouter:
+    """
+    Routes Organization, OrgUser and OrgUserSearchTerm to the shard of their org.
+
+    The shard comes from, in order: the database an instance was loaded
+    from, the shard selected with use_shard() (set per request by
+    ShardRoutingMiddleware), or, for new rows, the org's directory entry
+    or hash placement. Every other model (directories, idempotency keys,
+    deletion jobs, auth) stays on the default database. With
+    DATABASE_SHARDS empty the router defers to the next one.
+    """
+
+    def _db_for_model(self, model, instance=None):
+        if not sharding_enabled() or model._meta.model_name not in SHARDED_MODELS:
+            return None
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        shard = current_shard()
+        if shard is not None:
+            return shard
+        if instance is not None:
+            org_id = instance.pk if model._meta.model_name == 'organization' else instance.org_id
+            return db_for_org(org_id) or (
+                placement_for(org_id) if model._meta.model_name == 'organization' else None
+            )
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, hints.get('instance'))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not sharding_enabled():
+            return None
+        # Rows only reference rows of the same organization, hence the same shard
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db not in settings.DATABASE_SHARDS:
+            return None
+        return app_label == 'organizations' and model_name in SHARDED_MODELS
@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import json
+import time
+from django.conf import settings
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import path
+from organizations import latency_stats, sharding
+from organizations.models.models import Organization, OrgUser, UserEmailDirectory
+from organizations.views.views import AsyncInternalUserView
+
+urlpatterns = [
+    path('internal/users/<str:email>/', AsyncInternalUserView.as_view(), name='internal-user'),
+]
+
+SHARDS = ['shard_1', 'shard_2']
+
+
+def signed_headers(method, url, service_id='auth-service'):
+    timestamp = str(int(time.time()))
+    payload = f"{method}|{url}||{service_id}|{timestamp}"
+    signature = hmac.new(settings.SERVICE_SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    return {
+        'X-Service-Token': settings.SERVICE_TOKEN,
+        'X-Service-ID': service_id,
+        'X-Timestamp': timestamp,
+        'X-Signature': signature,
+    }
+
+
+class AsyncInternalUserViewTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.user = OrgUser.objects.create(email='test@example.com', name='Test User', role='admin', org=self.org)
+        inactive = Organization.objects.create(name="Inactive", status=Organization.STATUS_DELETING)
+        OrgUser.objects.create(email='inactive@example.com', name='Inactive User', org=inactive)
+
+    def _both(self, method, email, signed=True, accept=None):
+        """
+        The same request answered by InternalUserView and AsyncInternalUserView
+        """
+        url = f'/internal/users/{email}/'
+        headers = signed_headers(method, url) if signed else {}
+        if accept:
+            headers['Accept'] = accept
+        send = getattr(self.client, method.lower())
+        sync_response = send(url, headers=headers)
+        with override_settings(ROOT_URLCONF=__name__):
+            async_response = send(url, headers=headers)
+        return sync_response, async_response
+
+    def assertSameResponse(self, sync_response, async_response):
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        for header in ('Content-Type', 'Allow'):
+            self.assertEqual(async_response.get(header), sync_response.get(header), header)
+
+    def test_responses_match_sync_view(self):
+        """Test both views answer lookups, misses and rejections alike"""
+        cases = [
+            ('GET', 'test@example.com', {}),
+            ('GET', 'TEST@example.com', {}),
+            ('GET', 'missing@example.com', {}),
+            ('GET', 'inactive@example.com', {}),
+            ('GET', 'test@example.com', {'signed': False}),
+            ('GET', 'test@example.com', {'accept': 'text/html'}),
+            ('HEAD', 'test@example.com', {}),
+            ('POST', 'test@example.com', {}),
+        ]
+        for method, email, extra in cases:
+            with self.subTest(method=method, email=email, extra=extra):
+                self.assertSameResponse(*self._both(method, email, **extra))
+
+    def test_found_user(self):
+        """Test the async view returns the user's org info"""
+        _, response = self._both('GET', 'test@example.com')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {'user_id': str(self.user.id), 'org_id': str(self.org.id), 'role': 'admin'}
+        )
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_serves_asgi_requests(self):
+        """Test a lookup through the ASGI handler and the full middleware chain"""
+        latency_stats.stats.reset()
+        url = '/internal/users/test@example.com/'
+
+        response = await AsyncClient().get(url, headers=signed_headers('GET', url))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['user_id'], str(self.user.id))
+        routes = {series['route'] for series in latency_stats.stats.snapshot()['series']}
+        self.assertIn('internal/users/<str:email>/', routes)
+
+
+@override_settings(DATABASE_SHARDS=SHARDS, ROOT_URLCONF=__name__)
+class ShardedAsyncInternalUserViewTest(TestCase):
+    databases = {'default', *SHARDS}
+
+    async def test_reads_user_from_its_shard(self):
+        """Test the async lookup finds the shard through the email directory"""
+        org = await Organization.objects.using('shard_2').acreate(name="Org B")
+        user = await OrgUser.objects.using('shard_2').acreate(email='b@example.com', name='B', org=org)
+        await UserEmailDirectory.objects.acreate(
+            email='b@example.com', user_id=user.id, org_id=org.id, shard='shard_2'
+        )
+        url = '/internal/users/b@example.com/'
+
+        response = await AsyncClient().get(url, headers=signed_headers('GET', url))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['org_id'], str(org.id))
+        self.assertEqual(await sharding.adb_for_email('missing@example.com'), None)
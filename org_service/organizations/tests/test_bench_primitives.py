@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import uuid
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+from organizations.management.commands._bench import measure, compare_timings
+from organizations.management.commands.bench_primitives import BENCHMARKS, ORG_ID, USER_ID
+
+class MeasureTest(SimpleTestCase):
+
+    def test_loops_grow_until_sample_time(self):
+        """Test fast operations are looped until a sample lasts min_sample_time"""
+        calls = []
+
+        timings, loops = measure(lambda: calls.append(1), samples=3, warmup=1, min_sample_time=0.001)
+
+        self.assertEqual(len(timings), 3)
+        self.assertGreater(loops, 1)
+        self.assertTrue(all(timing > 0 for timing in timings))
+
+    def test_compare_timings(self):
+        """Test median changes are reported for benchmarks in both runs only"""
+        baseline = [{'name': 'a', 'median_us': 10.0}, {'name': 'b', 'median_us': 4.0}]
+        results = [{'name': 'a', 'median_us': 12.0}, {'name': 'c', 'median_us': 1.0}]
+
+        self.assertEqual(compare_timings(results, baseline), {'a': 20.0})
+
+
+class BenchPrimitivesCommandTest(SimpleTestCase):
+
+    def test_internal_user_fixture_renders_uuids(self):
+        """Test the serializer benchmark renders UUID ids like real rows"""
+        data = BENCHMARKS['internal_user_serializer.data']()()
+
+        self.assertEqual(data['user_id'], str(USER_ID))
+        self.assertEqual(data['org_id'], str(ORG_ID))
+        self.assertIsInstance(USER_ID, uuid.UUID)
+
+    def test_json_output_and_baseline(self):
+        """Test results are written as JSON and a slower run fails against its baseline"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'results.json')
+            call_command(
+                'bench_primitives', 'service_token.has_permission', samples=2, warmup=0,
+                min_sample_time=0.001, json_path=path, stdout=StringIO()
+            )
+            with open(path) as f:
+                results = json.load(f)
+            self.assertEqual([b['name'] for b in results['benchmarks']], ['service_token.has_permission'])
+            self.assertIn('python', results['environment'])
+
+            # A baseline 1000x faster than reality
+            results['benchmarks'][0]['median_us'] /= 1000
+            with open(path, 'w') as f:
+                json.dump(results, f)
+            with self.assertRaises(CommandError):
+                call_command(
+                    'bench_primitives', 'service_token.has_permission', samples=2, warmup=0,
+                    min_sample_time=0.001, baseline=path, max_regression=50, stdout=StringIO()
+                )
+
+    def test_unknown_benchmark(self):
+        """Test an unknown benchmark name is rejected"""
+        with self.assertRaises(CommandError):
+            call_command('bench_primitives', 'nope', stdout=StringIO())
@@ -0,0 +1,80 @@
+import random
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from organizations import sharding
+from organizations.management.commands.generate_org_data import org_sizes
+from organizations.models.models import (
+    Organization, OrgUser, OrgUserSearchTerm, OrgShard, UserEmailDirectory
+)
+from organizations.services.services import UserSearchIndexService
+from organizations.synthetic import people
+
+SHARDS = ['shard_1', 'shard_2']
+
+class GenerateOrgDataTest(TestCase):
+
+    def _generate(self, **options):
+        call_command('generate_org_data', stdout=StringIO(), **options)
+
+    def test_org_sizes(self):
+        """Test org sizes add up, give every org a user and are skewed"""
+        sizes = org_sizes(random.Random(1), 100, 10000)
+
+        self.assertEqual(sum(sizes), 10000)
+        self.assertGreaterEqual(min(sizes), 1)
+        self.assertGreater(max(sizes), 10 * sorted(sizes)[50])
+
+    def test_generates_users_with_roles_and_search_terms(self):
+        """Test users, their roles and their search terms are generated"""
+        self._generate(orgs=5, users=200, seed=3, batch_size=64)
+
+        self.assertEqual(Organization.objects.count(), 5)
+        self.assertEqual(OrgUser.objects.count(), 200)
+        self.assertEqual(OrgUser.objects.filter(role='admin').values('org').distinct().count(), 5)
+        self.assertTrue(OrgUser.objects.filter(role='member').exists())
+        user = OrgUser.objects.order_by('email').first()
+        self.assertEqual(
+            sorted(OrgUserSearchTerm.objects.filter(user=user).values_list('term', flat=True)),
+            sorted(UserSearchIndexService.terms_for(user.email, user.name))
+        )
+        self.assertEqual(UserSearchIndexService.search(user.org_id, user.email), [user])
+
+    def test_same_seed_same_data(self):
+        """Test the seed fixes ids, emails and org membership"""
+        self._generate(orgs=3, users=50, seed=9)
+        first = sorted(OrgUser.objects.values_list('id', 'email', 'org_id', 'role', 'created_at'))
+        Organization.objects.all().delete()
+
+        self._generate(orgs=3, users=50, seed=9)
+
+        self.assertEqual(sorted(OrgUser.objects.values_list('id', 'email', 'org_id', 'role', 'created_at')), first)
+        self.assertEqual(
+            sorted(email for _, email in people(9, 50)),
+            sorted(OrgUser.objects.values_list('email', flat=True))
+        )
+
+    def test_skip_search_index(self):
+        """Test search terms can be left for rebuild_search_index"""
+        self._generate(orgs=2, users=20, skip_search_index=True)
+
+        self.assertEqual(OrgUser.objects.count(), 20)
+        self.assertFalse(OrgUserSearchTerm.objects.exists())
+
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class GenerateShardedOrgDataTest(TestCase):
+    databases = {'default', *SHARDS}
+
+    def test_rows_land_on_placement_shards(self):
+        """Test orgs and users go to their placement shard and into the directories"""
+        call_command('generate_org_data', orgs=6, users=60, seed=5, stdout=StringIO())
+
+        self.assertEqual(OrgShard.objects.count(), 6)
+        self.assertEqual(UserEmailDirectory.objects.count(), 60)
+        for entry in OrgShard.objects.all():
+            self.assertEqual(entry.shard, sharding.placement_for(entry.org_id))
+            self.assertTrue(Organization.objects.using(entry.shard).filter(id=entry.org_id).exists())
+        entry = UserEmailDirectory.objects.first()
+        self.assertEqual(sharding.db_for_email(entry.email), entry.shard)
+        self.assertTrue(OrgUser.objects.using(entry.shard).filter(id=entry.user_id, email=entry.email).exists())
@@ -0,0 +1,181 @@
+import hashlib
+import json
+from datetime import timedelta
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations.models.models import Organization, OrgUser, IdempotencyKey
+from organizations.idempotency import purge_expired_keys
+
+class IdempotentUserCreateTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.url = reverse('create-user', kwargs={'org_id': self.org.id})
+        self.data = {
+            'email': 'test@example.com',
+            'name': 'Test User',
+            'role': 'member'
+        }
+    
+    def _post(self, data=None, key='retry-key-1'):
+        return self.client.post(
+            self.url,
+            data=json.dumps(data or self.data),
+            content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+    
+    def test_retry_returns_original_response(self):
+        """Test a retried request replays the original 201 body"""
+        first = self._post()
+        second = self._post()
+        
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(OrgUser.objects.filter(email='test@example.com').count(), 1)
+    
+    def test_retry_is_single_lookup(self):
+        """Test a replayed retry costs one query"""
+        self._post()
+        
+        with self.assertNumQueries(1):
+            self._post()
+    
+    def test_key_reused_with_different_body(self):
+        """Test reusing a key for a different request is rejected"""
+        self._post()
+        response = self._post(data={**self.data, 'email': 'other@example.com'})
+        
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertFalse(OrgUser.objects.filter(email='other@example.com').exists())
+    
+    def test_keys_are_scoped_per_org(self):
+        """Test the same key in another org is an independent request"""
+        self._post()
+        other_org = Organization.objects.create(name="Other Organization")
+        response = self.client.post(
+            reverse('create-user', kwargs={'org_id': other_org.id}),
+            data=json.dumps({**self.data, 'email': 'second@example.com'}),
+            content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY='retry-key-1'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+    
+    def test_without_header_is_not_recorded(self):
+        """Test requests without the header bypass the key store"""
+        self.client.post(self.url, data=json.dumps(self.data), content_type='application/json')
+        
+        self.assertFalse(IdempotencyKey.objects.exists())
+    
+    def test_invalid_key(self):
+        """Test overlong keys are rejected"""
+        response = self._post(key='x' * 256)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.2)
+    def test_concurrent_duplicate_times_out_while_in_flight(self):
+        """Test a duplicate of a stuck in-flight attempt gets 409 in progress"""
+        self._create_in_flight_record()
+        
+        response = self._post()
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('in progress', response.data['message'])
+        self.assertFalse(OrgUser.objects.exists())
+    
+    def test_concurrent_duplicate_waits_for_first_attempt(self):
+        """Test a duplicate waits and replays the in-flight attempt's result"""
+        record = self._create_in_flight_record()
+        
+        def finish_first_attempt(_seconds):
+            record.status_code = 201
+            record.response_body = {'message': 'User account created successfully'}
+            record.save()
+        
+        with patch('organizations.idempotency.time.sleep', side_effect=finish_first_attempt):
+            response = self._post()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'message': 'User account created successfully'})
+        self.assertFalse(OrgUser.objects.exists())
+    
+    def test_failed_attempt_releases_key(self):
+        """Test a 5xx outcome is not stored so the retry runs again"""
+        with patch('organizations.views.views.UserCreateSerializer.is_valid', side_effect=RuntimeError):
+            first = self._post()
+        second = self._post()
+        
+        self.assertEqual(first.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+    
+    @override_settings(IDEMPOTENCY_LEASE=30)
+    def test_in_flight_claim_holds_short_lease(self):
+        """Test a claim expires after the lease, not the TTL, while its attempt runs"""
+        leases = []
+
+        def record_lease(*args, **kwargs):
+            leases.append(IdempotencyKey.objects.get().expires_at)
+            raise RuntimeError
+
+        with patch('organizations.views.views.UserCreateSerializer.is_valid', side_effect=record_lease):
+            self._post()
+
+        self.assertLessEqual(leases[0], timezone.now() + timedelta(seconds=30))
+
+    def test_abandoned_claim_is_taken_over(self):
+        """Test a claim whose worker died is taken over once its lease lapses"""
+        self._create_in_flight_record(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self._post()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertTrue(IdempotencyKey.objects.get().is_complete)
+
+    @override_settings(IDEMPOTENCY_LEASE=30, IDEMPOTENCY_KEY_TTL=3600)
+    def test_stored_response_is_kept_for_ttl(self):
+        """Test completing an attempt extends its record from the lease to the full TTL"""
+        self._post()
+
+        self.assertGreater(IdempotencyKey.objects.get().expires_at, timezone.now() + timedelta(minutes=59))
+
+    def test_expired_key_is_reclaimed(self):
+        """Test an expired record does not replay"""
+        self._post()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        OrgUser.objects.all().delete()
+        
+        response = self._post()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+    
+    def test_purge_expired_keys(self):
+        """Test purging removes only expired records"""
+        self._post()
+        self._post(data={**self.data, 'email': 'other@example.com'}, key='retry-key-2')
+        IdempotencyKey.objects.filter(key='retry-key-1').update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        
+        self.assertEqual(purge_expired_keys(batch_size=1), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['retry-key-2'])
+    
+    def _create_in_flight_record(self, expires_at=None):
+        return IdempotencyKey.objects.create(
+            scope=f'create-user:{self.org.id}',
+            key='retry-key-1',
+            request_hash=hashlib.sha256(json.dumps(self.data).encode('utf-8')).hexdigest(),
+            expires_at=expires_at or timezone.now() + timedelta(hours=1)
+        )
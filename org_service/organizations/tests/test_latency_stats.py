@@ -0,0 +1,116 @@
+import hashlib
+import hmac
+import time
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations import latency_stats
+from organizations.latency_stats import LatencyStats, MAX_SERIES
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LatencyStatsTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.clock = FakeClock()
+        self.stats = LatencyStats(clock=self.clock)
+
+    def _series(self):
+        return self.stats.snapshot()['series'][0]
+
+    def test_percentiles_qps_and_error_rate(self):
+        """Test percentiles are within bucket precision and errors are 5xx only"""
+        for ms in range(1, 101):
+            self.stats.record('auth-service', 'internal/users/<str:email>/', ms / 1000, 200)
+        self.stats.record('auth-service', 'internal/users/<str:email>/', 0.05, 404)
+        self.stats.record('auth-service', 'internal/users/<str:email>/', 0.05, 503)
+
+        window = self._series()['1m']
+
+        self.assertEqual(window['count'], 102)
+        self.assertAlmostEqual(window['p50_ms'], 50, delta=50 * 0.05)
+        self.assertAlmostEqual(window['p99_ms'], 99, delta=99 * 0.05)
+        self.assertEqual(window['error_rate'], round(1 / 102, 4))
+        self.assertGreater(window['qps'], 0)
+
+    def test_windows_roll_over(self):
+        """Test calls leave the 1m window first and the 15m window last"""
+        self.stats.record('auth-service', 'stats/', 0.01, 200)
+        self.clock.now += 120
+
+        series = self._series()
+
+        self.assertEqual(series['1m']['count'], 0)
+        self.assertIsNone(series['1m']['p50_ms'])
+        self.assertEqual(series['5m']['count'], 1)
+        self.assertEqual(series['15m']['count'], 1)
+
+        self.clock.now += 900
+        self.assertEqual(self._series()['15m']['count'], 0)
+
+    def test_series_are_capped(self):
+        """Test unbounded service ids cannot grow memory past MAX_SERIES + 1"""
+        for i in range(MAX_SERIES + 10):
+            self.stats.record(f'service-{i}', 'stats/', 0.01, 200)
+
+        series = self.stats.snapshot()['series']
+
+        self.assertEqual(len(series), MAX_SERIES + 1)
+        self.assertIn(('other', 'other'), {(s['service_id'], s['route']) for s in series})
+
+
+class InternalStatsViewTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.url = reverse('internal-stats')
+        latency_stats.stats.reset()
+
+    def _signed_headers(self, path):
+        timestamp = str(int(time.time()))
+        payload = f"GET|{path}||auth-service|{timestamp}"
+        signature = hmac.new(settings.SERVICE_SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        return {
+            'HTTP_X_SERVICE_TOKEN': settings.SERVICE_TOKEN,
+            'HTTP_X_SERVICE_ID': 'auth-service',
+            'HTTP_X_TIMESTAMP': timestamp,
+            'HTTP_X_SIGNATURE': signature,
+        }
+
+    def test_requires_signed_request(self):
+        """Test the stats endpoint rejects unsigned requests"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_rejected_calls_are_not_recorded(self):
+        """Test unsigned calls cannot create series under made-up service ids"""
+        for i in range(3):
+            self.client.get(self.url, HTTP_X_SERVICE_ID=f'spoofed-{i}')
+        headers = self._signed_headers(self.url)
+        headers['HTTP_X_SIGNATURE'] = 'bad'
+        self.client.get(self.url, **headers)
+
+        self.assertEqual(latency_stats.stats.snapshot()['series'], [])
+
+    def test_reports_internal_calls(self):
+        """Test internal calls recorded by the middleware show up per service and route"""
+        self.client.get(self.url, **self._signed_headers(self.url))
+
+        response = self.client.get(self.url, **self._signed_headers(self.url))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        series = {(s['service_id'], s['route']): s for s in response.data['series']}
+        self.assertEqual(series['auth-service', 'internal/stats/']['1m']['count'], 1)
+        self.assertIn('p95_ms', series['auth-service', 'internal/stats/']['15m'])
@@ -0,0 +1,126 @@
+import io
+import json
+import logging
+import sys
+import threading
+from django.test import TestCase
+from organizations.log_handlers import BackgroundHandler, JsonFormatter, SamplingFilter
+
+
+def make_record(name='organizations.test', level=logging.INFO, msg='hello %s', args=('world',), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class BackgroundHandlerTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.stream = io.StringIO()
+        self.handler = BackgroundHandler(stream=self.stream)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(self.handler.close)
+
+    def test_records_are_written_by_listener(self):
+        """Test records reach the target stream via the listener thread"""
+        self.handler.handle(make_record())
+        self.handler.flush()
+
+        self.assertEqual(self.stream.getvalue(), 'hello world\n')
+
+    def test_formatting_happens_off_the_calling_thread(self):
+        """Test lazy arguments are rendered by the listener, not the logging thread"""
+        rendered_on = []
+
+        class Arg:
+            def __str__(self):
+                rendered_on.append(threading.current_thread())
+                return 'arg'
+
+        self.handler.handle(make_record(args=(Arg(),)))
+        self.handler.flush()
+
+        self.assertEqual(len(rendered_on), 1)
+        self.assertIsNot(rendered_on[0], threading.current_thread())
+
+    def test_concurrent_flushes_keep_the_listener_running(self):
+        """Test threads logging and flushing at once all get their records written"""
+        self.handler._ensure_listener()
+        listener = self.handler._listener
+        errors = []
+
+        def log_and_flush(n):
+            try:
+                for i in range(20):
+                    self.handler.handle(make_record(msg=f'{n}-{i}', args=()))
+                    self.handler.flush()
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=log_and_flush, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertIs(self.handler._listener, listener)
+        self.assertEqual(len(self.stream.getvalue().splitlines()), 80)
+
+    def test_full_queue_drops_info_without_blocking(self):
+        """Test a full queue drops low-severity records without blocking"""
+        handler = BackgroundHandler(stream=self.stream, queue_size=1)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        handler._ensure_listener = lambda: None  # nothing drains the queue
+
+        handler.handle(make_record(msg='first'))
+        handler.handle(make_record(msg='dropped'))
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.qsize(), 1)
+
+
+class JsonFormatterTest(TestCase):
+
+    def test_structured_fields(self):
+        """Test records render as JSON with extra fields and trace id"""
+        record = make_record(trace_id='abc', service_id='auth-service')
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry['message'], 'hello world')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'organizations.test')
+        self.assertEqual(entry['trace_id'], 'abc')
+        self.assertEqual(entry['service_id'], 'auth-service')
+
+    def test_exception_is_included(self):
+        """Test exception tracebacks are kept in the record"""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('x', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertIn('ValueError: boom', entry['exception'])
+
+
+class SamplingFilterTest(TestCase):
+
+    def test_rate_applies_to_logger_and_children(self):
+        """Test the closest configured logger's rate applies"""
+        sampling = SamplingFilter({'organizations.middleware': 0, 'organizations.middleware.debug': 1})
+
+        self.assertFalse(sampling.filter(make_record('organizations.middleware.middleware')))
+        self.assertTrue(sampling.filter(make_record('organizations.middleware.debug')))
+        self.assertTrue(sampling.filter(make_record('organizations.views.views')))
+
+    def test_warnings_and_errors_are_always_kept(self):
+        """Test sampling never drops warnings or errors"""
+        sampling = SamplingFilter({'organizations': 0})
+
+        self.assertTrue(sampling.filter(make_record(level=logging.WARNING)))
+        self.assertTrue(sampling.filter(make_record(level=logging.ERROR)))
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations import memory_profiling
+
+# Grows between snapshots so the allocation site shows up in the diffs
+_retained = []
+
+
+def allocate():
+    _retained.append([object() for _ in range(5000)])
+
+
+@patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+class InternalMemoryViewTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.url = reverse('internal-memory')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(MEMORY_DUMP_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(_retained.clear)
+
+    def _start(self):
+        memory_profiling.start(frames=5, interval=0)
+        self.addCleanup(memory_profiling.stop)
+
+    def test_disabled_by_default(self, mock_permission):
+        """Test the endpoint answers 404 unless profiling was started"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_growth_since_baseline(self, mock_permission):
+        """Test allocations made after start are reported as top growth"""
+        self._start()
+        allocate()
+
+        response = self.client.get(self.url, {'limit': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(response.data['traced_kb'], 0)
+        self.assertTrue(any('test_memory_profiling.py' in site['site'] for site in response.data['sites']))
+
+    def test_growth_over_last_interval(self, mock_permission):
+        """Test since=previous compares the last two periodic snapshots"""
+        self._start()
+        memory_profiling.record_snapshot()
+
+        self.assertEqual(self.client.get(self.url, {'since': 'previous'}).status_code, status.HTTP_409_CONFLICT)
+
+        allocate()
+        memory_profiling.record_snapshot()
+        response = self.client.get(self.url, {'since': 'previous', 'key_type': 'traceback'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('test_memory_profiling.py', response.data['sites'][0]['site'])
+        self.assertTrue(response.data['sites'][0]['traceback'])
+
+    def test_invalid_parameters(self, mock_permission):
+        """Test unknown comparison modes are rejected"""
+        self._start()
+
+        response = self.client.get(self.url, {'key_type': 'bogus'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_dump_and_memory_report(self, mock_permission):
+        """Test dumps written via POST can be compared offline"""
+        self._start()
+        first = self.client.post(self.url).data['path']
+        allocate()
+        second = memory_profiling.dump()
+        out = StringIO()
+
+        call_command('memory_report', first, second, top=5, stdout=out)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([os.path.basename(first), os.path.basename(second)]))
+        self.assertIn('top 5 by growth', out.getvalue())
+        self.assertIn('test_memory_profiling.py', out.getvalue())
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations.models.models import Organization, OrgUser
+
+ROUTE = 'internal/users/<str:email>/'
+
+@patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+class MetricsTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        OrgUser.objects.create(email='test@example.com', name='Test User', org=self.org)
+        self.url = reverse('internal-user', kwargs={'email': 'test@example.com'})
+
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_latency_is_labelled_by_route(self, mock_permission):
+        """Test latency is recorded under the URL pattern, not the email-bearing path"""
+        before = self._sample('http_request_duration_seconds_count', route=ROUTE, method='GET', status='200')
+
+        self.client.get(self.url)
+
+        self.assertEqual(
+            self._sample('http_request_duration_seconds_count', route=ROUTE, method='GET', status='200'),
+            before + 1
+        )
+        self.assertEqual(self._sample('http_requests_in_flight'), 0)
+
+    def test_query_counts_are_recorded(self, mock_permission):
+        """Test the per-request query count feeds the query histogram"""
+        before_count = self._sample('http_request_db_queries_count', route=ROUTE)
+        before_sum = self._sample('http_request_db_queries_sum', route=ROUTE)
+
+        self.client.get(self.url)
+
+        self.assertEqual(self._sample('http_request_db_queries_count', route=ROUTE), before_count + 1)
+        self.assertEqual(self._sample('http_request_db_queries_sum', route=ROUTE), before_sum + 1)
+
+    def test_metrics_endpoint(self, mock_permission):
+        """Test /metrics serves the registry in the Prometheus text format"""
+        self.client.get(self.url)
+
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'http_request_duration_seconds_bucket', response.content)
+        self.assertNotIn(b'test@example.com', response.content)
+
+    def test_metrics_endpoint_multiprocess(self, mock_permission):
+        """Test /metrics aggregates worker files when PROMETHEUS_MULTIPROC_DIR is set"""
+        with tempfile.TemporaryDirectory() as directory:
+            with patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                with patch('organizations.metrics.multiprocess.MultiProcessCollector') as collector:
+                    response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        collector.assert_called_once()
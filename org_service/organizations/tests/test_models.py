@@ -1,8 +1,14 @@
+import importlib
 import uuid
+from unittest import skipUnless
+from unittest.mock import patch
+from django.apps import apps
+from django.db import connection, models
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from organizations.models.models import Organization, OrgUser
+from organizations.management.commands.index_report import collect, _redundancy
 
 class OrganizationModelTest(TestCase):
     
@@ -103,4 +109,73 @@ class OrgUserModelTest(TestCase):
         )
         
         expected = f"{self.valid_email} ({self.org.name})"
-        self.assertEqual(str(user), expected)
\ No newline at end of file
+        self.assertEqual(str(user), expected)
+class OrgUserIndexTest(TestCase):
+    
+    def test_no_redundant_indexes(self):
+        """Test org_users carries a single email index and no redundant ones"""
+        report = collect(tables=['org_users'])[0]
+        indexes = {i['name']: i for i in report['indexes']}
+        
+        self.assertTrue(indexes['unique_email_org_user']['unique'])
+        self.assertFalse(any(i['columns'] == ('email',) for i in report['indexes']))
+        self.assertEqual([i for i in report['indexes'] if i['findings']], [])
+    
+    def test_report_flags_duplicates(self):
+        """Test the advisor flags identical and prefix indexes"""
+        unique = {'name': 'u', 'columns': ('email',), 'unique': True, 'primary_key': False}
+        plain = {'name': 'a', 'columns': ('email',), 'unique': False, 'primary_key': False}
+        prefix = {'name': 'p', 'columns': ('org_id',), 'unique': False, 'primary_key': False}
+        wide = {'name': 'w', 'columns': ('org_id', 'created_at'), 'unique': False, 'primary_key': False}
+        indexes = [unique, plain, prefix, wide]
+        
+        self.assertEqual(_redundancy(plain, indexes), 'duplicates u')
+        self.assertEqual(_redundancy(prefix, indexes), 'prefix of w')
+        self.assertIsNone(_redundancy(unique, indexes))
+        self.assertIsNone(_redundancy(wide, indexes))
+
+
+class OrgUserEmailLookupTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name="Test Organization")
+        self.user = OrgUser.objects.create(email="test@example.com", name="Test User", org=self.org)
+    
+    def test_case_variant_email_is_rejected(self):
+        """Test uniqueness ignores the casing of the email"""
+        with self.assertRaises(IntegrityError):
+            OrgUser.objects.create(email="Test@Example.COM", name="Other", org=self.org)
+    
+    def test_by_email_ignores_case(self):
+        """Test by_email finds users whatever the casing on either side"""
+        legacy = OrgUser.objects.create(email="Legacy.User@Example.com", name="Legacy", org=self.org)
+        
+        self.assertEqual(OrgUser.objects.by_email(" TEST@example.com ").get(), self.user)
+        self.assertEqual(OrgUser.objects.by_email("legacy.user@example.com").get(), legacy)
+    
+    def test_by_email_does_not_register_global_transform(self):
+        """Test the Lower(email) match stays local to by_email"""
+        self.assertIsNone(models.EmailField().get_transform('lower'))
+    
+    @skipUnless(connection.vendor == 'sqlite', "asserts on SQLite EXPLAIN QUERY PLAN output")
+    def test_by_email_probes_functional_index(self):
+        """Test the lookup is a single probe of the Lower(email) index"""
+        plan = OrgUser.objects.by_email("test@example.com").explain()
+        
+        self.assertIn('USING INDEX unique_email_org_user', plan)
+        self.assertNotIn('SCAN', plan)
+    
+    def test_backfill_lowercases_emails(self):
+        """Test the backfill migration lower-cases legacy rows in batches"""
+        OrgUser.objects.create(email="Mixed.Case@Example.com", name="Legacy", org=self.org)
+        migration = importlib.import_module('organizations.migrations.0008_lowercase_emails')
+        schema_editor = type('SchemaEditor', (), {'connection': connection})()
+        
+        with patch.object(migration, 'BATCH_SIZE', 1):
+            migration.lowercase_emails(apps, schema_editor)
+        
+        self.assertEqual(
+            sorted(OrgUser.objects.values_list('email', flat=True)),
+            ['mixed.case@example.com', 'test@example.com']
+        )
@@ -0,0 +1,80 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from organizations.models.models import Organization, OrgUser
+from organizations.pagination import KeysetPagination, PaginationError
+
+class KeysetPaginationTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name="Test Organization")
+        OrgUser.objects.bulk_create([
+            OrgUser(
+                email=f'user{i}@example.com',
+                name=f'User {i}',
+                role='member' if i % 2 else 'admin',
+                org=self.org
+            )
+            for i in range(40)
+        ])
+    
+    def _page_plan(self, queryset, page):
+        """Return the EXPLAIN output of the query that fetches `page`"""
+        paginator = KeysetPagination(limit=5)
+        for _ in range(page - 1):
+            paginator.paginate_queryset(queryset)
+            paginator = KeysetPagination(limit=5, cursor=paginator.next_cursor)
+        return paginator.get_page_queryset(queryset).explain()
+    
+    def _assert_constant_cost_plan(self, queryset, index_name):
+        """Deep pages must seek through the index with no sort step"""
+        first_page = self._page_plan(queryset, 1)
+        second_page = self._page_plan(queryset, 2)
+        deep_page = self._page_plan(queryset, 7)
+        
+        for plan in (first_page, second_page, deep_page):
+            self.assertIn(index_name, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertNotIn('SCAN', plan)
+        # Same plan whatever the depth: the cursor only changes parameters
+        self.assertEqual(second_page, deep_page)
+    
+    def _index_name(self, fields):
+        for index in OrgUser._meta.indexes:
+            if index.fields == fields:
+                return index.name
+        self.fail(f"No index on {fields}")
+    
+    @skipUnless(connection.vendor == 'sqlite', "asserts on SQLite EXPLAIN QUERY PLAN output")
+    def test_page_plan_is_depth_independent(self):
+        """Test EXPLAIN shows an index seek without sorting at any depth"""
+        queryset = OrgUser.objects.filter(org_id=self.org.id)
+        self._assert_constant_cost_plan(
+            queryset, self._index_name(['org', 'created_at', 'id'])
+        )
+    
+    @skipUnless(connection.vendor == 'sqlite', "asserts on SQLite EXPLAIN QUERY PLAN output")
+    def test_role_filtered_plan_is_depth_independent(self):
+        """Test role filtering seeks through the (org, role, ...) index"""
+        queryset = OrgUser.objects.filter(org_id=self.org.id, role='member')
+        self._assert_constant_cost_plan(
+            queryset, self._index_name(['org', 'role', 'created_at', 'id'])
+        )
+    
+    def test_cursor_round_trip(self):
+        """Test encoded cursors decode back to the same position"""
+        user = OrgUser.objects.first()
+        cursor = KeysetPagination.encode_cursor(user.created_at, user.id)
+        
+        self.assertEqual(KeysetPagination.decode_cursor(cursor), (user.created_at, user.id))
+    
+    def test_invalid_cursor(self):
+        """Test undecodable cursors raise PaginationError"""
+        with self.assertRaises(PaginationError):
+            KeysetPagination(cursor='garbage!')
+    
+    def test_limit_is_capped(self):
+        """Test limit is capped at max_limit"""
+        paginator = KeysetPagination(limit=10_000)
+        self.assertEqual(paginator.limit, KeysetPagination.max_limit)
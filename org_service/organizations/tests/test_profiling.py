@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from organizations import profiling
+from organizations.models.models import Organization, OrgUser
+
+@patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+class ProfilingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        OrgUser.objects.create(email='test@example.com', name='Test User', org=self.org)
+        self.url = reverse('internal-user', kwargs={'email': 'test@example.com'})
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_unprofiled_by_default(self, mock_permission):
+        """Test requests without a profiling token are not profiled"""
+        response = self.client.get(self.url)
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_signed_header_profiles_request(self, mock_permission):
+        """Test a signed X-Profile header writes a profile named after the route"""
+        response = self.client.get(self.url, HTTP_X_PROFILE=profiling.sign_profile_request('GET', self.url))
+
+        name = response['X-Profile-Id']
+        self.assertIn('-GET-internal_users_str_email-', name)
+        self.assertEqual(os.listdir(self.directory), [name])
+
+    def test_invalid_tokens_are_ignored(self, mock_permission):
+        """Test forged, expired or mismatched tokens do not trigger profiling"""
+        for token in ['garbage', f"{int(time.time())}:{'0' * 64}",
+                      profiling.sign_profile_request('GET', self.url, timestamp=time.time() - 3600),
+                      profiling.sign_profile_request('POST', self.url),
+                      profiling.sign_profile_request('GET', self.url, secret='other-secret')]:
+            response = self.client.get(self.url, HTTP_X_PROFILE=token)
+            self.assertNotIn('X-Profile-Id', response)
+
+    def test_sampled_requests_are_profiled(self, mock_permission):
+        """Test PROFILING_SAMPLE_RATE profiles requests without a header"""
+        with override_settings(PROFILING_SAMPLE_RATE=1):
+            response = self.client.get(self.url)
+
+        self.assertIn('X-Profile-Id', response)
+
+    def test_old_profiles_are_pruned(self, mock_permission):
+        """Test only the newest PROFILING_MAX_FILES profiles are kept"""
+        with override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2):
+            names = [self.client.get(self.url)['X-Profile-Id'] for _ in range(4)]
+
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(names[-2:]))
+
+    async def test_async_requests_are_profiled(self, mock_permission):
+        """Test requests served through the ASGI handler are profiled too"""
+        token = profiling.sign_profile_request('GET', self.url)
+
+        response = await AsyncClient().get(self.url, headers={'X-Profile': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(self.directory), [response['X-Profile-Id']])
+
+    def test_profile_report(self, mock_permission):
+        """Test profile_report lists profiles and summarizes their top functions"""
+        for _ in range(2):
+            self.client.get(self.url, HTTP_X_PROFILE=profiling.sign_profile_request('GET', self.url))
+        out = StringIO()
+
+        call_command('profile_report', route='internal_users', top=10, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('across 2 cProfile profiles', output)
+        self.assertIn('views.py', output)
+
+    @unittest.skipIf(profiling.pyinstrument is None, "pyinstrument not installed")
+    def test_sampling_profiler(self, mock_permission):
+        """Test PROFILER=sampling writes pyinstrument sessions the report can combine"""
+        with override_settings(PROFILER='sampling'):
+            response = self.client.get(self.url, HTTP_X_PROFILE=profiling.sign_profile_request('GET', self.url))
+        out = StringIO()
+
+        call_command('profile_report', stdout=out)
+
+        self.assertTrue(response['X-Profile-Id'].endswith('.pyisession'))
+        self.assertIn('Combined sampling profile of 1 requests', out.getvalue())
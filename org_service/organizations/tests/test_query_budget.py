@@ -0,0 +1,92 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations.models.models import Organization, OrgUser
+from organizations.query_budget import (
+    QueryBudgetExceeded, QueryBudgetTestMixin, budget_for, query_budget
+)
+from organizations.views.views import InternalUserView, UserCreateView
+
+@patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+class QueryBudgetMiddlewareTest(QueryBudgetTestMixin, TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        OrgUser.objects.create(email='test@example.com', name='Test User', org=self.org)
+        self.url = reverse('internal-user', kwargs={'email': 'test@example.com'})
+
+    def test_internal_lookup_is_one_query(self, mock_permission):
+        """Test the internal lookup runs a single query and reports it"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-DB-Query-Count'], '1')
+        self.assertIn('X-DB-Time-Ms', response)
+
+    def test_over_budget_fails_in_tests(self, mock_permission):
+        """Test a view exceeding its budget raises when enforcement is on"""
+        with patch.object(InternalUserView.get, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(self.url)
+
+    @override_settings(QUERY_BUDGET_ENFORCE=False)
+    def test_over_budget_is_logged_when_not_enforced(self, mock_permission):
+        """Test production mode only logs budget overruns"""
+        with patch.object(InternalUserView.get, 'query_budget', 0):
+            with self.assertLogs('organizations.middleware.middleware', level='WARNING') as logs:
+                response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('over its budget of 0', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_HEADERS=False)
+    def test_headers_can_be_disabled(self, mock_permission):
+        """Test the count headers are optional"""
+        response = self.client.get(self.url)
+
+        self.assertNotIn('X-DB-Query-Count', response)
+
+    def test_assert_max_queries(self, mock_permission):
+        """Test the test helper counts queries across databases"""
+        with self.assertMaxQueries(1) as counter:
+            OrgUser.objects.by_email('test@example.com').first()
+        self.assertEqual(counter.count, 1)
+
+        with self.assertRaises(AssertionError):
+            with self.assertMaxQueries(0):
+                OrgUser.objects.count()
+
+
+class QueryBudgetDeclarationTest(TestCase):
+
+    def test_budget_for_handler_and_class(self):
+        """Test handler budgets take precedence over class budgets"""
+        @query_budget(5)
+        class View(UserCreateView):
+            @query_budget(1)
+            def get(self, request, org_id):
+                pass
+
+        view_func = View.as_view()
+
+        self.assertEqual(budget_for(view_func, 'GET'), 1)
+        self.assertEqual(budget_for(view_func, 'POST'), 5)
+        self.assertIsNone(budget_for(InternalUserView.as_view(), 'POST'))
+
+    def test_sharded_budget(self):
+        """Test sharded budgets apply only when sharding is on and default to the plain budget"""
+        @query_budget(5)
+        class View(UserCreateView):
+            @query_budget(1, sharded=2)
+            def get(self, request, org_id):
+                pass
+
+        view_func = View.as_view()
+
+        self.assertEqual(budget_for(view_func, 'GET'), 1)
+        self.assertEqual(budget_for(view_func, 'GET', sharded=True), 2)
+        self.assertEqual(budget_for(view_func, 'POST', sharded=True), 5)
@@ -0,0 +1,123 @@
+import json
+import time
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations import routers
+from organizations.middleware.middleware import ReplicaRoutingMiddleware
+from organizations.models.models import Organization, OrgUser
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.router = routers.ReplicaRouter()
+        routers.reset_routing_state()
+        self.addCleanup(routers.reset_routing_state)
+
+    def test_reads_use_primary_by_default(self):
+        """Test reads outside replica-enabled views are left to the primary"""
+        self.assertIsNone(self.router.db_for_read(OrgUser))
+
+    @patch('organizations.routers.replica_lag', return_value=0)
+    def test_reads_use_replica_when_enabled(self, mock_lag):
+        """Test replica-enabled reads go to one of the replicas"""
+        routers.enable_replica_reads()
+
+        self.assertIn(self.router.db_for_read(OrgUser), ['replica_1', 'replica_2'])
+
+    @patch('organizations.routers.replica_lag', side_effect=lambda alias: 0 if alias == 'replica_2' else 30)
+    def test_lagging_replica_is_skipped(self, mock_lag):
+        """Test replicas behind REPLICA_MAX_LAG_SECONDS receive no reads"""
+        routers.enable_replica_reads()
+
+        for _ in range(10):
+            self.assertEqual(self.router.db_for_read(OrgUser), 'replica_2')
+
+    @patch('organizations.routers.replica_lag', return_value=float('inf'))
+    def test_falls_back_to_primary_when_no_replica_is_healthy(self, mock_lag):
+        """Test reads go to the primary when every replica lags"""
+        routers.enable_replica_reads()
+
+        self.assertEqual(self.router.db_for_read(OrgUser), 'default')
+
+    @patch('organizations.routers.replica_lag', return_value=0)
+    def test_reads_after_write_stay_on_primary(self, mock_lag):
+        """Test a write pins the rest of the request to the primary"""
+        routers.enable_replica_reads()
+
+        self.assertEqual(self.router.db_for_write(OrgUser), 'default')
+        self.assertTrue(routers.wrote_in_request())
+        self.assertIsNone(self.router.db_for_read(OrgUser))
+
+    def test_migrations_skip_replicas(self):
+        """Test replicas never receive migrations"""
+        self.assertFalse(self.router.allow_migrate('replica_1', 'organizations'))
+        self.assertIsNone(self.router.allow_migrate('default', 'organizations'))
+
+    @override_settings(REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_lag_is_cached(self):
+        """Test replica lag is measured at most once per check interval"""
+        routers._lag_cache.clear()
+        self.addCleanup(routers._lag_cache.clear)
+
+        self.assertEqual(routers.replica_lag('default'), 0)
+        routers._lag_cache['default'] = (time.monotonic(), 7.0)
+        self.assertEqual(routers.replica_lag('default'), 7.0)
+
+
+class ReplicaRoutingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.url = reverse('create-user', kwargs={'org_id': self.org.id})
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    @patch('organizations.routers.healthy_replicas', return_value=['default'])
+    def test_safe_request_reads_from_replicas(self, mock_healthy):
+        """Test GET on a replica-enabled view consults the replicas"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(mock_healthy.called)
+        self.assertNotIn(ReplicaRoutingMiddleware.PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    @patch('organizations.routers.healthy_replicas', return_value=['default'])
+    def test_write_sets_pin_cookie(self, mock_healthy):
+        """Test a write response pins the client to the primary"""
+        response = self.client.post(
+            self.url,
+            data=json.dumps({'email': 'pin@example.com', 'name': 'Pin', 'role': 'member'}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        cookie = response.cookies[ReplicaRoutingMiddleware.PIN_COOKIE]
+        self.assertGreater(float(cookie.value), time.time())
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    @patch('organizations.routers.healthy_replicas', return_value=['default'])
+    def test_pinned_client_reads_from_primary(self, mock_healthy):
+        """Test reads within the pin window skip the replicas"""
+        self.client.cookies[ReplicaRoutingMiddleware.PIN_COOKIE] = str(time.time() + 5)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(mock_healthy.called)
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    @patch('organizations.routers.healthy_replicas', return_value=['default'])
+    def test_expired_pin_is_ignored(self, mock_healthy):
+        """Test an expired pin cookie no longer forces the primary"""
+        self.client.cookies[ReplicaRoutingMiddleware.PIN_COOKIE] = str(time.time() - 1)
+
+        self.client.get(self.url)
+
+        self.assertTrue(mock_healthy.called)
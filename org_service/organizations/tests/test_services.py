@@ -0,0 +1,273 @@
+import uuid
+from unittest import skipUnless
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from organizations.models.models import Organization, OrgUser, OrgUserSearchTerm, OrgDeletionJob
+from organizations.exceptions.exceptions import DuplicateEmailError
+from organizations.services.services import (
+    OrgUserCreationService, OrganizationDeletionService, UserSearchIndexService
+)
+
+class OrgUserCreationServiceTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.data = {'email': 'test@example.com', 'name': 'Test User', 'role': 'member'}
+    
+    def test_organization_exists_is_cached(self):
+        """Test a positive org existence check is served from cache"""
+        self.assertTrue(OrgUserCreationService.organization_exists(self.org.id))
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(OrgUserCreationService.organization_exists(self.org.id))
+    
+    def test_missing_organization_is_not_cached(self):
+        """Test negative results are re-checked"""
+        org_id = uuid.uuid4()
+        self.assertFalse(OrgUserCreationService.organization_exists(org_id))
+        
+        with self.assertNumQueries(1):
+            self.assertFalse(OrgUserCreationService.organization_exists(org_id))
+    
+    def test_forget_organization(self):
+        """Test forgetting an org drops its cached existence"""
+        OrgUserCreationService.organization_exists(self.org.id)
+        OrgUserCreationService.forget_organization(self.org.id)
+        
+        with self.assertNumQueries(1):
+            OrgUserCreationService.organization_exists(self.org.id)
+    
+    def test_create_user_both_modes(self):
+        """Test both modes create the user"""
+        for mode, email in [('optimistic', 'a@example.com'), ('locking', 'b@example.com')]:
+            user = OrgUserCreationService.create_user(
+                self.org.id, {**self.data, 'email': email}, mode=mode
+            )
+            self.assertEqual(user.org_id, self.org.id)
+            self.assertTrue(OrgUser.objects.filter(email=email).exists())
+    
+    def test_create_user_unknown_org(self):
+        """Test both modes return None for an unknown org"""
+        for mode in ['optimistic', 'locking']:
+            self.assertIsNone(OrgUserCreationService.create_user(uuid.uuid4(), self.data, mode=mode))
+    
+    def test_locking_mode_duplicate(self):
+        """Test locking mode raises DuplicateEmailError"""
+        OrgUserCreationService.create_user(self.org.id, self.data, mode='locking')
+        
+        with self.assertRaises(DuplicateEmailError):
+            OrgUserCreationService.create_user(self.org.id, self.data, mode='locking')
+
+class UserSearchIndexServiceTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name="Test Organization")
+        self.other_org = Organization.objects.create(name="Other Organization")
+        self.alice = OrgUser.objects.create(
+            email='alice.smith@example.com', name='Alice Smith', role='admin', org=self.org
+        )
+        self.bob = OrgUser.objects.create(
+            email='bob@example.com', name='Bob Jones', role='member', org=self.org
+        )
+        self.zoe = OrgUser.objects.create(
+            email='zoe@example.com', name='Zoë Smithers', role='viewer', org=self.org
+        )
+        self.outsider = OrgUser.objects.create(
+            email='alice@other.com', name='Alice Other', role='member', org=self.other_org
+        )
+    
+    def test_terms_for_user(self):
+        """Test email, full name and name words are indexed normalized"""
+        terms = UserSearchIndexService.terms_for('Alice.Smith@Example.com', '  Alice  Smith ')
+        
+        self.assertEqual(terms, ['alice.smith@example.com', 'alice smith', 'alice', 'smith'])
+    
+    def test_index_kept_in_sync_on_create(self):
+        """Test saving a user writes its search terms"""
+        terms = set(self.bob.search_terms.values_list('term', flat=True))
+        
+        self.assertEqual(terms, {'bob@example.com', 'bob jones', 'bob', 'jones'})
+    
+    def test_index_kept_in_sync_on_update(self):
+        """Test updating a user replaces stale search terms"""
+        self.bob.name = 'Robert Jones'
+        self.bob.save()
+        
+        self.assertFalse(self.bob.search_terms.filter(term='bob jones').exists())
+        self.assertEqual(UserSearchIndexService.search(self.org.id, 'rob'), [self.bob])
+    
+    def test_index_removed_on_delete(self):
+        """Test deleting a user removes its search terms"""
+        user_id = self.bob.id
+        self.bob.delete()
+        
+        self.assertFalse(OrgUserSearchTerm.objects.filter(user_id=user_id).exists())
+    
+    def test_search_by_email_and_name_prefix(self):
+        """Test prefix search matches email, first name and last name"""
+        self.assertEqual(UserSearchIndexService.search(self.org.id, 'bob@'), [self.bob])
+        self.assertEqual(UserSearchIndexService.search(self.org.id, 'JON'), [self.bob])
+        self.assertEqual(
+            UserSearchIndexService.search(self.org.id, 'smith'),
+            [self.alice, self.zoe]
+        )
+    
+    def test_search_is_accent_insensitive(self):
+        """Test accented names match unaccented queries"""
+        self.assertEqual(UserSearchIndexService.search(self.org.id, 'zoe s'), [self.zoe])
+    
+    def test_search_is_scoped_to_org(self):
+        """Test users of other organizations are not returned"""
+        results = UserSearchIndexService.search(self.org.id, 'alice')
+        
+        self.assertEqual(results, [self.alice])
+    
+    def test_search_returns_each_user_once(self):
+        """Test a user matching through several terms appears once"""
+        results = UserSearchIndexService.search(self.org.id, 'alice')
+        
+        self.assertEqual(len(results), 1)
+    
+    def test_search_fills_limit_past_users_with_many_terms(self):
+        """Test a user matching through many terms does not crowd out later matches"""
+        many = OrgUser.objects.create(
+            email='x@example.com', name='Aa Ab Ac Ad Ae Af Ag Ah Ai', org=self.org
+        )
+
+        results = UserSearchIndexService.search(self.org.id, 'a', limit=2)
+
+        self.assertEqual(results, [many, self.alice])
+    
+    @skipUnless(connection.vendor == 'sqlite', "asserts on SQLite EXPLAIN QUERY PLAN output")
+    def test_search_uses_prefix_index(self):
+        """Test the prefix lookup is an index seek, not a scan"""
+        terms = UserSearchIndexService.prefix_filter(
+            OrgUserSearchTerm.objects.filter(org_id=self.org.id), 'ali'
+        )
+        plan = terms.order_by('term').values_list('user_id')[:40].explain()
+        
+        self.assertIn('org_user_search_prefix_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_rebuild(self):
+        """Test rebuild restores entries for rows written without signals"""
+        OrgUserSearchTerm.objects.all().delete()
+        
+        indexed = UserSearchIndexService.rebuild(org_id=self.org.id)
+        
+        self.assertEqual(indexed, 3)
+        self.assertEqual(UserSearchIndexService.search(self.org.id, 'bob'), [self.bob])
+        self.assertEqual(UserSearchIndexService.search(self.other_org.id, 'alice'), [])
+
+class OrganizationDeletionServiceTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.org = Organization.objects.create(name="Doomed Organization")
+        self.survivor_org = Organization.objects.create(name="Surviving Organization")
+        for i in range(7):
+            OrgUser.objects.create(
+                email=f'user{i}@doomed.com', name=f'User {i}', role='member', org=self.org
+            )
+        self.survivor = OrgUser.objects.create(
+            email='keep@survivor.com', name='Keep Me', role='admin', org=self.survivor_org
+        )
+    
+    def test_request_deletion_marks_org(self):
+        """Test requesting deletion marks the org and records the user count"""
+        job = OrganizationDeletionService.request_deletion(self.org.id, batch_size=3)
+        
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.status, Organization.STATUS_DELETING)
+        self.assertEqual(job.status, OrgDeletionJob.STATUS_PENDING)
+        self.assertEqual(job.total_users, 7)
+        self.assertFalse(OrgUserCreationService.organization_exists(self.org.id))
+    
+    def test_request_deletion_is_idempotent(self):
+        """Test a second request returns the job already queued"""
+        first = OrganizationDeletionService.request_deletion(self.org.id)
+        second = OrganizationDeletionService.request_deletion(self.org.id)
+        
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(OrgDeletionJob.objects.count(), 1)
+    
+    def test_request_deletion_unknown_org(self):
+        """Test requesting deletion of an unknown org"""
+        self.assertIsNone(OrganizationDeletionService.request_deletion(uuid.uuid4()))
+    
+    def test_run_deletes_in_batches_and_resumes(self):
+        """Test a job deletes bounded batches and resumes where it stopped"""
+        job = OrganizationDeletionService.request_deletion(self.org.id, batch_size=3)
+        self.assertTrue(OrganizationDeletionService.claim(job))
+        
+        finished = OrganizationDeletionService.run(job, max_batches=2)
+        
+        self.assertFalse(finished)
+        self.assertEqual(job.deleted_users, 6)
+        self.assertEqual(OrgUser.objects.filter(org_id=self.org.id).count(), 1)
+        self.assertTrue(Organization.objects.filter(id=self.org.id).exists())
+        
+        # A fresh worker picks up the same job and finishes it
+        resumed = OrgDeletionJob.objects.get(id=job.id)
+        self.assertTrue(OrganizationDeletionService.run(resumed))
+        
+        self.assertEqual(resumed.status, OrgDeletionJob.STATUS_COMPLETED)
+        self.assertEqual(resumed.deleted_users, 7)
+        self.assertFalse(Organization.objects.filter(id=self.org.id).exists())
+        self.assertFalse(OrgUserSearchTerm.objects.filter(org_id=self.org.id).exists())
+        self.assertTrue(OrgUser.objects.filter(id=self.survivor.id).exists())
+        self.assertTrue(OrgUserSearchTerm.objects.filter(user_id=self.survivor.id).exists())
+    
+    def test_run_sweeps_users_created_during_the_job(self):
+        """Test users added by a process with a stale existence cache are deleted too"""
+        job = OrganizationDeletionService.request_deletion(self.org.id, batch_size=3)
+        OrganizationDeletionService.claim(job)
+        delete_batch = OrganizationDeletionService._delete_batch
+        late = []
+
+        def delete_batch_then_create(job, using):
+            deleted = delete_batch(job, using)
+            if not deleted and not late:
+                # Created after the last batch, as another worker trusting its cache would
+                late.append(OrgUser.objects.create(email='late@doomed.com', name='Late', org=self.org))
+            return deleted
+
+        with patch.object(OrganizationDeletionService, '_delete_batch', side_effect=delete_batch_then_create):
+            self.assertTrue(OrganizationDeletionService.run(job))
+
+        self.assertFalse(OrgUser.objects.filter(id=late[0].id).exists())
+        self.assertFalse(OrgUserSearchTerm.objects.filter(user_id=late[0].id).exists())
+        self.assertEqual(job.deleted_users, 8)
+
+    def test_batch_is_set_based(self):
+        """Test each batch costs a constant number of statements"""
+        job = OrganizationDeletionService.request_deletion(self.org.id, batch_size=5)
+        OrganizationDeletionService.claim(job)
+        
+        # savepoint, two DELETEs, progress UPDATE, release, job refresh;
+        # no statement loads the users being deleted
+        with self.assertNumQueries(6):
+            OrganizationDeletionService.run(job, max_batches=1)
+    
+    def test_claim_is_exclusive(self):
+        """Test two workers cannot claim the same job snapshot"""
+        job = OrganizationDeletionService.request_deletion(self.org.id)
+        stale_copy = OrgDeletionJob.objects.get(id=job.id)
+        
+        self.assertTrue(OrganizationDeletionService.claim(job))
+        self.assertFalse(OrganizationDeletionService.claim(stale_copy))
+    
+    def test_runnable_jobs(self):
+        """Test pending and stale running jobs are runnable, fresh running ones are not"""
+        job = OrganizationDeletionService.request_deletion(self.org.id)
+        self.assertEqual(list(OrganizationDeletionService.runnable_jobs()), [job])
+        
+        OrganizationDeletionService.claim(job)
+        self.assertEqual(list(OrganizationDeletionService.runnable_jobs(stale_after=300)), [])
+        self.assertEqual(list(OrganizationDeletionService.runnable_jobs(stale_after=-1)), [job])
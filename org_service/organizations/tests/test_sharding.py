@@ -0,0 +1,269 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from organizations import sharding
+from organizations.models.models import (
+    Organization, OrgUser, OrgUserSearchTerm, OrgShard, UserEmailDirectory
+)
+from organizations.services.services import (
+    OrgUserCreationService, OrganizationDeletionService, ShardRebalanceService
+)
+
+SHARDS = ['shard_1', 'shard_2']
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class ShardingTest(TestCase):
+    databases = {'default', *SHARDS}
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org_a = Organization.objects.using('shard_1').create(name="Org A")
+        self.org_b = Organization.objects.using('shard_2').create(name="Org B")
+
+    def _create(self, org, email, name='Test User'):
+        return self.client.post(
+            reverse('create-user', kwargs={'org_id': org.id}),
+            data=json.dumps({'email': email, 'name': name, 'role': 'member'}),
+            content_type='application/json'
+        )
+
+    def test_new_organization_is_registered(self):
+        """Test creating an org records its shard in the directory"""
+        self.assertEqual(OrgShard.objects.get(org_id=self.org_a.id).shard, 'shard_1')
+        self.assertEqual(sharding.db_for_org(self.org_b.id), 'shard_2')
+
+    def test_create_organization_uses_placement(self):
+        """Test create_organization writes to the hash-placed shard"""
+        org = sharding.create_organization(name="Placed")
+
+        shard = sharding.placement_for(org.id)
+        self.assertTrue(Organization.objects.using(shard).filter(id=org.id).exists())
+        self.assertEqual(sharding.db_for_org(org.id), shard)
+
+    def test_users_are_created_on_org_shard(self):
+        """Test users land on their org's shard and in the email directory"""
+        response = self._create(self.org_b, 'b@example.com')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(OrgUser.objects.using('shard_2').filter(email='b@example.com').exists())
+        self.assertFalse(OrgUser.objects.using('shard_1').filter(email='b@example.com').exists())
+        self.assertEqual(UserEmailDirectory.objects.get(email='b@example.com').shard, 'shard_2')
+        self.assertTrue(OrgUserSearchTerm.objects.using('shard_2').filter(org_id=self.org_b.id).exists())
+
+    def test_email_is_unique_across_shards(self):
+        """Test the directory rejects an email already used on another shard"""
+        self._create(self.org_a, 'dup@example.com')
+
+        response = self._create(self.org_b, 'dup@example.com')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(OrgUser.objects.using('shard_2').filter(email='dup@example.com').exists())
+
+    def test_failed_insert_releases_email(self):
+        """Test a create that fails on the shard frees the directory entry"""
+        OrgUser.objects.using('shard_1').create(email='taken@example.com', name='X', org=self.org_a)
+
+        with self.assertRaises(Exception):
+            OrgUserCreationService.create_user(
+                self.org_a.id, {'email': 'taken@example.com', 'name': 'Y', 'role': 'member'}
+            )
+        self.assertFalse(UserEmailDirectory.objects.filter(email='taken@example.com').exists())
+
+    def test_list_and_search_read_org_shard(self):
+        """Test org-scoped endpoints read from the org's shard"""
+        self._create(self.org_b, 'zoe@example.com', name='Zoe')
+        # Cold caches: the directory lookup must fit the sharded budgets
+        cache.clear()
+
+        listing = self.client.get(reverse('create-user', kwargs={'org_id': self.org_b.id}))
+        cache.clear()
+        search = self.client.get(reverse('search-users', kwargs={'org_id': self.org_b.id}), {'q': 'zo'})
+
+        self.assertEqual([u['email'] for u in listing.data['results']], ['zoe@example.com'])
+        self.assertEqual([u['email'] for u in search.data['results']], ['zoe@example.com'])
+
+    @patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+    def test_internal_lookup_uses_directory(self, mock_permission):
+        """Test the internal email lookup finds users on any shard"""
+        self._create(self.org_b, 'lookup@example.com')
+
+        response = self.client.get(reverse('internal-user', kwargs={'email': 'lookup@example.com'}))
+        missing = self.client.get(reverse('internal-user', kwargs={'email': 'nobody@example.com'}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['org_id'], str(self.org_b.id))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unknown_org_is_not_found(self):
+        """Test orgs missing from the directory answer 404"""
+        OrgShard.objects.filter(org_id=self.org_a.id).delete()
+        sharding.forget_org_shard(self.org_a.id)
+        OrgUserCreationService.forget_organization(self.org_a.id)
+
+        response = self._create(self.org_a, 'x@example.com')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deletion_releases_directory_entries(self):
+        """Test a completed deletion removes the org's rows and directory entries"""
+        self._create(self.org_b, 'gone@example.com')
+        job = OrganizationDeletionService.request_deletion(self.org_b.id)
+
+        self.assertTrue(OrganizationDeletionService.run(job))
+
+        self.assertFalse(Organization.objects.using('shard_2').filter(id=self.org_b.id).exists())
+        self.assertFalse(OrgUser.objects.using('shard_2').exists())
+        self.assertFalse(UserEmailDirectory.objects.filter(org_id=self.org_b.id).exists())
+        self.assertFalse(OrgShard.objects.filter(org_id=self.org_b.id).exists())
+
+    def test_move_organization(self):
+        """Test moving an org copies users, terms and timestamps, then cleans the source"""
+        for i in range(5):
+            self._create(self.org_a, f'user{i}@example.com', name=f'User {i}')
+        original = list(
+            OrgUser.objects.using('shard_1').order_by('created_at', 'id').values_list('id', 'created_at')
+        )
+
+        moved = ShardRebalanceService.move_organization(self.org_a.id, 'shard_2', batch_size=2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(
+            list(OrgUser.objects.using('shard_2').filter(org_id=self.org_a.id)
+                 .order_by('created_at', 'id').values_list('id', 'created_at')),
+            original
+        )
+        self.assertTrue(OrgUserSearchTerm.objects.using('shard_2').filter(org_id=self.org_a.id).exists())
+        self.assertFalse(Organization.objects.using('shard_1').filter(id=self.org_a.id).exists())
+        self.assertFalse(OrgUserSearchTerm.objects.using('shard_1').exists())
+        self.assertEqual(sharding.db_for_org(self.org_a.id), 'shard_2')
+        self.assertEqual(
+            set(UserEmailDirectory.objects.filter(org_id=self.org_a.id).values_list('shard', flat=True)),
+            {'shard_2'}
+        )
+        self.assertEqual(
+            Organization.objects.using('shard_2').get(id=self.org_a.id).status,
+            Organization.STATUS_ACTIVE
+        )
+
+    def test_plan_moves_from_largest_shard(self):
+        """Test the plan evens out shard sizes"""
+        org_c = Organization.objects.using('shard_1').create(name="Org C")
+        for i in range(4):
+            self._create(self.org_a, f'a{i}@example.com')
+        for i in range(2):
+            self._create(org_c, f'c{i}@example.com')
+        self._create(self.org_b, 'b@example.com')
+
+        plan = ShardRebalanceService.plan()
+
+        self.assertEqual(plan, [(org_c.id, 'shard_1', 'shard_2', 2)])
+
+    def test_rebalance_command(self):
+        """Test rebalance_shards executes its plan"""
+        org_c = Organization.objects.using('shard_1').create(name="Org C")
+        for i in range(3):
+            self._create(self.org_a, f'a{i}@example.com')
+        self._create(org_c, 'c@example.com')
+        self._create(self.org_b, 'b@example.com')
+        out = StringIO()
+
+        call_command('rebalance_shards', settle=0, stdout=out)
+
+        self.assertIn(f'Move org {org_c.id} (1 users) shard_1 -> shard_2', out.getvalue())
+        self.assertEqual(ShardRebalanceService.shard_sizes(), {'shard_1': 3, 'shard_2': 2})
+
+
+class ShardingBackfillTest(TestCase):
+    databases = {'default', *SHARDS}
+
+    def setUp(self):
+        """Set up data written before sharding was enabled"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Legacy Org")
+        self.user = OrgUser.objects.create(email='legacy@example.com', name='Legacy User', org=self.org)
+
+    @patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+    def test_existing_rows_are_found_after_backfill(self, mock_permission):
+        """Test backfilled orgs and users stay reachable once sharding is enabled"""
+        call_command('backfill_shard_directory', stdout=StringIO())
+
+        with override_settings(DATABASE_SHARDS=SHARDS):
+            lookup = self.client.get(reverse('internal-user', kwargs={'email': 'legacy@example.com'}))
+            listing = self.client.get(reverse('create-user', kwargs={'org_id': self.org.id}))
+            created = self.client.post(
+                reverse('create-user', kwargs={'org_id': self.org.id}),
+                data=json.dumps({'email': 'new@example.com', 'name': 'New User', 'role': 'member'}),
+                content_type='application/json'
+            )
+
+        self.assertEqual(lookup.status_code, status.HTTP_200_OK)
+        self.assertEqual(lookup.data['user_id'], str(self.user.id))
+        self.assertEqual([u['email'] for u in listing.data['results']], ['legacy@example.com'])
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserEmailDirectory.objects.get(email='new@example.com').shard, 'default')
+
+    def test_backfill_is_repeatable(self):
+        """Test a second run only registers rows added since the first"""
+        out = StringIO()
+        call_command('backfill_shard_directory', stdout=out)
+        OrgUser.objects.create(email='later@example.com', name='Later', org=self.org)
+
+        call_command('backfill_shard_directory', stdout=out)
+
+        self.assertIn('Registered 1 organizations and 1 users', out.getvalue())
+        self.assertIn('Registered 0 organizations and 1 users', out.getvalue())
+        self.assertEqual(OrgShard.objects.get(org_id=self.org.id).shard, 'default')
+
+    @override_settings(DATABASE_SHARDS=SHARDS)
+    def test_backfilled_orgs_move_onto_shards(self):
+        """Test the rebalancing plan moves backfilled orgs off the default database"""
+        sharding.backfill_directories()
+
+        plan = ShardRebalanceService.plan()
+
+        self.assertEqual([(org_id, source) for org_id, source, _, _ in plan], [(self.org.id, 'default')])
+        ShardRebalanceService.move_organization(self.org.id, plan[0][2])
+        self.assertTrue(OrgUser.objects.using(plan[0][2]).filter(id=self.user.id).exists())
+
+
+class ShardRouterTest(TestCase):
+
+    def test_router_defers_without_shards(self):
+        """Test the router leaves routing alone when sharding is off"""
+        router = sharding.ShardRouter()
+
+        self.assertIsNone(router.db_for_read(OrgUser))
+        self.assertIsNone(router.allow_migrate('default', 'organizations', 'orguser'))
+
+    @override_settings(DATABASE_SHARDS=SHARDS)
+    def test_shards_only_migrate_sharded_models(self):
+        """Test shards hold organizations, users and terms only"""
+        router = sharding.ShardRouter()
+
+        self.assertTrue(router.allow_migrate('shard_1', 'organizations', 'orguser'))
+        self.assertFalse(router.allow_migrate('shard_1', 'organizations', 'useremaildirectory'))
+        self.assertFalse(router.allow_migrate('shard_1', 'auth', 'user'))
+        self.assertIsNone(router.allow_migrate('default', 'organizations', 'orgshard'))
+
+    @override_settings(DATABASE_SHARDS=SHARDS)
+    def test_use_shard_routes_queries(self):
+        """Test use_shard scopes sharded models only"""
+        router = sharding.ShardRouter()
+
+        with sharding.use_shard('shard_2'):
+            self.assertEqual(router.db_for_read(OrgUser), 'shard_2')
+            self.assertIsNone(router.db_for_read(UserEmailDirectory))
+        self.assertIsNone(router.db_for_read(OrgUser))
+
+    def test_settings_define_test_shards(self):
+        """Test the spare shard aliases exist for the sharding tests"""
+        for alias in SHARDS:
+            self.assertIn(alias, settings.DATABASES)
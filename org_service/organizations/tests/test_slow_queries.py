@@ -0,0 +1,89 @@
+import json
+from unittest.mock import patch
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from organizations.models.models import Organization, OrgUser
+from organizations.slow_queries import SlowQueryLog, normalize_sql
+
+class NormalizeSqlTest(TestCase):
+
+    def test_literals_and_placeholders_are_replaced(self):
+        """Test values never reach the log and equal statements group together"""
+        sql = "SELECT * FROM org_users WHERE email = 'a@b.com' AND id > 42 LIMIT %s"
+
+        self.assertEqual(normalize_sql(sql), "SELECT * FROM org_users WHERE email = ? AND id > ? LIMIT ?")
+
+    def test_in_lists_are_collapsed(self):
+        """Test IN lists of any length normalize to the same statement"""
+        self.assertEqual(
+            normalize_sql('SELECT "id" FROM "t" WHERE "id" IN (%s, %s,\n %s)'),
+            normalize_sql('SELECT "id" FROM "t" WHERE "id" IN (%s)')
+        )
+
+
+class SlowQueryLogTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name="Test Organization")
+        OrgUser.objects.create(email='test@example.com', name='Test User', org=self.org)
+
+    def _entries(self, logs):
+        return [json.loads(line.split(':', 2)[2]) for line in logs.output]
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+    def test_slow_query_is_logged_with_plan(self):
+        """Test a query over the threshold is logged with its EXPLAIN output"""
+        with self.assertLogs('organizations.slow_queries', level='WARNING') as logs:
+            with SlowQueryLog(view='tests'):
+                OrgUser.objects.by_email('test@example.com').first()
+
+        entry = self._entries(logs)[0]
+        self.assertEqual(entry['view'], 'tests')
+        self.assertEqual(entry['db'], 'default')
+        self.assertNotIn('test@example.com', entry['sql'])
+        self.assertTrue(any('unique_email_org_user' in line for line in entry['plan']))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=0)
+    def test_plan_is_sampled(self):
+        """Test unsampled slow queries are logged without a plan"""
+        with self.assertLogs('organizations.slow_queries', level='WARNING') as logs:
+            with SlowQueryLog():
+                OrgUser.objects.count()
+
+        self.assertNotIn('plan', self._entries(logs)[0])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+    def test_failed_query_is_logged_without_plan(self):
+        """Test a failing query is logged with its error and never EXPLAINed"""
+        with self.assertLogs('organizations.slow_queries', level='WARNING') as logs:
+            with SlowQueryLog(), patch.object(SlowQueryLog, '_explain') as explain:
+                with self.assertRaises(DatabaseError):
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT missing_column FROM org_users')
+
+        entry = self._entries(logs)[0]
+        self.assertIn(entry['error'], ('OperationalError', 'ProgrammingError'))
+        self.assertNotIn('plan', entry)
+        explain.assert_not_called()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=60_000)
+    def test_fast_queries_are_not_logged(self):
+        """Test queries under the threshold are ignored"""
+        with self.assertNoLogs('organizations.slow_queries'):
+            with SlowQueryLog():
+                OrgUser.objects.count()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=0)
+    @patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+    def test_middleware_records_view(self, mock_permission):
+        """Test slow queries of a request name the view that ran them"""
+        with self.assertLogs('organizations.slow_queries', level='WARNING') as logs:
+            APIClient().get(reverse('internal-user', kwargs={'email': 'test@example.com'}))
+
+        self.assertEqual(
+            {entry['view'] for entry in self._entries(logs)},
+            {'organizations.views.views.InternalUserView'}
+        )
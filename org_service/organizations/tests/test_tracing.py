@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from organizations import tracing
+from organizations.models.models import Organization, OrgUser
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+class TraceparentTest(TestCase):
+
+    def test_parse_traceparent(self):
+        """Test valid headers are parsed with their sampled flag"""
+        self.assertEqual(
+            tracing.parse_traceparent(f'00-{TRACE_ID}-{PARENT_ID}-01'), (TRACE_ID, PARENT_ID, True)
+        )
+        self.assertEqual(
+            tracing.parse_traceparent(f'00-{TRACE_ID}-{PARENT_ID}-00'), (TRACE_ID, PARENT_ID, False)
+        )
+
+    def test_invalid_traceparent_is_ignored(self):
+        """Test malformed, all-zero and version ff headers start a new trace"""
+        for header in [None, '', 'garbage', f'ff-{TRACE_ID}-{PARENT_ID}-01',
+                       f'00-{"0" * 32}-{PARENT_ID}-01', f'00-{TRACE_ID}-{"0" * 16}-01']:
+            self.assertIsNone(tracing.parse_traceparent(header))
+
+    def test_span_round_trips_through_header(self):
+        """Test a span's traceparent parses back to its own ids"""
+        span = tracing.start_trace('test', f'00-{TRACE_ID}-{PARENT_ID}-01')
+
+        self.assertEqual(tracing.parse_traceparent(span.traceparent), (TRACE_ID, span.span_id, True))
+
+
+@patch('organizations.permissions.ServiceTokenPermission.has_permission', return_value=True)
+class TracingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        OrgUser.objects.create(email='test@example.com', name='Test User', org=self.org)
+        self.url = reverse('internal-user', kwargs={'email': 'test@example.com'})
+
+        handle, self.export_file = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, self.export_file)
+        settings_override = override_settings(TRACE_EXPORT_FILE=self.export_file, TRACE_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _spans(self):
+        with open(self.export_file) as f:
+            return [json.loads(line) for line in f]
+
+    def test_continues_incoming_trace(self, mock_permission):
+        """Test the server span joins the caller's trace with queries as child spans"""
+        self.client.get(self.url, HTTP_TRACEPARENT=f'00-{TRACE_ID}-{PARENT_ID}-01')
+
+        spans = self._spans()
+        server = next(span for span in spans if span['parent_id'] == PARENT_ID)
+        queries = [span for span in spans if span['name'] == 'db.query']
+        self.assertEqual({span['trace_id'] for span in spans}, {TRACE_ID})
+        self.assertEqual(server['name'], 'GET internal/users/<str:email>/')
+        self.assertEqual(server['service'], 'org_service')
+        self.assertEqual(server['attributes']['http.status_code'], 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(queries[0]['parent_id'], server['span_id'])
+        self.assertNotIn('test@example.com', queries[0]['attributes']['db.statement'])
+
+    def test_unsampled_trace_is_not_exported(self, mock_permission):
+        """Test the caller's sampled=0 decision is honoured"""
+        self.client.get(self.url, HTTP_TRACEPARENT=f'00-{TRACE_ID}-{PARENT_ID}-00')
+
+        self.assertEqual(self._spans(), [])
+
+    def test_new_traces_are_sampled_by_rate(self, mock_permission):
+        """Test requests without traceparent start root spans at TRACE_SAMPLE_RATE"""
+        self.client.get(self.url)
+        self.assertEqual(self._spans(), [])
+
+        with override_settings(TRACE_SAMPLE_RATE=1):
+            self.client.get(self.url)
+
+        roots = [span for span in self._spans() if span['parent_id'] is None]
+        self.assertEqual(len(roots), 1)
+
+    def test_trace_report(self, mock_permission):
+        """Test trace_report breaks a trace down by stage"""
+        self.client.get(self.url, HTTP_TRACEPARENT=f'00-{TRACE_ID}-{PARENT_ID}-01')
+        out = StringIO()
+
+        call_command('trace_report', TRACE_ID, file=[self.export_file], stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertIn('org_service: GET internal/users/<str:email>/', lines[0])
+        self.assertIn('  org_service: db.query', lines[1])
@@ -1,11 +1,13 @@
 import json
 import uuid
 from unittest.mock import patch
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from organizations.models.models import Organization, OrgUser
+from organizations.models.models import Organization, OrgUser, OrgDeletionJob
 
 class UserCreateViewTest(TestCase):
     
@@ -112,6 +114,45 @@ class UserCreateViewTest(TestCase):
         )
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def _post_user(self, email):
+        return self.client.post(
+            self.create_user_url,
+            data=json.dumps({'email': email, 'name': 'Test User', 'role': 'member'}),
+            content_type='application/json'
+        )
+    
+    def test_optimistic_create_issues_no_reads(self):
+        """Test optimistic mode inserts without org lookup or uniqueness check"""
+        self._post_user('first@example.com')  # warms the org existence cache
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self._post_user('second@example.com')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'].lstrip().upper() for query in queries.captured_queries]
+        self.assertFalse([sql for sql in statements if sql.startswith('SELECT')])
+    
+    @override_settings(ORG_USER_CREATE_MODE='locking')
+    def test_locking_mode(self):
+        """Test locking mode creates users and rejects duplicates"""
+        first = self._post_user('test@example.com')
+        second = self._post_user('test@example.com')
+        
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_409_CONFLICT)
+    
+    @override_settings(ORG_USER_CREATE_MODE='locking')
+    def test_locking_mode_invalid_org(self):
+        """Test locking mode returns 404 for an unknown organization"""
+        url = reverse('create-user', kwargs={'org_id': uuid.uuid4()})
+        response = self.client.post(
+            url,
+            data=json.dumps({'email': 'test@example.com', 'name': 'Test User', 'role': 'member'}),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 class InternalUserViewTest(TestCase):
     
@@ -153,4 +194,213 @@ class InternalUserViewTest(TestCase):
         url = reverse('internal-user', kwargs={'email': 'nonexistent@example.com'})
         response = self.client.get(url)
         
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class UserListViewTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.other_org = Organization.objects.create(name="Other Organization")
+        self.list_url = reverse('create-user', kwargs={'org_id': self.org.id})
+        
+        roles = ['admin', 'member', 'viewer']
+        for i in range(7):
+            OrgUser.objects.create(
+                email=f'user{i}@example.com',
+                name=f'User {i}',
+                role=roles[i % 3],
+                org=self.org
+            )
+        OrgUser.objects.create(
+            email='outsider@example.com',
+            name='Outsider',
+            role='member',
+            org=self.other_org
+        )
+    
+    def _collect_pages(self, params):
+        """Follow next_cursor until exhausted, returning all results"""
+        results = []
+        params = dict(params)
+        while True:
+            response = self.client.get(self.list_url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results.extend(response.data['results'])
+            if response.data['next_cursor'] is None:
+                return results
+            params['cursor'] = response.data['next_cursor']
+    
+    def test_list_users_walks_all_pages_in_order(self):
+        """Test cursor pagination returns every user exactly once in order"""
+        results = self._collect_pages({'limit': 3})
+        
+        expected = list(
+            OrgUser.objects.filter(org=self.org)
+            .order_by('created_at', 'id')
+            .values_list('email', flat=True)
+        )
+        self.assertEqual([user['email'] for user in results], expected)
+    
+    def test_list_users_role_filter(self):
+        """Test role filter only returns users with that role"""
+        results = self._collect_pages({'limit': 2, 'role': 'admin'})
+        
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(user['role'] == 'admin' for user in results))
+    
+    def test_list_users_fields_projection(self):
+        """Test fields parameter limits the returned attributes"""
+        response = self.client.get(self.list_url, {'fields': 'user_id,email'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0].keys()), {'user_id', 'email'})
+    
+    def test_list_users_invalid_field(self):
+        """Test unknown projection fields are rejected"""
+        response = self.client.get(self.list_url, {'fields': 'email,password'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_list_users_invalid_cursor(self):
+        """Test malformed cursor is rejected"""
+        response = self.client.get(self.list_url, {'cursor': 'not-a-cursor'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_list_users_unknown_org(self):
+        """Test listing users of a non-existent organization"""
+        url = reverse('create-user', kwargs={'org_id': uuid.uuid4()})
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class UserSearchViewTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.user = OrgUser.objects.create(
+            email='jane.doe@example.com',
+            name='Jane Doe',
+            role='admin',
+            org=self.org
+        )
+        self.search_url = reverse('search-users', kwargs={'org_id': self.org.id})
+    
+    def test_search_success(self):
+        """Test type-ahead search returns matching users"""
+        response = self.client.get(self.search_url, {'q': 'Do'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['user_id'], str(self.user.id))
+        self.assertEqual(response.data['results'][0]['email'], 'jane.doe@example.com')
+    
+    def test_search_no_match(self):
+        """Test search with no matching users"""
+        response = self.client.get(self.search_url, {'q': 'zzz'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+    
+    def test_search_missing_query(self):
+        """Test search without q is rejected"""
+        response = self.client.get(self.search_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_search_unknown_org(self):
+        """Test search in a non-existent organization"""
+        url = reverse('search-users', kwargs={'org_id': uuid.uuid4()})
+        response = self.client.get(url, {'q': 'jane'})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class OrganizationDeletionViewTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+        self.user = OrgUser.objects.create(
+            email='test@example.com',
+            name='Test User',
+            role='member',
+            org=self.org
+        )
+        self.org_url = reverse('organization', kwargs={'org_id': self.org.id})
+        self.status_url = reverse('organization-deletion', kwargs={'org_id': self.org.id})
+        permission = patch(
+            'organizations.permissions.ServiceTokenPermission.has_permission', return_value=True
+        )
+        permission.start()
+        self.addCleanup(permission.stop)
+    
+    def test_delete_schedules_job(self):
+        """Test DELETE returns 202 with the job and leaves users for the worker"""
+        response = self.client.delete(self.org_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response.data['total_users'], 1)
+        self.assertTrue(OrgUser.objects.filter(id=self.user.id).exists())
+    
+    def test_delete_unknown_org(self):
+        """Test DELETE of a non-existent organization"""
+        url = reverse('organization', kwargs={'org_id': uuid.uuid4()})
+        response = self.client.delete(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_deletion_status(self):
+        """Test progress reporting of a deletion job"""
+        self.client.delete(self.org_url)
+        response = self.client.get(self.status_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted_users'], 0)
+        self.assertEqual(response.data['progress'], 0.0)
+    
+    def test_deleting_org_rejects_new_users(self):
+        """Test users cannot be created in an org being deleted"""
+        self.client.delete(self.org_url)
+        response = self.client.post(
+            reverse('create-user', kwargs={'org_id': self.org.id}),
+            data=json.dumps({'email': 'new@example.com', 'name': 'New User', 'role': 'member'}),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_deleting_org_users_not_resolvable(self):
+        """Test internal lookups ignore users of an org being deleted"""
+        self.client.delete(self.org_url)
+        
+        response = self.client.get(reverse('internal-user', kwargs={'email': 'test@example.com'}))
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class OrganizationDeletionPermissionTest(TestCase):
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Organization")
+    
+    def test_unsigned_delete_is_rejected(self):
+        """Test an unsigned DELETE cannot schedule a deletion"""
+        response = self.client.delete(reverse('organization', kwargs={'org_id': self.org.id}))
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(OrgDeletionJob.objects.exists())
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.status, Organization.STATUS_ACTIVE)
+    
+    def test_unsigned_status_is_rejected(self):
+        """Test deletion progress is not disclosed to unsigned callers"""
+        response = self.client.get(reverse('organization-deletion', kwargs={'org_id': self.org.id}))
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,210 @@
+"""
+Lightweight request tracing: spans, W3C traceparent propagation and export.
+
+auth_service carries a twin of this module (auth_service/authentication/tracing.py);
+change both copies together.
+"""
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+from organizations.slow_queries import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = 'traceparent'
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# Innermost open span of the current request / task
+_current_span = ContextVar('current_span', default=None)
+
+
+class Span:
+    """
+    One timed operation of a trace. Only sampled spans are exported; unsampled
+    ones still carry the trace id so the decision propagates downstream.
+    """
+
+    def __init__(self, name, trace_id, parent_id=None, sampled=True, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.start_time = time.time()
+        self.duration = None
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def child(self, name, **attributes):
+        return Span(name, self.trace_id, self.span_id, self.sampled, attributes)
+
+    def set_error(self, error):
+        self.status = 'error'
+        self.attributes['error'] = type(error).__name__
+
+    def end(self):
+        self.duration = time.perf_counter() - self._started
+        if self.sampled:
+            export(self)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'service': settings.TRACE_SERVICE_NAME,
+            'name': self.name,
+            'start': self.start_time,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+def parse_traceparent(header):
+    """
+    (trace id, parent span id, sampled) from a W3C traceparent header, or None
+    when it is missing or invalid
+    """
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == 'ff' or trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def start_trace(name, traceparent=None, **attributes):
+    """
+    Server span of an incoming request: continues the caller's trace and
+    sampling decision, or starts a new trace sampled at TRACE_SAMPLE_RATE
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is None:
+        trace_id, parent_id = secrets.token_hex(16), None
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+    else:
+        trace_id, parent_id, sampled = parent
+    return Span(name, trace_id, parent_id, sampled, attributes)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def activate(span):
+    return _current_span.set(span)
+
+
+def deactivate(token):
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # In an async middleware chain each MiddlewareMixin hook runs in its
+        # own copy of the request's context, so the token is from another copy
+        _current_span.set(None if token.old_value is Token.MISSING else token.old_value)
+
+
+@contextmanager
+def start_span(name, **attributes):
+    """
+    Time the block as a child of the current span. Outside a trace, or in an
+    unsampled one, nothing is recorded and the current span is yielded.
+    """
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        yield parent
+        return
+    span = parent.child(name, **attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def inject(headers):
+    """
+    Add the traceparent of the current span to outgoing request headers
+    """
+    span = _current_span.get()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent
+    return headers
+
+
+def trace_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper recording each query as a db.query span
+    """
+    with start_span('db.query', **{
+        'db.alias': context['connection'].alias,
+        'db.statement': normalize_sql(sql),
+    }):
+        return execute(sql, params, many, context)
+
+
+class JsonLinesExporter:
+    """
+    Appends finished spans to TRACE_EXPORT_FILE, one JSON object per line.
+    Each line is a single O_APPEND write, so workers can share the file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = (json.dumps(span.to_dict()) + '\n').encode('utf-8')
+        with self._lock:
+            fd = os.open(settings.TRACE_EXPORT_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def _load_exporter(path):
+    return import_string(path)()
+
+
+def export(span):
+    """
+    Hand a finished span to the TRACE_EXPORTER; export failures never fail the request
+    """
+    try:
+        _load_exporter(settings.TRACE_EXPORTER).export(span)
+    except Exception as e:
+        logger.warning(f"Failed to export span {span.name}: {str(e)}")
+
+
+class TraceContextFilter(logging.Filter):
+    """
+    Adds the current trace id to log records so log lines of both services
+    can be correlated with each other and with exported spans
+    """
+
+    def filter(self, record):
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span is not None else '-'
+        return True
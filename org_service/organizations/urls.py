@@ -1,6 +1,9 @@
 from django.urls import path
-from .views.views import UserCreateView
+from .views.views import OrganizationView, OrgDeletionStatusView, UserCreateView, UserSearchView
 
 urlpatterns = [
+    path('<uuid:org_id>/', OrganizationView.as_view(), name='organization'),
+    path('<uuid:org_id>/deletion/', OrgDeletionStatusView.as_view(), name='organization-deletion'),
     path('<uuid:org_id>/users/', UserCreateView.as_view(), name='create-user'),
+    path('<uuid:org_id>/users/search/', UserSearchView.as_view(), name='search-users'),
 ]
\ No newline at end of file
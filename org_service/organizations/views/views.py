@@ -1,25 +1,133 @@
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import status
-from django.db import transaction, IntegrityError
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
-from organizations.models.models import Organization, OrgUser
-from organizations.serializers.serializers import UserCreateSerializer, UserResponseSerializer, InternalUserSerializer
+from organizations.models.models import Organization, OrgUser, OrgDeletionJob
+from organizations.serializers.serializers import (
+    UserCreateSerializer, UserResponseSerializer, InternalUserSerializer, UserListSerializer,
+    OrgDeletionJobSerializer
+)
 from organizations.permissions import ServiceTokenPermission
+from organizations.pagination import KeysetPagination, PaginationError
+from organizations.idempotency import idempotent
+from organizations.query_budget import query_budget
+from organizations.services.services import (
+    OrgUserCreationService, OrganizationDeletionService, UserSearchIndexService
+)
+from organizations.exceptions.exceptions import DuplicateEmailError
+from organizations import latency_stats, memory_profiling, sharding
 import logging
 
 logger = logging.getLogger(__name__)
 
+class OrganizationView(APIView):
+    # Deletion wipes the org and all its users: only trusted services may start it
+    permission_classes = [ServiceTokenPermission]
+
+    def delete(self, request, org_id):
+        """
+        Start an asynchronous, batched deletion of the organization
+        """
+        job = OrganizationDeletionService.request_deletion(org_id)
+        if job is None:
+            return Response({
+                "message": "Organization not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "message": "Organization deletion scheduled",
+            **OrgDeletionJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+class OrgDeletionStatusView(APIView):
+    permission_classes = [ServiceTokenPermission]
+
+    def get(self, request, org_id):
+        """
+        Report progress of the latest deletion job of the organization
+        """
+        job = OrgDeletionJob.objects.filter(org_id=org_id).order_by('-created_at').first()
+        if job is None:
+            return Response({
+                "message": "No deletion job for this organization"
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(OrgDeletionJobSerializer(job).data, status=status.HTTP_200_OK)
+
 class UserCreateView(APIView):
+    replica_reads = True
+
+    @query_budget(2, sharded=3)
+    def get(self, request, org_id):
+        """
+        List users of the specified organization with cursor pagination
+        """
+        try:
+            paginator = KeysetPagination(
+                limit=request.query_params.get('limit'),
+                cursor=request.query_params.get('cursor')
+            )
+        except PaginationError as e:
+            return Response({
+                "message": "Invalid pagination parameters",
+                "detail": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        fields = self._get_requested_fields(request)
+        if fields is None:
+            return Response({
+                "message": "Invalid fields",
+                "detail": f"Allowed fields: {', '.join(UserListSerializer.Meta.fields)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        role = request.query_params.get('role')
+        if role is not None and role not in dict(OrgUser.ROLE_CHOICES):
+            return Response({
+                "message": "Invalid role choice",
+                "detail": role
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not OrgUserCreationService.organization_exists(org_id):
+            return Response({
+                "message": "Organization not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        queryset = OrgUser.objects.filter(org_id=org_id)
+        if role is not None:
+            queryset = queryset.filter(role=role)
+
+        # Only load the columns the response needs plus the cursor columns
+        columns = {'id', 'created_at'}
+        for field in fields:
+            columns.update(UserListSerializer.FIELD_COLUMNS[field])
+        users = paginator.paginate_queryset(queryset.only(*columns))
+
+        serializer = UserListSerializer(users, many=True, fields=fields)
+        return Response(paginator.get_paginated_data(serializer.data), status=status.HTTP_200_OK)
+
+    def _get_requested_fields(self, request):
+        """Parse the `fields` query parameter; None when it names unknown fields"""
+        raw = request.query_params.get('fields')
+        if not raw:
+            return list(UserListSerializer.Meta.fields)
+        fields = [field.strip() for field in raw.split(',') if field.strip()]
+        if not fields or any(field not in UserListSerializer.FIELD_COLUMNS for field in fields):
+            return None
+        return fields
+
+    @idempotent(scope='create-user')
     def post(self, request, org_id):
         """
         Create a new user in the specified organization
         """
         try:
-            # Validate organization exists
-            org = get_object_or_404(Organization, id=org_id)
-            
             # Validate request data
             serializer = UserCreateSerializer(data=request.data)
             if not serializer.is_valid():
@@ -28,22 +136,13 @@ class UserCreateView(APIView):
                     "errors": serializer.errors
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Create user with transaction and select_for_update for concurrency
-            with transaction.atomic():
-                # Check for email uniqueness with row-level locking
-                if OrgUser.objects.select_for_update().filter(
-                    email=serializer.validated_data['email']
-                ).exists():
-                    return Response({
-                        "message": "User with this email already exists",
-                        "detail": "Email must be unique"
-                    }, status=status.HTTP_409_CONFLICT)
-
-                # Create the user
-                user = OrgUser.objects.create(
-                    org=org,
-                    **serializer.validated_data
-                )
+            # Optimistic mode relies on the unique email constraint instead of
+            # a locking pre-check; both modes surface duplicates as 409 below.
+            user = OrgUserCreationService.create_user(org_id, serializer.validated_data)
+            if user is None:
+                return Response({
+                    "message": "Organization not found"
+                }, status=status.HTTP_404_NOT_FOUND)
 
             # Return success response
             response_serializer = UserResponseSerializer(user)
@@ -52,10 +151,22 @@ class UserCreateView(APIView):
                 **response_serializer.data
             }
             
-            logger.info(f"User created successfully: {user.email} in org {org.name}")
+            logger.info("User created successfully: %s in org %s", user.email, org_id)
             return Response(response_data, status=status.HTTP_201_CREATED)
 
+        except DuplicateEmailError:
+            return Response({
+                "message": "User with this email already exists",
+                "detail": "Email must be unique"
+            }, status=status.HTTP_409_CONFLICT)
+
         except IntegrityError as e:
+            if 'foreign key' in str(e).lower():
+                # The org was deleted after the cached existence check
+                OrgUserCreationService.forget_organization(org_id)
+                return Response({
+                    "message": "Organization not found"
+                }, status=status.HTTP_404_NOT_FOUND)
             logger.error(f"Integrity error creating user: {str(e)}")
             return Response({
                 "message": "User with this email already exists",
@@ -76,17 +187,65 @@ class UserCreateView(APIView):
                 "detail": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class UserSearchView(APIView):
+    replica_reads = True
+    default_limit = 10
+    max_limit = 50
+    result_fields = ['user_id', 'email', 'name', 'role']
+
+    @query_budget(3, sharded=4)
+    def get(self, request, org_id):
+        """
+        Type-ahead search of organization users by email or name prefix
+        """
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            return Response({
+                "message": "Query parameter 'q' is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({
+                "message": "limit must be a positive integer"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not OrgUserCreationService.organization_exists(org_id):
+            return Response({
+                "message": "Organization not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        users = UserSearchIndexService.search(org_id, query, limit=limit)
+        serializer = UserListSerializer(users, many=True, fields=self.result_fields)
+        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+
 class InternalUserView(APIView):
     permission_classes = [ServiceTokenPermission]
+    replica_reads = True
 
+    @query_budget(1, sharded=2)
     def get(self, request, email):
         """
         Internal API to get user information by email for auth service
         """
         try:
-            user = get_object_or_404(OrgUser, email=email.lower())
-            serializer = InternalUserSerializer(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # One directory lookup names the shard; without sharding it is the default DB
+            shard = sharding.db_for_email(email.lower())
+            if shard is None:
+                return Response({
+                    "message": "User not found",
+                    "detail": "No OrgUser matches the given query."
+                }, status=status.HTTP_404_NOT_FOUND)
+            with sharding.use_shard(shard):
+                user = get_object_or_404(
+                    OrgUser.objects.by_email(email), org__status=Organization.STATUS_ACTIVE
+                )
+                serializer = InternalUserSerializer(user)
+                data = serializer.data
+            return Response(data, status=status.HTTP_200_OK)
         
         except Exception as e:
             logger.error(f"Error retrieving user {email}: {str(e)}")
@@ -94,3 +253,125 @@ class InternalUserView(APIView):
                 "message": "User not found",
                 "detail": str(e)
             }, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncInternalUserView(View):
+    """
+    Async-native InternalUserView, routed instead of it when
+    ASYNC_INTERNAL_VIEWS is set (serve config.asgi under uvicorn then).
+    Plain JSON GETs that pass the permission check are answered on the event
+    loop with the async ORM; everything else, including permission failures,
+    is handed to InternalUserView so both answer every request alike.
+    """
+    permission_classes = [ServiceTokenPermission]
+    replica_reads = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Service calls are signed, not session-authenticated: exempt like APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method == 'GET' and await self._passes_fast_path_checks(request):
+            return await self.get(request, *args, **kwargs)
+        return await sync_to_async(InternalUserView.as_view())(request, *args, **kwargs)
+
+    async def _passes_fast_path_checks(self, request):
+        # DRF would negotiate the renderer from these; leave that to it
+        if api_settings.URL_FORMAT_OVERRIDE in request.GET or not request.accepts(JSONRenderer.media_type):
+            return False
+        for permission_class in self.permission_classes:
+            if not await permission_class().ahas_permission(request, self):
+                return False
+        return True
+
+    @query_budget(1, sharded=2)
+    async def get(self, request, email):
+        try:
+            shard = await sharding.adb_for_email(email.lower())
+            if shard is None:
+                return self._response({
+                    "message": "User not found",
+                    "detail": "No OrgUser matches the given query."
+                }, status.HTTP_404_NOT_FOUND)
+            with sharding.use_shard(shard):
+                user = await aget_object_or_404(
+                    OrgUser.objects.by_email(email), org__status=Organization.STATUS_ACTIVE
+                )
+            return self._response(InternalUserSerializer(user).data, status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error retrieving user {email}: {str(e)}")
+            return self._response({
+                "message": "User not found",
+                "detail": str(e)
+            }, status.HTTP_404_NOT_FOUND)
+
+    def _response(self, data, status_code):
+        # What APIView's finalize_response and JSONRenderer would produce
+        response = HttpResponse(
+            JSONRenderer().render(data), status=status_code, content_type=JSONRenderer.media_type
+        )
+        response['Allow'] = 'GET, HEAD, OPTIONS'
+        return response
+
+
+class InternalStatsView(APIView):
+    permission_classes = [ServiceTokenPermission]
+
+    @query_budget(0)
+    def get(self, request):
+        """
+        Rolling p50/p95/p99 latency, QPS and error rate of the internal calls
+        served by this worker over the last 1, 5 and 15 minutes
+        """
+        return Response(latency_stats.stats.snapshot(), status=status.HTTP_200_OK)
+
+
+class InternalMemoryView(APIView):
+    permission_classes = [ServiceTokenPermission]
+
+    def _disabled(self):
+        return Response({
+            "message": "Memory profiling is disabled",
+            "detail": "Set MEMORY_PROFILING_ENABLED=true and restart the worker"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    @query_budget(0)
+    def get(self, request):
+        """
+        Top allocation sites of this worker by growth since the baseline or
+        over the last snapshot interval (?since=previous)
+        """
+        if not memory_profiling.is_enabled():
+            return self._disabled()
+        since = request.query_params.get('since', 'baseline')
+        key_type = request.query_params.get('key_type', 'lineno')
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 0
+        if since not in ('baseline', 'previous') or key_type not in memory_profiling.KEY_TYPES or limit < 1:
+            return Response({
+                "message": "Invalid parameters",
+                "detail": "since is baseline or previous, key_type is lineno, filename or traceback, limit > 0"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            sites = memory_profiling.top_growth(limit, since, key_type)
+        except ValueError as e:
+            return Response({
+                "message": "No snapshot to compare yet",
+                "detail": str(e)
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({**memory_profiling.memory_usage(), 'since': since, 'sites': sites}, status=status.HTTP_200_OK)
+
+    @query_budget(0)
+    def post(self, request):
+        """
+        Dump a snapshot of this worker for offline analysis with memory_report
+        """
+        if not memory_profiling.is_enabled():
+            return self._disabled()
+        path = memory_profiling.dump()
+        return Response({"message": "Snapshot written", "path": path}, status=status.HTTP_201_CREATED)